@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+"""
+Zava Logistics - Orchestration Benchmark
+========================================
+
+Measures how much of a run is our own orchestration rather than the model.
+
+AzureAIAgentClient is swapped for MockAgentClient (via a mock client
+factory), a local chat client with a configurable time to first token,
+token rate and scripted responses (tool calls included). The real main() then runs end to end: data loading, agent
+creation, the GroupChatBuilder workflow, termination, streaming rendering
+and compaction. Since the mock knows exactly how long the "model" took,
+everything else is overhead.
+
+Reported per case (median over --repeat runs):
+  - per-turn overhead:  (workflow time - simulated model time) / model calls
+  - throughput:         AgentRunUpdateEvents per second of workflow time
+  - memory:             tracemalloc peak of one extra run, plus process max RSS
+  - scaling:            the same metrics across rounds, message size and
+                        concurrent workflows
+  - orchestration:      workflow time of sequential versus fan-out rounds
+
+Results are written as JSON; pass --compare with an earlier file to print
+the change of each metric.
+
+Usage:
+    python benchmark.py                               # full suite
+    python benchmark.py --cases baseline,turns --repeat 5
+    python benchmark.py --compare benchmarks/benchmark-20260201-120000.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import importlib.metadata
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections.abc import AsyncIterable
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from agent_framework import (
+    BaseChatClient,
+    ChatMessage,
+    ChatOptions,
+    ChatResponse,
+    ChatResponseUpdate,
+    FunctionCallContent,
+    FunctionResultContent,
+    Role,
+    TextContent,
+    use_chat_middleware,
+    use_function_invocation,
+)
+
+import main as app
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+BENCHMARK_DIR = app.SCRIPT_DIR / "benchmarks"
+
+# Tool call each participant makes at the start of its turn (tools must exist on the agent)
+DEFAULT_TOOL_CALLS = {
+    "AnalystAgent": [("get_demand_summary", {"start_date": "2026-02-01", "end_date": "2026-02-28"})],
+    "ReviewerAgent": [("search_company_docs", {"query": "buffer requirement"})],
+}
+
+ROUTES = ["LAX-JFK", "ORD-MIA", "SEA-ATL", "DFW-BOS", "SFO-DEN"]
+
+# Scaling points
+TURN_ROUNDS = (1, 2, 4, 8)
+MESSAGE_TOKENS = (50, 200, 800, 1600)
+CONCURRENCY_LEVELS = (1, 2, 4, 8)
+
+CASES = ("baseline", "throughput", "turns", "message_size", "concurrency", "orchestration")
+
+
+@dataclass(frozen=True)
+class MockProfile:
+    """How the mock model behaves."""
+
+    latency: float = 0.02            # seconds to first token
+    tokens_per_second: float = 2000  # streaming rate (0 = instant)
+    response_tokens: int = 120       # length of generated responses (words)
+    chunk_tokens: int = 1            # tokens per streamed update
+    tool_calls: bool = True          # participants call a tool before answering
+    # agent name -> responses used in turn (cycled) instead of generated text
+    responses: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_script(cls, path: Path, **overrides) -> "MockProfile":
+        """Load scripted responses: {"responses": {"AnalystAgent": ["...", ...], ...}}."""
+        script = json.loads(path.read_text(encoding="utf-8"))
+        return cls(responses=script.get("responses", {}), **overrides)
+
+    def model_seconds(self, tokens: int) -> float:
+        return self.latency + (tokens / self.tokens_per_second if self.tokens_per_second else 0.0)
+
+
+# =============================================================================
+# MOCK AGENT CLIENT
+# =============================================================================
+
+@dataclass
+class RunStats:
+    """What one main() run did, as seen by the mock client."""
+
+    model_calls: int = 0
+    turns: int = 0
+    model_seconds: float = 0.0
+    output_tokens: int = 0
+    events: int = 0
+    first_call_at: float | None = None
+    last_call_end: float | None = None
+
+
+# Stats of the run the current task belongs to (each main() runs in its own task)
+_current_run: contextvars.ContextVar[RunStats | None] = contextvars.ContextVar("benchmark_run", default=None)
+
+
+@use_function_invocation
+@use_chat_middleware
+class MockAgentClient(BaseChatClient):
+    """Local stand-in for AzureAIAgentClient with simulated latency and token rate.
+
+    Like the Azure AI Agent service it keeps a thread per conversation and
+    returns its ID, so agents send only the new messages of each turn.
+    """
+
+    def __init__(self, profile: MockProfile, credential: Any = None, **kwargs: Any):
+        super().__init__()
+        self.profile = profile
+        self.agent_name: str | None = None
+        self.agents_client = None
+        self._threads: dict[str, list[ChatMessage]] = {}
+        self._calls = 0
+
+    def _update_agent_name_and_description(self, agent_name: str | None, description: str | None = None) -> None:
+        if agent_name and not self.agent_name:
+            self.agent_name = agent_name
+
+    async def __aenter__(self) -> "MockAgentClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def _inner_get_response(self, *, messages: list[ChatMessage], chat_options: ChatOptions, **kwargs: Any) -> ChatResponse:
+        updates = [u async for u in self._inner_get_streaming_response(messages=messages, chat_options=chat_options, **kwargs)]
+        return ChatResponse.from_chat_response_updates(updates)
+
+    async def _inner_get_streaming_response(
+        self, *, messages: list[ChatMessage], chat_options: ChatOptions, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        stats = _current_run.get() or RunStats()
+        start = time.perf_counter()
+        if stats.first_call_at is None:
+            stats.first_call_at = start
+        stats.model_calls += 1
+        self._calls += 1
+
+        thread_id = chat_options.conversation_id or f"thread_{uuid.uuid4().hex[:12]}"
+        history = self._threads.setdefault(thread_id, [])
+        history.extend(m for m in messages if m.role != Role.SYSTEM)
+
+        await asyncio.sleep(self.profile.latency)
+        tool_call = self._next_tool_call(messages, chat_options)
+        if tool_call is not None:
+            name, arguments = tool_call
+            stats.model_seconds += self.profile.latency
+            yield ChatResponseUpdate(
+                role="assistant",
+                contents=[FunctionCallContent(call_id=f"call_{uuid.uuid4().hex[:8]}", name=name, arguments=arguments)],
+                conversation_id=thread_id,
+            )
+        else:
+            text = self._response_text(history, chat_options)
+            words = text.split(" ")
+            stats.turns += 1
+            stats.output_tokens += len(words)
+            stats.model_seconds += self.profile.model_seconds(len(words))
+            step = max(1, self.profile.chunk_tokens)
+            streamed_at = time.perf_counter()
+            for i in range(0, len(words), step):
+                if self.profile.tokens_per_second:
+                    # Pace against the stream start so sleep overshoot doesn't accumulate
+                    due = streamed_at + (i + step) / self.profile.tokens_per_second
+                    await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                delta = " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+                yield ChatResponseUpdate(role="assistant", contents=[TextContent(text=delta)], conversation_id=thread_id)
+            history.append(ChatMessage(role=Role.ASSISTANT, text=text, author_name=self.agent_name))
+        stats.last_call_end = time.perf_counter()
+
+    def _next_tool_call(self, messages: list[ChatMessage], chat_options: ChatOptions) -> tuple[str, dict] | None:
+        """The scripted tool call for this turn, unless the tool already answered."""
+        if not self.profile.tool_calls or chat_options.response_format is not None:
+            return None
+        if any(isinstance(c, FunctionResultContent) for m in messages for c in m.contents):
+            return None
+        available = {getattr(t, "name", None) for t in chat_options.tools or []}
+        for name, arguments in DEFAULT_TOOL_CALLS.get(self.agent_name or "", []):
+            if name in available:
+                return name, arguments
+        return None
+
+    def _response_text(self, history: list[ChatMessage], chat_options: ChatOptions) -> str:
+        name = self.agent_name or "Agent"
+        if app.is_manager_agent(name):
+            if chat_options.response_format is not None:
+                return self._manager_selection(history)
+            return "Add two 767 rotations on LAX-JFK for the peak week. The analysis is complete."
+
+        scripted = self.profile.responses.get(name)
+        if scripted:
+            return scripted[(self._calls - 1) % len(scripted)]
+        # Distinct figures on every turn, so the stagnation rule never fires
+        words: list[str] = []
+        sentence = 0
+        while len(words) < self.profile.response_tokens:
+            route = ROUTES[sentence % len(ROUTES)]
+            value = (self._calls * 7919 + sentence * 104729) % 90_000 + 1_000
+            words += f"{route} day {sentence % 28 + 1} carries {value} packages.".split()
+            sentence += 1
+        return " ".join(words[:self.profile.response_tokens])
+
+    def _manager_selection(self, history: list[ChatMessage]) -> str:
+        """LLM manager mode: alternate participants for MAX_ROUNDS rounds, then finish."""
+        selections = sum(1 for m in history if m.role == Role.ASSISTANT and m.author_name == self.agent_name)
+        if selections >= 2 * app.MAX_ROUNDS:
+            return json.dumps({
+                "selected_participant": None,
+                "instruction": None,
+                "finish": True,
+                "final_message": "Add two 767 rotations on LAX-JFK. The analysis is complete.",
+            })
+        return json.dumps({
+            "selected_participant": app.SPEAKER_ROTATION[selections % len(app.SPEAKER_ROTATION)],
+            "instruction": f"Continue with step {selections + 1}.",
+            "finish": False,
+            "final_message": None,
+        })
+
+
+class MockClientFactory:
+    """Stand-in for AgentClientFactory that hands out mock clients."""
+
+    def __init__(self, profile: MockProfile):
+        self.profile = profile
+
+    def create(self, **kwargs: Any) -> MockAgentClient:
+        return MockAgentClient(self.profile, **kwargs)
+
+    async def close(self) -> None:
+        pass
+
+
+class MockCredential:
+    """Credential placeholder; the mock client never authenticates."""
+
+    async def close(self) -> None:
+        pass
+
+
+class _NullOutput(io.TextIOBase):
+    """Discards the demo's terminal output (formatting still runs)."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+class _DeclineCleanup(io.TextIOBase):
+    """Answers "n" to the resource cleanup prompt."""
+
+    def readline(self, size: int = -1) -> str:
+        return "n\n"
+
+
+# =============================================================================
+# RUNNING main()
+# =============================================================================
+
+@contextlib.contextmanager
+def patched_app(profile: MockProfile, **settings: Any):
+    """Point main() at the mock client and apply configuration overrides.
+
+    Runs use a temporary cache directory, so they never touch the user's
+    demand store, forecast state, doc index, facts or response cache.
+    """
+    cache = tempfile.TemporaryDirectory(prefix="zava-benchmark-")
+    cache_dir = Path(cache.name)
+    overrides = {
+        "AgentClientFactory": lambda *args, **kwargs: MockClientFactory(profile),
+        "AzureCliCredential": MockCredential,
+        "DOC_SEARCH_BACKEND": "local",
+        "LLM_CACHE_MODE": "off",
+        "MAX_RUN_SECONDS": None,
+        "TRACE_DIR": None,
+        "CACHE_DIR": cache_dir,
+        "DOC_MANIFEST_FILE": cache_dir / "doc_manifest.json",
+        "DEMAND_STORE_DIR": cache_dir / "demand_store",
+        "FORECAST_STATE_DIR": cache_dir / "forecast",
+        "LOCAL_INDEX_DIR": cache_dir / "doc_index",
+        "FACT_STORE_DIR": cache_dir / "facts",
+        "LLM_CACHE_DIR": cache_dir / "llm_responses",
+        # Concurrent runs would discard each other's checkpoints
+        "CHECKPOINT_DIR": None,
+        **settings,
+    }
+    extract_text = app.extract_text_from_event
+
+    def counting_extract(event_data):
+        # main() calls this once per AgentRunUpdateEvent
+        stats = _current_run.get()
+        if stats is not None:
+            stats.events += 1
+        return extract_text(event_data)
+
+    overrides["extract_text_from_event"] = counting_extract
+    saved = {name: getattr(app, name) for name in overrides}
+    saved_env = os.environ.get("AZURE_AI_PROJECT_ENDPOINT")
+    os.environ["AZURE_AI_PROJECT_ENDPOINT"] = saved_env or "https://benchmark.invalid/api/projects/mock"
+    saved_stdin = sys.stdin
+    for name, value in overrides.items():
+        setattr(app, name, value)
+    sys.stdin = _DeclineCleanup()
+    try:
+        with contextlib.redirect_stdout(_NullOutput()):
+            yield
+    finally:
+        for name, value in saved.items():
+            setattr(app, name, value)
+        sys.stdin = saved_stdin
+        if saved_env is None:
+            os.environ.pop("AZURE_AI_PROJECT_ENDPOINT", None)
+        cache.cleanup()
+
+
+async def _timed_main() -> tuple[RunStats, float, float]:
+    """Run main() once; returns its stats, start and end time."""
+    stats = RunStats()
+    _current_run.set(stats)
+    start = time.perf_counter()
+    await app.main()
+    return stats, start, time.perf_counter()
+
+
+def run_metrics(stats: RunStats, start: float, end: float) -> dict:
+    """Derive the reported metrics of one run."""
+    if stats.first_call_at is None or stats.turns == 0:
+        raise RuntimeError("main() finished without calling the model - check its output for errors")
+    workflow_seconds = stats.last_call_end - stats.first_call_at
+    overhead = max(0.0, workflow_seconds - stats.model_seconds)
+    return {
+        "wall_s": end - start,
+        "setup_s": stats.first_call_at - start,
+        "workflow_s": workflow_seconds,
+        "model_s": stats.model_seconds,
+        "overhead_s": overhead,
+        "overhead_per_call_ms": overhead * 1000 / stats.model_calls,
+        "overhead_share": overhead / workflow_seconds if workflow_seconds else 0.0,
+        "model_calls": stats.model_calls,
+        "turns": stats.turns,
+        "events": stats.events,
+        "events_per_s": stats.events / workflow_seconds if workflow_seconds else 0.0,
+        "output_tokens": stats.output_tokens,
+    }
+
+
+def _median(runs: list[dict]) -> dict:
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+async def run_case(
+    name: str,
+    profile: MockProfile,
+    repeat: int,
+    concurrency: int = 1,
+    measure_memory: bool = True,
+    **settings: Any,
+) -> dict:
+    """Run main() `repeat` times (each time `concurrency` copies at once) and aggregate."""
+    runs: list[dict] = []
+    walls: list[float] = []
+    with patched_app(profile, **settings):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = await asyncio.gather(*(_timed_main() for _ in range(concurrency)))
+            walls.append(time.perf_counter() - started)
+            runs += [run_metrics(*result) for result in results]
+
+        peak_mb = None
+        if measure_memory:
+            tracemalloc.start()
+            try:
+                await asyncio.gather(*(_timed_main() for _ in range(concurrency)))
+                peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            finally:
+                tracemalloc.stop()
+
+    result = {"case": name, "concurrency": concurrency, "runs": len(runs), **_median(runs)}
+    if concurrency > 1:
+        batch = statistics.median(walls)
+        result["batch_wall_s"] = batch
+        result["workflows_per_s"] = concurrency / batch
+    result["peak_traced_mb"] = peak_mb
+    result["settings"] = {k: v for k, v in settings.items() if isinstance(v, (int, float, str, type(None)))}
+    return result
+
+
+def scaling_slope(points: list[dict], x: str, y: str) -> float | None:
+    """Least-squares slope of y over x across the points of a scaling series."""
+    if len(points) < 2:
+        return None
+    return float(np.polyfit([p[x] for p in points], [p[y] for p in points], 1)[0])
+
+
+# =============================================================================
+# SUITE
+# =============================================================================
+
+async def run_suite(cases: list[str], profile: MockProfile, repeat: int, measure_memory: bool) -> dict:
+    """Run the selected benchmark cases and return the results document."""
+    results: dict[str, Any] = {}
+
+    def report(label: str, r: dict) -> None:
+        print(
+            f"  {label:<28} {r['overhead_per_call_ms']:7.2f} ms/call overhead  "
+            f"{r['events_per_s']:9,.0f} events/s  {r['turns']:3.0f} turns  "
+            f"{r['wall_s']:6.2f}s wall" + (f"  {r['peak_traced_mb']:6.1f} MB peak" if r["peak_traced_mb"] is not None else "")
+        )
+
+    # Lift the turn cap and token budget so the round count alone decides the length
+    unbounded = {"MAX_TURNS": 1_000, "MAX_CONVERSATION_TOKENS": None}
+
+    if "baseline" in cases:
+        print("baseline (default configuration)")
+        results["baseline"] = await run_case("baseline", profile, repeat, measure_memory=measure_memory)
+        report("default", results["baseline"])
+
+    if "throughput" in cases:
+        # Instant model: whatever time is left is the orchestration itself
+        print("throughput (zero latency, instant tokens)")
+        instant = replace(profile, latency=0.0, tokens_per_second=0, response_tokens=400)
+        results["throughput"] = await run_case("throughput", instant, repeat, measure_memory=measure_memory)
+        report("instant model", results["throughput"])
+
+    if "turns" in cases:
+        print("scaling with turns")
+        points = []
+        for rounds in TURN_ROUNDS:
+            r = await run_case(f"rounds={rounds}", profile, repeat, measure_memory=measure_memory, MAX_ROUNDS=rounds, **unbounded)
+            r["rounds"] = rounds
+            points.append(r)
+            report(f"{rounds} rounds", r)
+        results["turns"] = {
+            "points": points,
+            "overhead_ms_per_turn_slope": (s * 1000 if (s := scaling_slope(points, "turns", "overhead_s")) is not None else None),
+        }
+
+    if "message_size" in cases:
+        print("scaling with message size")
+        points = []
+        for tokens in MESSAGE_TOKENS:
+            r = await run_case(
+                f"tokens={tokens}", replace(profile, response_tokens=tokens), repeat,
+                measure_memory=measure_memory, **unbounded,
+            )
+            r["response_tokens"] = tokens
+            points.append(r)
+            report(f"{tokens} tokens/response", r)
+        results["message_size"] = {
+            "points": points,
+            "overhead_ms_per_1k_tokens_slope": (
+                s * 1e6 if (s := scaling_slope(points, "response_tokens", "overhead_s")) is not None else None
+            ),
+        }
+
+    if "concurrency" in cases:
+        print("scaling with concurrent workflows")
+        points = []
+        for level in CONCURRENCY_LEVELS:
+            r = await run_case(f"concurrency={level}", profile, repeat, concurrency=level, measure_memory=measure_memory)
+            points.append(r)
+            report(f"{level} concurrent", r)
+        results["concurrency"] = {"points": points}
+
+    if "orchestration" in cases:
+        # Per-call overhead is not comparable here: fan-out turns overlap, so
+        # workflow time drops below the summed model time
+        print("sequential versus fan-out rounds")
+        points = []
+        for mode in ("sequential", "fanout"):
+            r = await run_case(
+                f"orchestration={mode}", profile, repeat, measure_memory=measure_memory, ORCHESTRATION_MODE=mode
+            )
+            points.append(r)
+            print(f"  {mode:<28} {r['workflow_s']:7.2f}s workflow  {r['model_s']:7.2f}s model  {r['turns']:3.0f} turns")
+        saved = points[0]["workflow_s"] - points[1]["workflow_s"]
+        print(f"  fan-out saves {saved:.2f}s per run")
+        results["orchestration"] = {"points": points, "fanout_saved_s": saved}
+
+    return results
+
+
+def environment_info() -> dict:
+    """Version information stored with the results."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=app.SCRIPT_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        framework = importlib.metadata.version("agent-framework-core")
+    except importlib.metadata.PackageNotFoundError:
+        framework = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "agent_framework_core": framework,
+        "manager_mode": app.MANAGER_MODE,
+        "orchestration_mode": app.ORCHESTRATION_MODE,
+        "context_compaction": app.CONTEXT_COMPACTION,
+    }
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+COMPARED_METRICS = ("overhead_per_call_ms", "events_per_s", "setup_s", "peak_traced_mb")
+
+
+def _flatten(results: dict) -> dict[str, dict]:
+    """Case label -> metrics, with scaling points listed individually."""
+    flat = {}
+    for name, value in results.items():
+        if "points" in value:
+            for point in value["points"]:
+                flat[f"{name}/{point['case']}"] = point
+        else:
+            flat[name] = value
+    return flat
+
+
+def compare(previous: dict, current: dict) -> None:
+    """Print the change of the key metrics between two result files."""
+    before, after = _flatten(previous["results"]), _flatten(current["results"])
+    print(f"\nCompared with {previous['environment'].get('git_commit') or previous['timestamp']}:")
+    for label in after:
+        if label not in before:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            old, new = before[label].get(metric), after[label].get(metric)
+            if old is None or new is None:
+                continue
+            delta = (new - old) / old * 100 if old else 0.0
+            changes.append(f"{metric} {old:,.2f} -> {new:,.2f} ({delta:+.0f}%)")
+        if changes:
+            print(f"  {label}: " + "; ".join(changes))
+
+
+# =============================================================================
+# ENTRY POINT
+# =============================================================================
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the group chat orchestration against a mock model.")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Comma-separated cases ({', '.join(CASES)}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported.")
+    parser.add_argument("--latency", type=float, default=MockProfile.latency, help="Mock time to first token (s).")
+    parser.add_argument("--tokens-per-second", type=float, default=MockProfile.tokens_per_second,
+                        help="Mock streaming rate (0 = instant).")
+    parser.add_argument("--response-tokens", type=int, default=MockProfile.response_tokens,
+                        help="Length of generated mock responses.")
+    parser.add_argument("--no-tools", action="store_true", help="Participants answer without calling a tool.")
+    parser.add_argument("--script", type=Path, help="JSON file with scripted responses per agent.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass.")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/benchmark-<time>.json).")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against.")
+    return parser.parse_args(argv)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Path:
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        raise SystemExit(f"Unknown case(s): {', '.join(unknown)} (use {', '.join(CASES)})")
+
+    settings = {
+        "latency": args.latency,
+        "tokens_per_second": args.tokens_per_second,
+        "response_tokens": args.response_tokens,
+        "tool_calls": not args.no_tools,
+    }
+    profile = MockProfile.from_script(args.script, **settings) if args.script else MockProfile(**settings)
+
+    started = datetime.now()
+    results = await run_suite(cases, profile, max(1, args.repeat), measure_memory=not args.no_memory)
+    document = {
+        "timestamp": started.isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "profile": {k: v for k, v in asdict(profile).items() if k != "responses"},
+        "repeat": args.repeat,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None,
+        "results": results,
+    }
+
+    output = args.output or BENCHMARK_DIR / f"benchmark-{started:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}")
+    if document["max_rss_mb"] is not None:
+        print(f"Process max RSS: {document['max_rss_mb']:.0f} MB")
+
+    if args.compare:
+        compare(json.loads(args.compare.read_text(encoding="utf-8")), document)
+    return output
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(parse_args()))
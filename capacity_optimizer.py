@@ -0,0 +1,445 @@
+"""
+Zava Logistics - Capacity Optimizer
+===================================
+
+Local fleet-assignment engine behind the capacity recommendations, exposed
+to the agents as a function tool so the hard numbers come from arithmetic
+rather than model prose.
+
+Inputs are read from the company docs:
+  - fleet_specifications.md: payload, range, daily availability and assigned
+    routes of each aircraft type
+  - route_network.md: distance, current frequency and short-term expansion
+    premium per route, charter premium and charter payload
+  - capacity_policy.md: the per-route capacity buffer
+  - cost_efficiency_targets.md: cost per kg shipped (to express costs in $)
+
+For every route and day the optimizer computes the capacity required with
+the buffer, the flights that requires, buffer violations and consolidation
+room. Shortfalls are then covered at minimum cost following the policy's
+cost hierarchy: units freed by trimming departures a route does not need
+that day (schedule optimization) and units the schedule leaves idle are
+flown first on routes of their own type (frequency increase), then on
+other routes (cross-route reallocation); charter covers the rest. Each
+available unit flies at most one departure per day.
+
+All route x day quantities are NumPy arrays. The assignment enumerates every
+way of placing the spare units on the routes that are short and evaluates
+them for all days at once, which keeps a re-solve in the millisecond range.
+"""
+
+import itertools
+import json
+import math
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Annotated, Callable
+
+import numpy as np
+
+from demand_analytics import DemandData
+
+
+# Used when a value cannot be found in the docs
+DEFAULT_BUFFER = 0.15
+DEFAULT_CHARTER_PREMIUM = 1.5
+DEFAULT_COST_PER_KG = 0.45
+
+# Ranks cross-route reallocation after frequency increases (cost hierarchy step 3)
+REALLOCATION_PREMIUM = 0.05
+
+# Above this many candidate assignments per solve, fall back to a greedy assignment
+MAX_ASSIGNMENTS = 50_000
+
+_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+# =============================================================================
+# FLEET AND ROUTE CONFIGURATION
+# =============================================================================
+
+@dataclass(frozen=True)
+class AircraftType:
+    name: str
+    payload_kg: float
+    range_km: float
+    daily_units: int              # units available per day (lower bound of a range)
+    routes: tuple[str, ...]       # routes this type is assigned to
+
+
+@dataclass(frozen=True)
+class RouteSpec:
+    route: str
+    distance_km: float
+    frequency: int                # scheduled departures per day
+    expansion_premium: float      # extra cost per kg for added frequency (0.15 = +15%)
+
+
+@dataclass(frozen=True)
+class FleetConfig:
+    aircraft: tuple[AircraftType, ...]
+    routes: dict[str, RouteSpec]
+    buffer: float
+    charter_premium: float
+    charter_payload_kg: float
+    cost_per_kg: float
+
+    @classmethod
+    def from_docs(cls, docs_dir: Path) -> "FleetConfig":
+        """Read the fleet, route, policy and cost figures from the markdown docs."""
+        fleet_md = (docs_dir / "fleet_specifications.md").read_text(encoding="utf-8")
+        routes_md = (docs_dir / "route_network.md").read_text(encoding="utf-8")
+        policy_md = (docs_dir / "capacity_policy.md").read_text(encoding="utf-8")
+        cost_md = (docs_dir / "cost_efficiency_targets.md").read_text(encoding="utf-8")
+
+        aircraft = []
+        for name, body in _sections(fleet_md, "###"):
+            specs = {row[0].lower(): row[1] for row in _table_rows(body) if len(row) >= 2}
+            if "maximum payload" not in specs:
+                continue
+            aircraft.append(AircraftType(
+                name=name,
+                payload_kg=_first_number(specs["maximum payload"]),
+                range_km=_first_number(specs.get("range", "0")),
+                daily_units=int(_first_number(specs.get("daily availability", specs.get("available units", "0")))),
+                routes=tuple(r.strip().upper() for r in specs.get("assigned routes", "").split(",") if r.strip()),
+            ))
+        if not aircraft:
+            raise ValueError("no aircraft types found in fleet_specifications.md")
+
+        premiums = {
+            row[0].upper(): _first_number(row[3]) / 100.0
+            for row in _table_rows(routes_md)
+            if len(row) >= 4 and "%" in row[3] and "-" in row[0]
+        }
+        routes = {}
+        for row in _table_rows(routes_md):
+            if len(row) >= 6 and re.search(r"\d+x daily", row[5]):
+                code = row[0].upper()
+                routes[code] = RouteSpec(
+                    route=code,
+                    distance_km=_first_number(row[3]),
+                    frequency=int(_first_number(row[5])),
+                    expansion_premium=premiums.get(code, 0.0),
+                )
+        if not routes:
+            raise ValueError("no routes found in route_network.md")
+
+        buffer = re.search(r"(\d+(?:\.\d+)?)% capacity buffer", policy_md)
+        charter_cost = re.search(r"Charter.*?Cost\*\*:\s*([\d.]+)x", routes_md, re.DOTALL)
+        charter_capacity = re.search(r"Capacity\*\*:\s*Full aircraft \(([\d,]+)", routes_md)
+        cost_row = next((row for row in _table_rows(cost_md) if row[0].lower() == "cost per kg shipped"), None)
+
+        return cls(
+            aircraft=tuple(aircraft),
+            routes=routes,
+            buffer=float(buffer.group(1)) / 100.0 if buffer else DEFAULT_BUFFER,
+            charter_premium=float(charter_cost.group(1)) if charter_cost else DEFAULT_CHARTER_PREMIUM,
+            charter_payload_kg=(
+                _first_number(charter_capacity.group(1)) if charter_capacity else min(a.payload_kg for a in aircraft)
+            ),
+            # Q1 target column of the KPI table
+            cost_per_kg=_first_number(cost_row[2]) if cost_row and len(cost_row) > 2 else DEFAULT_COST_PER_KG,
+        )
+
+    def route_aircraft(self, route: str) -> AircraftType:
+        """Aircraft type scheduled on a route."""
+        for aircraft in self.aircraft:
+            if route in aircraft.routes:
+                return aircraft
+        raise KeyError(f"No aircraft type is assigned to route '{route}'")
+
+
+def _sections(markdown: str, marker: str) -> list[tuple[str, str]]:
+    """(heading, body) pairs for every heading of exactly the given level."""
+    parts = re.split(rf"^{re.escape(marker)} (.+)$", markdown, flags=re.MULTILINE)
+    return [(parts[i].strip(), parts[i + 1]) for i in range(1, len(parts) - 1, 2)]
+
+
+def _table_rows(markdown: str) -> list[list[str]]:
+    """Cells of every markdown table row, separator rows excluded."""
+    rows = []
+    for line in markdown.splitlines():
+        line = line.strip()
+        if line.startswith("|") and not re.fullmatch(r"\|[\s:|-]+\|", line):
+            rows.append([cell.strip().strip("*") for cell in line.strip("|").split("|")])
+    return rows
+
+
+def _first_number(text: str) -> float:
+    match = _NUMBER_RE.search(text)
+    if not match:
+        raise ValueError(f"no number in '{text}'")
+    return float(match.group(0).replace(",", ""))
+
+
+@lru_cache(maxsize=4)
+def _load_cached(docs_dir: str, mtimes: tuple[int, ...]) -> FleetConfig:
+    return FleetConfig.from_docs(Path(docs_dir))
+
+
+def load_fleet_config(docs_dir: Path) -> FleetConfig:
+    """Load the fleet configuration once per version of the docs."""
+    docs_dir = Path(docs_dir)
+    mtimes = tuple(p.stat().st_mtime_ns for p in sorted(docs_dir.glob("*.md")))
+    return _load_cached(str(docs_dir.resolve()), mtimes)
+
+
+# =============================================================================
+# OPTIMIZER
+# =============================================================================
+
+class CapacityOptimizer:
+    """Vectorized capacity check and minimum-cost fleet assignment."""
+
+    def __init__(self, config: FleetConfig):
+        self.config = config
+
+    def solve(
+        self,
+        data: DemandData,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        route: str | None = None,
+        demand_multiplier: float = 1.0,
+    ) -> dict:
+        """Capacity plan for a date range (and optionally one route)."""
+        if not (demand_multiplier > 0 and np.isfinite(demand_multiplier)):
+            raise ValueError(f"demand_multiplier must be a positive number, got {demand_multiplier!r}")
+        started = time.perf_counter()
+        cfg = self.config
+        window = data.day_slice(start_date, end_date)
+        days = data.days[window]
+
+        # Spare units are shared by the whole network, so every route is solved
+        # and the route filter only narrows the output
+        selected = [data.route_index(route)] if route else range(len(data.routes))
+        codes = [str(code).upper() for code in data.routes]
+        unknown = [code for code in codes if code not in cfg.routes]
+        if unknown:
+            raise KeyError(f"Routes missing from route_network.md: {', '.join(unknown)}")
+
+        specs = [cfg.routes[code] for code in codes]
+        own = [cfg.route_aircraft(code) for code in codes]
+        demand = data.weight_kg[:, window] * demand_multiplier                    # [R, D]
+
+        payload = np.array([a.payload_kg for a in own])[:, None]                 # [R, 1]
+        frequency = np.array([s.frequency for s in specs])[:, None]              # [R, 1]
+        scheduled = frequency * payload
+        required = demand * (1.0 + cfg.buffer)
+
+        required_flights = np.ceil(required / payload).astype(int)
+        load_factor = np.divide(demand, scheduled, out=np.zeros_like(demand), where=scheduled > 0)
+        shortfall = np.maximum(required - scheduled, 0.0)
+
+        # Spare units per type and day: routes fly only the departures they need
+        # (never more than scheduled); routes outside the data keep their schedule
+        flown = np.minimum(required_flights, frequency)                          # [R, D]
+        spare = np.array([[a.daily_units] for a in cfg.aircraft]) - np.zeros(len(days), dtype=int)
+        for code, spec in cfg.routes.items():
+            t = cfg.aircraft.index(cfg.route_aircraft(code))
+            spare[t] -= flown[codes.index(code)] if code in codes else spec.frequency
+        spare = np.maximum(spare, 0)                                             # [T, D]
+
+        extra, charter = self._assign(specs, own, shortfall, spare)             # [T, R, D], [R, D]
+        flight_cost = self._flight_costs(specs, own)                             # [T, R]
+        flight_cost[~np.isfinite(flight_cost)] = 0.0                             # never assigned
+        charter_cost = cfg.charter_payload_kg * cfg.cost_per_kg * cfg.charter_premium
+        cost = (extra * flight_cost[:, :, None]).sum(axis=0) + charter * charter_cost  # [R, D]
+
+        n_days = len(days)
+        routes_out = []
+        for r in selected:
+            code = codes[r]
+            lf = load_factor[r]
+            routes_out.append({
+                "route": code,
+                "aircraft": own[r].name,
+                "scheduled_flights_per_day": int(specs[r].frequency),
+                "scheduled_capacity_kg": int(scheduled[r, 0]),
+                "avg_demand_kg": round(float(demand[r].mean()), 1) if n_days else 0.0,
+                "peak_demand_kg": int(demand[r].max()) if n_days else 0,
+                "avg_load_factor_pct": round(100.0 * float(lf.mean()), 1) if n_days else 0.0,
+                "peak_load_factor_pct": round(100.0 * float(lf.max()), 1) if n_days else 0.0,
+                "max_required_flights": int(required_flights[r].max()) if n_days else 0,
+                "buffer_violation_days": int((shortfall[r] > 0).sum()),
+                "over_capacity_days": int((demand[r] > scheduled[r, 0]).sum()),
+                # Days on which fewer departures would still cover demand plus buffer
+                "consolidation_days": int((required_flights[r] < specs[r].frequency).sum()),
+                "extra_flights": {
+                    a.name: int(extra[t, r].sum()) for t, a in enumerate(cfg.aircraft) if extra[t, r].any()
+                },
+                "charter_flights": int(charter[r].sum()),
+                "incremental_cost_usd": round(float(cost[r].sum()), 2),
+            })
+
+        violation_days = []
+        for d in np.flatnonzero((shortfall[selected] > 0).any(axis=0)):
+            for r in (r for r in selected if shortfall[r, d] > 0):
+                violation_days.append({
+                    "date": str(days[d]),
+                    "route": codes[r],
+                    "demand_kg": int(demand[r, d]),
+                    "required_with_buffer_kg": int(required[r, d]),
+                    "scheduled_capacity_kg": int(scheduled[r, 0]),
+                    "load_factor_pct": round(100.0 * float(load_factor[r, d]), 1),
+                    "extra_flights": {
+                        a.name: int(extra[t, r, d]) for t, a in enumerate(cfg.aircraft) if extra[t, r, d]
+                    },
+                    "charter_flights": int(charter[r, d]),
+                })
+
+        return {
+            "start_date": str(days[0]) if n_days else None,
+            "end_date": str(days[-1]) if n_days else None,
+            "days": n_days,
+            "demand_multiplier": demand_multiplier,
+            "buffer_pct": round(100.0 * cfg.buffer, 1),
+            "spare_units_per_day": {
+                a.name: {"min": int(spare[t].min()), "max": int(spare[t].max())} if n_days else {}
+                for t, a in enumerate(cfg.aircraft)
+            },
+            "total_extra_flights": int(extra[:, selected].sum()),
+            "total_charter_flights": int(charter[selected].sum()),
+            "total_incremental_cost_usd": round(float(cost[selected].sum()), 2),
+            "routes": routes_out,
+            "buffer_violations": violation_days,
+            "solve_ms": round(1000.0 * (time.perf_counter() - started), 2),
+        }
+
+    # -------------------------------------------------------------------------
+    # Assignment
+    # -------------------------------------------------------------------------
+
+    def _flight_costs(self, specs: list[RouteSpec], own: list[AircraftType]) -> np.ndarray:
+        """Cost of one extra flight of each type on each route; inf where out of range."""
+        cfg = self.config
+        costs = np.full((len(cfg.aircraft), len(specs)), np.inf)
+        for t, aircraft in enumerate(cfg.aircraft):
+            for r, spec in enumerate(specs):
+                if aircraft.range_km and aircraft.range_km < spec.distance_km:
+                    continue
+                premium = spec.expansion_premium + (0.0 if aircraft is own[r] else REALLOCATION_PREMIUM)
+                costs[t, r] = aircraft.payload_kg * cfg.cost_per_kg * (1.0 + premium)
+        return costs
+
+    def _assign(
+        self,
+        specs: list[RouteSpec],
+        own: list[AircraftType],
+        shortfall: np.ndarray,
+        spare: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Minimum-cost cover of every route/day shortfall with spare units, then charter."""
+        cfg = self.config
+        n_types, (n_routes, n_days) = len(cfg.aircraft), shortfall.shape
+        extra = np.zeros((n_types, n_routes, n_days), dtype=int)
+        charter = np.zeros((n_routes, n_days), dtype=int)
+
+        short_routes = np.flatnonzero((shortfall > 0).any(axis=1))
+        short_days = np.flatnonzero((shortfall > 0).any(axis=0))
+        if short_routes.size == 0:
+            return extra, charter
+
+        flight_cost = self._flight_costs(specs, own)[:, short_routes]             # [T, S]
+        finite_cost = np.where(np.isfinite(flight_cost), flight_cost, 0.0)
+        payloads = np.array([a.payload_kg for a in cfg.aircraft])
+        gap = shortfall[np.ix_(short_routes, short_days)]                         # [S, K]
+        spare = spare[:, short_days]                                              # [T, K]
+
+        plans = self._candidate_plans(spare.max(axis=1), flight_cost)             # [M, T, S]
+        if plans is None:
+            best = self._greedy(gap, spare, flight_cost, payloads)                # [K, T, S]
+        else:
+            covered = np.einsum("mts,t->ms", plans, payloads)                     # [M, S]
+            plan_cost = (plans * finite_cost).sum(axis=(1, 2))
+            remaining = np.maximum(gap[None, :, :] - covered[:, :, None], 0.0)    # [M, S, K]
+            charters = np.ceil(remaining / cfg.charter_payload_kg)
+            charter_cost = cfg.charter_payload_kg * cfg.cost_per_kg * cfg.charter_premium
+            total = plan_cost[:, None] + charters.sum(axis=1) * charter_cost      # [M, K]
+            # Plans using more units than a day has spare are infeasible that day
+            total[(plans.sum(axis=2)[:, :, None] > spare[None, :, :]).any(axis=1)] = np.inf
+            best = plans[total.argmin(axis=0)]                                    # [K, T, S]
+
+        # Never fly a spare unit on a route/day that has no shortfall
+        best = best * (gap.T[:, None, :] > 0)
+        covered = np.einsum("kts,t->sk", best, payloads)
+        extra[np.ix_(range(n_types), short_routes, short_days)] = best.transpose(1, 2, 0)
+        charter[np.ix_(short_routes, short_days)] = np.ceil(
+            np.maximum(gap - covered, 0.0) / cfg.charter_payload_kg
+        ).astype(int)
+        return extra, charter
+
+    @staticmethod
+    def _candidate_plans(spare: np.ndarray, flight_cost: np.ndarray) -> np.ndarray | None:
+        """Every placement of up to `spare[t]` units of each type on the short routes.
+
+        Returns None when there are more than MAX_ASSIGNMENTS candidates.
+        """
+        n_types, n_short = flight_cost.shape
+        eligible = [np.flatnonzero(np.isfinite(flight_cost[t])) for t in range(n_types)]
+        # Multisets of size 0..spare drawn from the eligible routes
+        counts = [sum(math.comb(len(e) + k - 1, k) for k in range(spare[t] + 1)) for t, e in enumerate(eligible)]
+        if math.prod(counts) > MAX_ASSIGNMENTS:
+            return None
+
+        per_type = []
+        for t in range(n_types):
+            options = []
+            for k in range(spare[t] + 1):
+                for placement in itertools.combinations_with_replacement(eligible[t], k):
+                    options.append(np.bincount(np.asarray(placement, dtype=int), minlength=n_short))
+            per_type.append(options)
+        return np.array([np.stack(combo) for combo in itertools.product(*per_type)], dtype=int)
+
+    def _greedy(
+        self,
+        gap: np.ndarray,
+        spare: np.ndarray,
+        flight_cost: np.ndarray,
+        payloads: np.ndarray,
+    ) -> np.ndarray:
+        """Per day, give each spare unit to the largest remaining gap it can serve cheapest."""
+        n_types, n_short = flight_cost.shape
+        best = np.zeros((gap.shape[1], n_types, n_short), dtype=int)
+        order = np.argsort(np.where(np.isfinite(flight_cost), flight_cost / payloads[:, None], np.inf).min(axis=1))
+        for k in range(gap.shape[1]):
+            remaining = gap[:, k].copy()
+            for t in order:
+                for _ in range(spare[t, k]):
+                    candidates = np.where(np.isfinite(flight_cost[t]) & (remaining > 0), remaining, -1.0)
+                    s = int(candidates.argmax())
+                    if candidates[s] <= 0:
+                        break
+                    best[k, t, s] += 1
+                    remaining[s] -= payloads[t]
+        return best
+
+
+# =============================================================================
+# AGENT TOOLS
+# =============================================================================
+
+def build_capacity_tools(data: DemandData, optimizer: CapacityOptimizer) -> list[Callable[..., str]]:
+    """Create the capacity planning tool registered on the Analyst Agent."""
+
+    def get_capacity_plan(
+        start_date: Annotated[str | None, "First day to plan (YYYY-MM-DD). Omit for the whole dataset."] = None,
+        end_date: Annotated[str | None, "Last day to plan (YYYY-MM-DD). Omit for the whole dataset."] = None,
+        route: Annotated[str | None, "Route code such as LAX-JFK. Omit for the whole network."] = None,
+        demand_multiplier: Annotated[float, "What-if factor applied to demand, e.g. 1.3 for +30%."] = 1.0,
+    ) -> str:
+        """Check daily demand against scheduled fleet capacity plus the policy capacity buffer.
+
+        Returns load factors, required flights, buffer violations, consolidation days and the
+        minimum-cost cover of each shortfall (extra 767/A300 flights, then charter) with costs.
+        """
+        try:
+            return json.dumps(optimizer.solve(data, start_date, end_date, route, demand_multiplier))
+        except (KeyError, ValueError) as e:
+            return json.dumps({"error": str(e.args[0]) if e.args else str(e)})
+
+    return [get_capacity_plan]
@@ -0,0 +1,171 @@
+"""
+Zava Logistics - Run Checkpoints
+================================
+
+Saves the state of a group chat run to local disk after every completed
+turn, so a run that fails late (a dropped connection, a throttled
+deployment, a crash) can continue where it stopped instead of starting over.
+
+A checkpoint (one JSON file per run) holds:
+  - the conversation: role, speaker and text of every message so far
+  - the speaker state: where the rule-based selector or fan-out chat stands
+    (round, rotation slot, pending retries), so the resumed run picks the
+    same next speaker
+  - the remote resources the run uses: agent IDs per agent, vector store
+    and file IDs
+
+`python main.py --resume` loads the newest checkpoint, reattaches to those
+agents and that vector store and feeds the conversation into a new
+workflow; a failure then costs the turn that was in progress. The
+checkpoint is removed once the run completes. Starting a new run instead
+discards the checkpoints left by unfinished runs and deletes their agents.
+
+Checkpointer saves through the termination condition, which both workflows
+call with the full conversation after each turn.
+"""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from agent_framework import ChatMessage
+
+
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class RunCheckpoint:
+    """Everything needed to continue one group chat run."""
+
+    run_id: str
+    task: str
+    settings: dict[str, str] = field(default_factory=dict)        # modes the run must resume with
+    messages: list[dict[str, Any]] = field(default_factory=list)  # {"role", "author", "text"}
+    speaker_state: dict[str, Any] = field(default_factory=dict)
+    agent_ids: dict[str, str] = field(default_factory=dict)       # agent name -> remote agent ID
+    vector_store_id: str | None = None
+    file_ids: list[str] = field(default_factory=list)
+    updated: float = 0.0
+
+    @classmethod
+    def new(cls, task: str, settings: dict[str, str] | None = None, **resources: Any) -> "RunCheckpoint":
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        return cls(run_id=run_id, task=task, settings=dict(settings or {}), **resources)
+
+    @property
+    def turns(self) -> int:
+        """Completed turns (messages other than the user's)."""
+        return sum(1 for m in self.messages if m["role"] != "user")
+
+    def conversation(self) -> list[ChatMessage]:
+        """The checkpointed messages, ready to seed a workflow's run_stream."""
+        return [
+            ChatMessage(role=m["role"], text=m["text"], author_name=m.get("author"))
+            for m in self.messages
+        ]
+
+
+def encode_message(message: ChatMessage) -> dict[str, Any]:
+    """The parts of a message a resumed run needs (tool calls stay on the agents' side)."""
+    return {"role": message.role.value, "author": message.author_name, "text": message.text or ""}
+
+
+class CheckpointStore:
+    """Directory of run checkpoints, written atomically."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, run_id: str) -> Path:
+        return self.directory / f"{run_id}.json"
+
+    def save(self, checkpoint: RunCheckpoint) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(checkpoint.run_id)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            json.dumps({"version": CHECKPOINT_VERSION, **asdict(checkpoint)}, indent=2), encoding="utf-8"
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, run_id: str) -> RunCheckpoint | None:
+        try:
+            data = json.loads(self._path(run_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.pop("version", None) != CHECKPOINT_VERSION:
+            return None
+        try:
+            return RunCheckpoint(**data)
+        except TypeError:
+            return None
+
+    def all(self) -> list[RunCheckpoint]:
+        """Every readable checkpoint, most recently saved first."""
+        paths = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        checkpoints = (self.load(path.stem) for path in paths)
+        return [checkpoint for checkpoint in checkpoints if checkpoint is not None]
+
+    def latest(self) -> RunCheckpoint | None:
+        """The most recently saved readable checkpoint."""
+        return next(iter(self.all()), None)
+
+    def remove(self, run_id: str) -> None:
+        self._path(run_id).unlink(missing_ok=True)
+
+
+class Checkpointer:
+    """Keeps one run's checkpoint current: saved whenever the conversation grows.
+
+    `clients` maps agent names to their chat clients; each save records the
+    agent ID a client has by then (agents are created on their first run).
+    """
+
+    def __init__(self, store: CheckpointStore, checkpoint: RunCheckpoint, clients: dict[str, Any] | None = None):
+        self.store = store
+        self.checkpoint = checkpoint
+        self.clients = dict(clients or {})
+        self._speaker: Any = None
+
+    def track(self, speaker: Any) -> None:
+        """Save `speaker`'s state() with every checkpoint; a resumed run's state is restored into it first."""
+        if self.checkpoint.speaker_state:
+            speaker.restore(self.checkpoint.speaker_state)
+        self._speaker = speaker
+
+    def watch(self, condition: Callable[[list[ChatMessage]], bool]) -> Callable[[list[ChatMessage]], bool]:
+        """Wrap a termination condition so each new turn is checkpointed before it is checked."""
+
+        def checked(conversation: list[ChatMessage]) -> bool:
+            if len(conversation) > len(self.checkpoint.messages):
+                self.save(conversation)
+            return condition(conversation)
+
+        return checked
+
+    def save(self, conversation: list[ChatMessage] | None = None) -> None:
+        """Write the checkpoint; with `conversation`, as of that turn (messages and speaker state).
+
+        Without it only the agent IDs are refreshed: the speaker may have moved
+        on to a turn that never completed.
+        """
+        checkpoint = self.checkpoint
+        if conversation is not None:
+            checkpoint.messages = [encode_message(m) for m in conversation]
+            if self._speaker is not None:
+                checkpoint.speaker_state = self._speaker.state()
+        for name, client in self.clients.items():
+            agent_id = getattr(client, "agent_id", None)
+            if agent_id:
+                checkpoint.agent_ids[name] = agent_id
+        checkpoint.updated = time.time()
+        self.store.save(checkpoint)
+
+    def complete(self) -> None:
+        """The run finished: its checkpoint is no longer needed."""
+        self.store.remove(self.checkpoint.run_id)
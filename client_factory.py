@@ -0,0 +1,165 @@
+"""
+Zava Logistics - Shared Agent Client Factory
+============================================
+
+Creates the per-agent AzureAIAgentClients on top of one shared connection.
+
+Each AzureAIAgentClient normally builds its own AgentsClient: its own HTTP
+session (connection pool, TLS handshakes) and its own bearer token policy,
+which asks the credential for a token. AzureCliCredential does not cache
+tokens - every request for one shells out to the Azure CLI - so three agents
+meant three `az` invocations, and every extra agent or concurrent workflow
+added more.
+
+AgentClientFactory keeps one agent (agent ID, threads) per client, as the
+group chat needs for routing, but they all share:
+  - one AgentsClient and its aiohttp session (a pooled, keep-alive transport)
+  - one CachedTokenCredential: a token is acquired once per scope and
+    refreshed in the background before it expires, so requests never wait
+    on `az` after the first one; concurrent callers share one acquisition
+  - optionally one RateLimitScheduler (see rate_limiter.py), so every model
+    call of every client queues for the deployment's quota
+"""
+
+import asyncio
+import time
+from typing import Any
+
+import aiohttp
+from azure.ai.agents.aio import AgentsClient
+from azure.core.credentials import AccessToken
+from azure.core.pipeline.transport import AioHttpTransport
+
+from agent_framework import AGENT_FRAMEWORK_USER_AGENT
+from agent_framework.azure import AzureAIAgentClient
+
+from rate_limiter import RateLimitScheduler, limit_chat_client
+
+
+# Refresh a cached token in the background once it is this close to expiry (seconds)
+REFRESH_MARGIN_SECONDS = 600
+
+# Below this remaining lifetime a token is not handed out; callers wait for a new one
+MIN_VALIDITY_SECONDS = 60
+
+# Connection pool size of the shared session
+DEFAULT_MAX_CONNECTIONS = 32
+
+
+class CachedTokenCredential:
+    """Async token credential that caches and proactively refreshes another credential's tokens."""
+
+    def __init__(self, credential: Any, refresh_margin: float = REFRESH_MARGIN_SECONDS):
+        self.credential = credential
+        self.refresh_margin = refresh_margin
+        self.acquisitions = 0
+        self._tokens: dict[tuple, AccessToken] = {}
+        self._pending: dict[tuple, asyncio.Task] = {}
+
+    async def get_token(
+        self, *scopes: str, claims: str | None = None, tenant_id: str | None = None, **kwargs: Any
+    ) -> AccessToken:
+        if claims:
+            # A claims challenge needs a fresh token that satisfies it
+            return await self.credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+
+        key = (scopes, tenant_id)
+        token = self._tokens.get(key)
+        remaining = token.expires_on - time.time() if token else 0
+        if remaining > self.refresh_margin:
+            return token
+        if remaining > MIN_VALIDITY_SECONDS:
+            # Still valid: hand it out and refresh in the background
+            self._acquire(key, kwargs)
+            return token
+        return await asyncio.shield(self._acquire(key, kwargs))
+
+    def _acquire(self, key: tuple, kwargs: dict[str, Any]) -> asyncio.Task:
+        """Start (or join) the token acquisition for a scope set."""
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._fetch(key, kwargs))
+            # A failed background refresh is retried on the next call; don't warn about it
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _fetch(self, key: tuple, kwargs: dict[str, Any]) -> AccessToken:
+        scopes, tenant_id = key
+        try:
+            token = await self.credential.get_token(*scopes, tenant_id=tenant_id, **kwargs)
+            self.acquisitions += 1
+            self._tokens[key] = token
+            return token
+        finally:
+            self._pending.pop(key, None)
+
+    async def close(self) -> None:
+        """Stop background refreshes (the wrapped credential is closed by its owner)."""
+        for task in list(self._pending.values()):
+            task.cancel()
+        self._pending.clear()
+
+    async def __aenter__(self) -> "CachedTokenCredential":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class AgentClientFactory:
+    """Creates AzureAIAgentClients that share one pooled AgentsClient and one cached token."""
+
+    def __init__(
+        self,
+        credential: Any,
+        project_endpoint: str,
+        model_deployment_name: str | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        scheduler: RateLimitScheduler | None = None,
+    ):
+        self.credential = CachedTokenCredential(credential)
+        self.project_endpoint = project_endpoint
+        self.model_deployment_name = model_deployment_name
+        self.max_connections = max_connections
+        self.scheduler = scheduler
+        self._session: aiohttp.ClientSession | None = None
+        self._agents_client: AgentsClient | None = None
+
+    @property
+    def agents_client(self) -> AgentsClient:
+        """The shared AgentsClient (created on first use, inside the event loop)."""
+        if self._agents_client is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            )
+            self._agents_client = AgentsClient(
+                endpoint=self.project_endpoint,
+                credential=self.credential,
+                transport=AioHttpTransport(session=self._session, session_owner=False),
+                user_agent=AGENT_FRAMEWORK_USER_AGENT,
+            )
+        return self._agents_client
+
+    def create(self, **kwargs: Any) -> AzureAIAgentClient:
+        """A new client with its own agent and threads on the shared connection (and scheduler)."""
+        kwargs.setdefault("model_deployment_name", self.model_deployment_name)
+        client = AzureAIAgentClient(agents_client=self.agents_client, **kwargs)
+        if self.scheduler is not None:
+            limit_chat_client(client, self.scheduler)
+        return client
+
+    async def close(self) -> None:
+        """Close the shared connection (after the clients created here are closed)."""
+        await self.credential.close()
+        if self._agents_client is not None:
+            await self._agents_client.close()
+            self._agents_client = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AgentClientFactory":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
@@ -0,0 +1,246 @@
+"""
+Zava Logistics - Conversation Compaction
+========================================
+
+Bounds the prompt each participant receives in the group chat.
+
+The group chat hands every participant the full conversation on every turn
+(and a thread that keeps growing on the service), so prompt size grows with
+the number of rounds. CompactingAgent sits between the workflow and an
+agent and sends each turn, on a fresh thread that is deleted afterwards:
+
+  - the task, verbatim
+  - a rolling summary of older turns: pinned key facts (sentences with the
+    numbers and document citations quoted so far) plus the lead sentence of
+    each older message - extractive, so no model call is needed
+  - the most recent messages, verbatim
+
+within a per-agent token budget. Each message is digested once and cached,
+so compaction work per turn only depends on the new messages.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable
+
+from agent_framework import AgentRunResponse, AgentRunResponseUpdate, AgentThread, ChatMessage, Role
+
+from termination import estimate_tokens
+
+
+# Sentences worth pinning: figures, percentages, money, or a document citation
+_FACT_RE = re.compile(r"\d|\.md\b|§")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+
+# Share of the summary budget reserved for pinned facts
+FACT_SHARE = 0.6
+
+# Longest single summary line kept (characters)
+MAX_LINE_CHARS = 300
+
+
+@dataclass(frozen=True)
+class Digest:
+    """Extractive summary of one message."""
+
+    author: str
+    lead: str                 # first sentence, used as the gist of the turn
+    facts: tuple[str, ...]    # sentences with numbers or citations
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(" ".join(text.split())) if s.strip()]
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= MAX_LINE_CHARS else text[:MAX_LINE_CHARS - 3] + "..."
+
+
+class ConversationCompactor:
+    """Compacts a conversation to fit a per-agent token budget."""
+
+    def __init__(
+        self,
+        token_budgets: dict[str, int] | None = None,
+        default_budget: int = 3000,
+        recent_messages: int = 4,
+        token_estimator: Callable[[str], int] = estimate_tokens,
+    ):
+        self.token_budgets = dict(token_budgets or {})
+        self.default_budget = default_budget
+        self.recent_messages = recent_messages
+        self.token_estimator = token_estimator
+        self._digests: dict[tuple[str, str], Digest] = {}
+        # agent -> list of (full history tokens, compacted prompt tokens) per turn
+        self.turns: dict[str, list[tuple[int, int]]] = {}
+
+    def budget_for(self, agent_name: str) -> int:
+        return self.token_budgets.get(agent_name, self.default_budget)
+
+    def compact(self, agent_name: str, messages: list[ChatMessage]) -> list[ChatMessage]:
+        """Return the messages to send to an agent, within its token budget."""
+        budget = self.budget_for(agent_name)
+        sizes = [self._tokens(m) for m in messages]
+        full = sum(sizes)
+        if full <= budget or len(messages) <= 2:
+            self.turns.setdefault(agent_name, []).append((full, full))
+            return list(messages)
+
+        # The task (first message) and the latest messages stay verbatim; drop
+        # recent messages into the summary until they fit (the newest always stays)
+        task, rest = messages[0], messages[1:]
+        keep = min(self.recent_messages, len(rest))
+        while keep > 1 and sizes[0] + sum(sizes[-keep:]) > budget:
+            keep -= 1
+        older, recent = rest[:-keep], rest[-keep:]
+
+        summary = self._summary(older, budget - sizes[0] - sum(sizes[-keep:]))
+        compacted = [task, summary, *recent] if summary is not None else [task, *recent]
+        self.turns.setdefault(agent_name, []).append((full, sum(self._tokens(m) for m in compacted)))
+        return compacted
+
+    # -------------------------------------------------------------------------
+    # Summary
+    # -------------------------------------------------------------------------
+
+    def _tokens(self, message: ChatMessage) -> int:
+        return self.token_estimator(message.text or "")
+
+    def _digest(self, message: ChatMessage) -> Digest:
+        author = message.author_name or message.role.value
+        text = message.text or ""
+        key = (author, text)
+        digest = self._digests.get(key)
+        if digest is None:
+            sentences = split_sentences(text)
+            facts = tuple(_clip(s) for s in sentences if _FACT_RE.search(s))
+            lead = _clip(sentences[0]) if sentences else ""
+            digest = self._digests[key] = Digest(author=author, lead=lead, facts=facts)
+        return digest
+
+    def _summary(self, older: list[ChatMessage], budget: int) -> ChatMessage | None:
+        """Pinned facts and per-turn gists of the older messages, newest kept first."""
+        header = "Summary of the earlier discussion (older turns compacted):"
+        budget -= self.token_estimator(header)
+        if not older or budget <= 0:
+            return None
+        digests = [self._digest(m) for m in older]
+
+        facts: list[str] = []
+        seen: set[str] = set()
+        used = 0
+        for digest in reversed(digests):
+            for fact in reversed(digest.facts):
+                line = f"- [{digest.author}] {fact}"
+                cost = self.token_estimator(line)
+                if fact in seen or used + cost > budget * FACT_SHARE:
+                    continue
+                seen.add(fact)
+                facts.append(line)
+                used += cost
+
+        gists: list[str] = []
+        for digest in reversed(digests):
+            if not digest.lead or digest.lead in seen:
+                continue
+            line = f"- [{digest.author}] {digest.lead}"
+            cost = self.token_estimator(line)
+            if used + cost > budget:
+                break
+            gists.append(line)
+            used += cost
+
+        if not facts and not gists:
+            return None
+        parts = [header]
+        if facts:
+            parts += ["Key facts:", *reversed(facts)]
+        if gists:
+            parts += ["Earlier turns:", *reversed(gists)]
+        return ChatMessage(role=Role.USER, text="\n".join(parts), author_name="ContextSummary")
+
+
+# =============================================================================
+# AGENT WRAPPER
+# =============================================================================
+
+async def delete_service_thread(agent: Any, thread_id: str | None) -> None:
+    """Delete a finished turn's thread on the service (no-op for local threads)."""
+    agents_client = getattr(getattr(agent, "chat_client", None), "agents_client", None)
+    if not thread_id or agents_client is None:
+        return
+    try:
+        await agents_client.threads.delete(thread_id)
+    except Exception:
+        # Best effort: a leftover thread only costs storage, not the turn
+        pass
+
+
+async def run_stream_on_new_thread(
+    agent: Any, messages: list[ChatMessage], **kwargs: Any
+) -> AsyncIterable[AgentRunResponseUpdate]:
+    """Stream one turn on a fresh thread and delete that thread on the service afterwards.
+
+    The thread's ID is only stored on it once the stream completes, so it is
+    also taken from the updates in case the turn fails part-way.
+    """
+    thread = agent.get_new_thread()
+    thread_id = None
+    try:
+        async for update in agent.run_stream(messages, thread=thread, **kwargs):
+            thread_id = thread_id or getattr(update.raw_representation, "conversation_id", None)
+            yield update
+    finally:
+        await delete_service_thread(agent, thread.service_thread_id or thread_id)
+
+
+class CompactingAgent:
+    """Group chat participant that runs the wrapped agent on a compacted history.
+
+    Every turn runs on a fresh thread, since the compacted messages already
+    carry the context the agent needs; the thread is deleted after the turn.
+    """
+
+    def __init__(self, agent: Any, compactor: ConversationCompactor):
+        self.agent = agent
+        self.compactor = compactor
+
+    @property
+    def id(self) -> str:
+        return self.agent.id
+
+    @property
+    def name(self) -> str | None:
+        return self.agent.name
+
+    @property
+    def display_name(self) -> str:
+        return self.agent.display_name
+
+    @property
+    def description(self) -> str | None:
+        return self.agent.description
+
+    def get_new_thread(self, **kwargs: Any) -> AgentThread:
+        return self.agent.get_new_thread(**kwargs)
+
+    def _compacted(self, messages: Any) -> list[ChatMessage]:
+        if messages is None:
+            messages = []
+        elif isinstance(messages, (str, ChatMessage)):
+            messages = [messages]
+        messages = [m if isinstance(m, ChatMessage) else ChatMessage(role=Role.USER, text=m) for m in messages]
+        return self.compactor.compact(self.name or self.id, messages)
+
+    async def run(self, messages: Any = None, *, thread: AgentThread | None = None, **kwargs: Any) -> AgentRunResponse:
+        turn_thread = self.agent.get_new_thread()
+        try:
+            return await self.agent.run(self._compacted(messages), thread=turn_thread, **kwargs)
+        finally:
+            await delete_service_thread(self.agent, turn_thread.service_thread_id)
+
+    async def run_stream(
+        self, messages: Any = None, *, thread: AgentThread | None = None, **kwargs: Any
+    ) -> AsyncIterable[AgentRunResponseUpdate]:
+        async for update in run_stream_on_new_thread(self.agent, self._compacted(messages), **kwargs):
+            yield update
@@ -0,0 +1,393 @@
+"""
+Zava Logistics - Demand Analytics Engine
+========================================
+
+In-process analytics over the package demand CSV, exposed to the Analyst Agent
+as function tools so it quotes exact numbers instead of estimating them.
+
+The CSV is loaded once into columnar NumPy arrays. Every aggregate (per-route
+and per-day totals, shares, rolling averages, peak-vs-average deltas) is a
+vectorized group-by over a dense route x day matrix, so queries stay in the
+millisecond range even for years of daily data across hundreds of routes.
+
+Large histories can be read from a columnar DemandStore (demand_store.py)
+instead of re-parsing the CSV on every run.
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Annotated, Callable
+
+import numpy as np
+
+from demand_schema import DEMAND_COLUMNS
+from demand_store import DemandStore, store_dir_for
+
+
+# Default window (days) for rolling averages
+DEFAULT_ROLLING_WINDOW = 7
+
+
+# =============================================================================
+# COLUMNAR DEMAND DATA
+# =============================================================================
+
+@dataclass(frozen=True)
+class DemandData:
+    """Demand data as dense route x day matrices plus their axis labels."""
+
+    days: np.ndarray          # datetime64[D], sorted unique dates
+    routes: np.ndarray        # str, sorted unique route codes
+    origins: np.ndarray       # str, origin city per route
+    destinations: np.ndarray  # str, destination city per route
+    packages: np.ndarray      # float64 [route, day]
+    weight_kg: np.ndarray     # float64 [route, day]
+
+    @classmethod
+    def from_columns(
+        cls,
+        dates: np.ndarray,
+        routes: np.ndarray,
+        origins: np.ndarray,
+        destinations: np.ndarray,
+        packages: np.ndarray,
+        weight_kg: np.ndarray,
+    ) -> "DemandData":
+        """Group row-level columns into route x day matrices."""
+        days, day_idx = np.unique(dates.astype("datetime64[D]"), return_inverse=True)
+        route_names, first_row, route_idx = np.unique(routes, return_index=True, return_inverse=True)
+        day_idx = day_idx.ravel()
+        route_idx = route_idx.ravel()
+
+        return cls._from_indices(
+            days, route_names, origins[first_row], destinations[first_row], route_idx, day_idx, packages, weight_kg
+        )
+
+    @classmethod
+    def from_store(
+        cls, store: DemandStore, start_date: str | None = None, end_date: str | None = None
+    ) -> "DemandData":
+        """Group a date range of a DemandStore's dictionary-encoded rows into route x day matrices."""
+        window = store.row_range(start_date, end_date)
+        day_codes = np.asarray(store.columns["day"][window])
+        route_codes = np.asarray(store.columns["route"][window])
+
+        days, day_idx = np.unique(day_codes, return_inverse=True)
+        # Route matrices are ordered by route name, like from_columns
+        names = np.array(store.routes, dtype=str)
+        by_name = np.argsort(names, kind="stable")
+        rank = np.empty(len(names), dtype=np.int64)
+        rank[by_name] = np.arange(len(names))
+        present, route_idx = np.unique(rank[route_codes], return_inverse=True)
+        codes = by_name[present]
+        cities = np.array(store.cities, dtype=str)
+
+        return cls._from_indices(
+            days.astype(np.int64).astype("datetime64[D]"),
+            names[codes],
+            cities[store.route_origin[codes]] if len(codes) else np.array([], dtype=str),
+            cities[store.route_destination[codes]] if len(codes) else np.array([], dtype=str),
+            route_idx.ravel(),
+            day_idx.ravel(),
+            np.asarray(store.columns["packages"][window]),
+            np.asarray(store.columns["weight_kg"][window]),
+        )
+
+    @classmethod
+    def _from_indices(
+        cls,
+        days: np.ndarray,
+        routes: np.ndarray,
+        origins: np.ndarray,
+        destinations: np.ndarray,
+        route_idx: np.ndarray,
+        day_idx: np.ndarray,
+        packages: np.ndarray,
+        weight_kg: np.ndarray,
+    ) -> "DemandData":
+        """Sum row values into [route, day] cells given each row's route and day index."""
+        n_routes, n_days = len(routes), len(days)
+        flat = route_idx * n_days + day_idx
+        size = n_routes * n_days
+
+        return cls(
+            days=days,
+            routes=routes,
+            origins=origins,
+            destinations=destinations,
+            packages=np.bincount(flat, weights=packages, minlength=size).reshape(n_routes, n_days),
+            weight_kg=np.bincount(flat, weights=weight_kg, minlength=size).reshape(n_routes, n_days),
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "DemandData":
+        """Load the demand CSV into columnar arrays."""
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            missing = [c for c in DEMAND_COLUMNS if c not in header]
+            if missing:
+                raise ValueError(f"{path.name} is missing columns: {', '.join(missing)}")
+            positions = [header.index(c) for c in DEMAND_COLUMNS]
+            rows = [[row[i] for i in positions] for row in reader if row]
+
+        columns = list(zip(*rows)) if rows else [()] * len(DEMAND_COLUMNS)
+        return cls.from_columns(
+            dates=np.array(columns[0], dtype="datetime64[D]"),
+            routes=np.array(columns[1], dtype=str),
+            origins=np.array(columns[2], dtype=str),
+            destinations=np.array(columns[3], dtype=str),
+            packages=np.array(columns[4], dtype=np.float64),
+            weight_kg=np.array(columns[5], dtype=np.float64),
+        )
+
+    # -------------------------------------------------------------------------
+    # Slicing
+    # -------------------------------------------------------------------------
+
+    def day_slice(self, start_date: str | None = None, end_date: str | None = None) -> slice:
+        """Return the day-axis slice covering [start_date, end_date] (inclusive)."""
+        lo = 0 if not start_date else int(np.searchsorted(self.days, np.datetime64(start_date, "D"), "left"))
+        hi = len(self.days) if not end_date else int(np.searchsorted(self.days, np.datetime64(end_date, "D"), "right"))
+        return slice(lo, hi)
+
+    def route_index(self, route: str) -> int:
+        """Return the row index of a route code (case-insensitive)."""
+        matches = np.flatnonzero(np.char.upper(self.routes) == route.strip().upper())
+        if matches.size == 0:
+            raise KeyError(f"Unknown route '{route}'. Known routes: {', '.join(self.routes)}")
+        return int(matches[0])
+
+    def subset(
+        self,
+        routes: list[str] | None = None,
+        cities: list[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        multiplier: float = 1.0,
+    ) -> "DemandData":
+        """Restrict to routes / cities (origin or destination) and dates, scaling volumes by multiplier."""
+        keep = np.ones(len(self.routes), dtype=bool)
+        if routes:
+            keep &= np.isin(np.char.upper(self.routes), [r.strip().upper() for r in routes])
+        if cities:
+            wanted = [c.strip().lower() for c in cities]
+            keep &= np.isin(np.char.lower(self.origins), wanted) | np.isin(np.char.lower(self.destinations), wanted)
+        window = self.day_slice(start_date, end_date)
+        return DemandData(
+            days=self.days[window],
+            routes=self.routes[keep],
+            origins=self.origins[keep],
+            destinations=self.destinations[keep],
+            packages=self.packages[keep, window] * multiplier,
+            weight_kg=self.weight_kg[keep, window] * multiplier,
+        )
+
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime_ns: int, store_root: str | None) -> DemandData:
+    if store_root is None:
+        return DemandData.from_csv(Path(path))
+    return DemandData.from_store(DemandStore.open(store_dir_for(Path(store_root), Path(path)), Path(path)))
+
+
+def load_demand_data(path: Path, store_root: Path | None = None) -> DemandData:
+    """Load demand data once per file version (cached on path + mtime).
+
+    With store_root, the CSV is read through a columnar DemandStore kept under it,
+    so only rows appended since the last run are parsed.
+    """
+    path = Path(path)
+    return _load_cached(str(path.resolve()), path.stat().st_mtime_ns, str(store_root) if store_root else None)
+
+
+# =============================================================================
+# VECTORIZED AGGREGATES
+# =============================================================================
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean along the last axis (shorter windows at the start)."""
+    window = max(1, int(window))
+    csum = np.cumsum(matrix, axis=-1, dtype=np.float64)
+    shifted = np.zeros_like(csum)
+    if window < matrix.shape[-1]:
+        shifted[..., window:] = csum[..., :-window]
+    counts = np.minimum(np.arange(1, matrix.shape[-1] + 1), window)
+    return (csum - shifted) / counts
+
+
+def route_summary(data: DemandData, start_date: str | None = None, end_date: str | None = None) -> dict:
+    """Per-route totals, shares and peak-vs-average deltas for a date range."""
+    window = data.day_slice(start_date, end_date)
+    days = data.days[window]
+    packages = data.packages[:, window]
+    weight = data.weight_kg[:, window]
+    n_days = packages.shape[1]
+
+    route_packages = packages.sum(axis=1)
+    route_weight = weight.sum(axis=1)
+    total_packages = route_packages.sum()
+    total_weight = route_weight.sum()
+
+    avg_daily = route_packages / max(n_days, 1)
+    peak_idx = packages.argmax(axis=1) if n_days else np.zeros(len(data.routes), dtype=int)
+    peak_packages = packages[np.arange(len(data.routes)), peak_idx] if n_days else np.zeros(len(data.routes))
+    share = np.divide(route_packages, total_packages, out=np.zeros_like(route_packages), where=total_packages > 0)
+    peak_delta = np.divide(peak_packages - avg_daily, avg_daily, out=np.zeros_like(avg_daily), where=avg_daily > 0)
+
+    daily_total = packages.sum(axis=0)
+    network_peak = int(daily_total.argmax()) if n_days else None
+    network_avg = float(daily_total.mean()) if n_days else 0.0
+
+    return {
+        "start_date": str(days[0]) if n_days else None,
+        "end_date": str(days[-1]) if n_days else None,
+        "days": n_days,
+        "total_packages": int(total_packages),
+        "total_weight_kg": int(total_weight),
+        "avg_daily_packages": round(network_avg, 1),
+        "avg_package_weight_kg": round(float(total_weight / total_packages), 2) if total_packages else 0.0,
+        "network_peak": None if network_peak is None else {
+            "date": str(days[network_peak]),
+            "packages": int(daily_total[network_peak]),
+            "vs_avg_pct": round(100.0 * (daily_total[network_peak] - network_avg) / network_avg, 1)
+            if network_avg else 0.0,
+        },
+        "routes": [
+            {
+                "route": str(data.routes[i]),
+                "origin": str(data.origins[i]),
+                "destination": str(data.destinations[i]),
+                "packages": int(route_packages[i]),
+                "weight_kg": int(route_weight[i]),
+                "share_pct": round(100.0 * float(share[i]), 1),
+                "avg_daily_packages": round(float(avg_daily[i]), 1),
+                "avg_daily_weight_kg": round(float(route_weight[i]) / max(n_days, 1), 1),
+                "peak_date": str(days[peak_idx[i]]) if n_days else None,
+                "peak_packages": int(peak_packages[i]),
+                "peak_vs_avg_pct": round(100.0 * float(peak_delta[i]), 1),
+            }
+            for i in np.argsort(-route_packages, kind="stable")
+        ],
+    }
+
+
+def daily_profile(
+    data: DemandData,
+    route: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    window: int = DEFAULT_ROLLING_WINDOW,
+) -> dict:
+    """Daily packages/weight for one route (or the network) with a rolling average."""
+    window = max(1, int(window))  # as rolling_mean applies it, so the reported window is the one used
+    day_window = data.day_slice(start_date, end_date)
+    if route:
+        idx = data.route_index(route)
+        packages = data.packages[idx]
+        weight = data.weight_kg[idx]
+    else:
+        packages = data.packages.sum(axis=0)
+        weight = data.weight_kg.sum(axis=0)
+
+    # Rolling average uses the full history so the first days of a slice are not truncated
+    rolling = rolling_mean(packages, window)[day_window]
+    packages = packages[day_window]
+    weight = weight[day_window]
+    days = data.days[day_window]
+    avg = float(packages.mean()) if packages.size else 0.0
+    delta = (packages - avg) / avg * 100.0 if avg else np.zeros_like(packages)
+
+    return {
+        "route": str(data.routes[data.route_index(route)]) if route else "ALL",
+        "rolling_window_days": window,
+        "avg_daily_packages": round(avg, 1),
+        "days": [
+            {
+                "date": str(days[i]),
+                "packages": int(packages[i]),
+                "weight_kg": int(weight[i]),
+                "rolling_avg_packages": round(float(rolling[i]), 1),
+                "vs_avg_pct": round(float(delta[i]), 1),
+            }
+            for i in range(len(days))
+        ],
+    }
+
+
+def peak_days(
+    data: DemandData,
+    top_n: int = 5,
+    route: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> dict:
+    """Highest-volume days with their delta versus the period average."""
+    window = data.day_slice(start_date, end_date)
+    series = data.packages[data.route_index(route)] if route else data.packages.sum(axis=0)
+    series = series[window]
+    days = data.days[window]
+    avg = float(series.mean()) if series.size else 0.0
+
+    top_n = max(1, min(int(top_n), series.size)) if series.size else 0
+    top = np.argpartition(-series, top_n - 1)[:top_n] if top_n else np.array([], dtype=int)
+    top = top[np.argsort(-series[top], kind="stable")]
+
+    return {
+        "route": str(data.routes[data.route_index(route)]) if route else "ALL",
+        "avg_daily_packages": round(avg, 1),
+        "peaks": [
+            {
+                "date": str(days[i]),
+                "packages": int(series[i]),
+                "vs_avg_pct": round(100.0 * (float(series[i]) - avg) / avg, 1) if avg else 0.0,
+            }
+            for i in top
+        ],
+    }
+
+
+# =============================================================================
+# AGENT TOOLS
+# =============================================================================
+
+def _tool_result(func: Callable[..., dict], *args) -> str:
+    """Run an aggregate and serialize it, reporting bad routes/dates back to the model."""
+    try:
+        return json.dumps(func(*args))
+    except (KeyError, ValueError) as e:
+        return json.dumps({"error": str(e.args[0]) if e.args else str(e)})
+
+
+def build_demand_tools(data: DemandData) -> list[Callable[..., str]]:
+    """Create the function tools registered on the Analyst Agent."""
+
+    def get_demand_summary(
+        start_date: Annotated[str | None, "First day to include (YYYY-MM-DD). Omit for the whole dataset."] = None,
+        end_date: Annotated[str | None, "Last day to include (YYYY-MM-DD). Omit for the whole dataset."] = None,
+    ) -> str:
+        """Get total packages and weight, per-route share, average and peak day for a date range."""
+        return _tool_result(route_summary, data, start_date, end_date)
+
+    def get_daily_demand(
+        route: Annotated[str | None, "Route code such as LAX-JFK. Omit for the whole network."] = None,
+        start_date: Annotated[str | None, "First day to include (YYYY-MM-DD)."] = None,
+        end_date: Annotated[str | None, "Last day to include (YYYY-MM-DD)."] = None,
+        rolling_window: Annotated[int, "Days in the trailing rolling average."] = DEFAULT_ROLLING_WINDOW,
+    ) -> str:
+        """Get day-by-day packages and weight with a rolling average and delta versus the average."""
+        return _tool_result(daily_profile, data, route, start_date, end_date, rolling_window)
+
+    def get_peak_days(
+        top_n: Annotated[int, "Number of peak days to return."] = 5,
+        route: Annotated[str | None, "Route code such as LAX-JFK. Omit for the whole network."] = None,
+        start_date: Annotated[str | None, "First day to include (YYYY-MM-DD)."] = None,
+        end_date: Annotated[str | None, "Last day to include (YYYY-MM-DD)."] = None,
+    ) -> str:
+        """Get the highest-volume days and how far each is above the period average."""
+        return _tool_result(peak_days, data, top_n, route, start_date, end_date)
+
+    return [get_demand_summary, get_daily_demand, get_peak_days]
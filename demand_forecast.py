@@ -0,0 +1,623 @@
+"""
+Zava Logistics - Demand Forecasting
+===================================
+
+Rolling 30/60/90-day demand forecasts (capacity_policy.md § Forecast Horizon)
+for every route at once, exposed to the Analyst Agent as a function tool.
+
+Each route's daily packages and weight are modelled in log space as
+    level + damped trend + day-of-week effect + log(1 + event uplift) + noise
+and fitted by exponential smoothing (damped Holt-Winters, error-correction
+form). The model state is a few arrays over all series. Fitting is one pass
+over the route x day matrix with a handful of vector operations per day, in
+which every series is smoothed with every weight on a small grid at once; each
+series then keeps the weights with the lowest one-step error. The grid state
+is kept, so new days are absorbed by update() / extend() in O(routes) each,
+re-selecting the weights as they go: extending a fitted history gives the same
+forecaster as refitting all of it. load_forecaster() keeps that state on disk
+and only smooths the days appended to the demand data since the last run.
+
+Event uplifts come from peak_season_guidelines.md:
+  - the Annual Peak Calendar (midpoint of each expected impact range)
+  - where the guide has one, the day-by-day surge table of a specific year,
+    scaled by the route-specific peak surges
+  - dated single-day holidays, e.g. "Presidents' Day (February 16, 2026)"
+
+History is divided by the uplift before smoothing, so a peak does not raise
+the baseline, and forecasts multiply it back in. Prediction intervals combine
+the one-step errors (ETS h-step variance) with the width of the documented
+impact range.
+"""
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from statistics import NormalDist
+from typing import Annotated, Callable
+
+import numpy as np
+
+from capacity_optimizer import _sections, _table_rows
+from demand_analytics import DemandData
+
+
+# Horizons required by capacity_policy.md (minimum, recommended, strategic)
+FORECAST_HORIZONS = (30, 60, 90)
+MAX_HORIZON_DAYS = 366
+
+# Smoothing weights tried for every series: level (alpha) x trend (beta)
+LEVEL_WEIGHTS = (0.05, 0.1, 0.2, 0.3)
+TREND_WEIGHTS = (0.0, 0.02, 0.05)
+SEASONAL_WEIGHT = 0.1
+TREND_DAMPING = 0.98
+
+# Days used to initialize the state (and skipped when scoring the weights)
+WARMUP_DAYS = 7
+
+FORECAST_STATE_VERSION = 1
+
+# One-step log error assumed when the history is too short to measure it
+DEFAULT_LOG_ERROR = 0.1
+
+_MONTHS = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+_WEEKDAYS = {name: i for i, name in enumerate(["mon", "tue", "wed", "thu", "fri", "sat", "sun"])}
+_DAY_RANGE_RE = re.compile(r"^([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:\s*-\s*(?:([a-z]{3})[a-z]*\.?\s+)?(\d{1,2}))?$")
+_NTH_WEEKDAY_RE = re.compile(r"^(\d)(?:st|nd|rd|th)\s+([a-z]{3})[a-z]*\s+([a-z]{3})[a-z]*$")
+_PERCENT_RE = re.compile(r"([+-])?(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?%")
+_FULL_DATE_RE = re.compile(r"\(([A-Za-z]+ \d{1,2}, \d{4})\)")
+_YEAR_RE = re.compile(r"\b(20\d{2})\b")
+_ROUTE_RE = re.compile(r"[A-Za-z]{3}-[A-Za-z]{3}")
+
+
+# =============================================================================
+# PEAK CALENDAR
+# =============================================================================
+
+@dataclass(frozen=True)
+class PeakEvent:
+    name: str
+    window: str                   # as written in the calendar: "Feb 10-14", "2nd Sun May", "Variable"
+    low: float                    # documented impact range as fractions (+25-35% -> 0.25, 0.35)
+    high: float
+    routes: tuple[str, ...]       # empty = all routes
+
+
+@dataclass(frozen=True)
+class PeakCalendar:
+    events: tuple[PeakEvent, ...]
+    day_surges: dict[date, float]       # day-by-day surge table of a specific year
+    route_peaks: dict[str, float]       # route-specific peak surge for that table
+    holidays: dict[date, float]         # dated single days, e.g. Presidents' Day
+
+    @classmethod
+    def from_docs(cls, docs_dir: Path) -> "PeakCalendar":
+        """Read the peak calendar, the day-by-day surges and dated holidays from the guidelines."""
+        peak_md = (docs_dir / "peak_season_guidelines.md").read_text(encoding="utf-8")
+
+        events = []
+        for name, body in _sections(peak_md, "##"):
+            if name.lower() != "annual peak calendar":
+                continue
+            for row in _table_rows(body)[1:]:
+                impact = _percent_range(row[2]) if len(row) >= 4 else None
+                if impact:
+                    # "All routes" / "Reverse flows" apply to every route
+                    routes = tuple(r.strip().upper() for r in row[3].split(",") if _ROUTE_RE.fullmatch(r.strip()))
+                    events.append(PeakEvent(name=row[0], window=row[1], low=impact[0], high=impact[1], routes=routes))
+
+        day_surges: dict[date, float] = {}
+        route_peaks: dict[str, float] = {}
+        holidays: dict[date, float] = {}
+        for name, body in _sections(peak_md, "##"):
+            year = _YEAR_RE.search(name)
+            if not year:
+                continue
+            for row in _table_rows(body):
+                if len(row) < 2 or not _percent_range(row[1]):
+                    continue
+                surge = _percent_range(row[1])[0]
+                if _ROUTE_RE.fullmatch(row[0]):
+                    route_peaks[row[0].upper()] = surge
+                else:
+                    day = _parse_day(re.sub(r"\(.*?\)", "", row[0]).strip(), int(year.group(1)))
+                    if day:
+                        day_surges[day] = surge
+            for heading, section in _sections(body, "###"):
+                dated = _FULL_DATE_RE.search(heading)
+                volume = re.search(r"Expected volume:\s*([+-]?\d+(?:\.\d+)?%)", section)
+                if dated and volume:
+                    holidays[_parse_full_date(dated.group(1))] = _percent_range(volume.group(1))[0]
+
+        return cls(events=tuple(events), day_surges=day_surges, route_peaks=route_peaks, holidays=holidays)
+
+    def uplifts(self, routes: list[str], days: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Expected fractional uplift and its log-scale standard deviation per [route, day]."""
+        routes = [str(r).upper() for r in routes]
+        days = np.asarray(days, dtype="datetime64[D]")
+        uplift = np.zeros((len(routes), len(days)))
+        spread = np.zeros((len(routes), len(days)))
+        if not len(days):
+            return uplift, spread
+
+        first, last = days.min().astype(date), days.max().astype(date)
+        for event in self.events:
+            on_route = np.array([not event.routes or r in event.routes for r in routes])[:, None]
+            for year in range(first.year - 1, last.year + 1):
+                window = _event_window(event, year)
+                if window is None:
+                    continue
+                in_window = (days >= np.datetime64(window[0])) & (days <= np.datetime64(window[1]))
+                mask = on_route & in_window[None, :]
+                midpoint = (event.low + event.high) / 2
+                # The documented range is read as +/- 2 standard deviations
+                width = (np.log1p(event.high) - np.log1p(event.low)) / 4
+                uplift = np.where(mask & (abs(midpoint) > abs(uplift)), midpoint, uplift)
+                spread = np.where(mask, np.maximum(spread, width), spread)
+
+        # The day-by-day table is more specific than the calendar window it falls in
+        peak_surge = max(self.day_surges.values(), default=0.0)
+        scale = np.array([
+            self.route_peaks[r] / peak_surge if r in self.route_peaks and peak_surge > 0 else 1.0 for r in routes
+        ])
+        for day, surge in self.day_surges.items():
+            column = days == np.datetime64(day)
+            uplift[:, column] = (surge * scale if surge > 0 else np.full(len(routes), surge))[:, None]
+        for day, change in self.holidays.items():
+            uplift[:, days == np.datetime64(day)] = change
+        return uplift, spread
+
+    def events_between(self, first: date, last: date) -> list[dict]:
+        """Calendar events and dated holidays overlapping [first, last]."""
+        found = []
+        for event in self.events:
+            for year in range(first.year - 1, last.year + 1):
+                window = _event_window(event, year)
+                if window and window[0] <= last and window[1] >= first:
+                    found.append({
+                        "event": event.name,
+                        "start_date": str(window[0]),
+                        "end_date": str(window[1]),
+                        "expected_uplift_pct": f"{100 * event.low:+.0f}" + (
+                            f" to {100 * event.high:+.0f}" if event.high != event.low else ""
+                        ),
+                        "routes": list(event.routes) or "all",
+                    })
+        for day, change in self.holidays.items():
+            if first <= day <= last:
+                found.append({"event": "holiday", "start_date": str(day), "end_date": str(day),
+                              "expected_uplift_pct": f"{100 * change:+.0f}", "routes": "all"})
+        return sorted(found, key=lambda e: e["start_date"])
+
+
+def _percent_range(text: str) -> tuple[float, float] | None:
+    """'+25-35%' -> (0.25, 0.35), '-15%' -> (-0.15, -0.15)."""
+    match = _PERCENT_RE.search(text)
+    if not match:
+        return None
+    sign = -1.0 if match.group(1) == "-" else 1.0
+    low = sign * float(match.group(2)) / 100.0
+    high = sign * float(match.group(3)) / 100.0 if match.group(3) else low
+    return min(low, high), max(low, high)
+
+
+def _parse_day(text: str, year: int) -> date | None:
+    match = _DAY_RANGE_RE.match(text.lower())
+    if not match or match.group(1) not in _MONTHS:
+        return None
+    return date(year, _MONTHS[match.group(1)], int(match.group(2)))
+
+
+def _parse_full_date(text: str) -> date:
+    month, day, year = text.replace(",", "").split()
+    return date(int(year), _MONTHS[month[:3].lower()], int(day))
+
+
+def _easter_sunday(year: int) -> date:
+    """Gregorian Easter (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _event_window(event: PeakEvent, year: int) -> tuple[date, date] | None:
+    """First and last day of an event in a given year (None if the window can't be read)."""
+    text = event.window.strip().lower()
+    match = _DAY_RANGE_RE.match(text)
+    if match and match.group(1) in _MONTHS:
+        start = date(year, _MONTHS[match.group(1)], int(match.group(2)))
+        end_month = _MONTHS.get(match.group(3), start.month) if match.group(3) else start.month
+        end = date(year, end_month, int(match.group(4) or match.group(2)))
+        if end < start:
+            # Wraps into January, e.g. "Dec 26-Jan 5"
+            end = end.replace(year=year + 1)
+        return start, end
+
+    # Holidays given as a day: gifts ship in the week up to it
+    holiday = None
+    match = _NTH_WEEKDAY_RE.match(text)
+    if match and match.group(2) in _WEEKDAYS and match.group(3) in _MONTHS:
+        first = date(year, _MONTHS[match.group(3)], 1)
+        offset = (_WEEKDAYS[match.group(2)] - first.weekday()) % 7
+        holiday = first + timedelta(days=offset + 7 * (int(match.group(1)) - 1))
+    elif text == "variable" and "easter" in event.name.lower():
+        holiday = _easter_sunday(year)
+    return (holiday - timedelta(days=6), holiday) if holiday else None
+
+
+@lru_cache(maxsize=4)
+def _load_cached(docs_dir: str, mtime_ns: int) -> PeakCalendar:
+    return PeakCalendar.from_docs(Path(docs_dir))
+
+
+def load_peak_calendar(docs_dir: Path) -> PeakCalendar:
+    """Load the peak calendar once per version of the guidelines."""
+    docs_dir = Path(docs_dir)
+    return _load_cached(str(docs_dir.resolve()), (docs_dir / "peak_season_guidelines.md").stat().st_mtime_ns)
+
+
+# =============================================================================
+# FORECASTER
+# =============================================================================
+
+def _weekday(days: np.ndarray) -> np.ndarray:
+    """Monday=0 .. Sunday=6 for datetime64[D] values (1970-01-01 was a Thursday)."""
+    return (np.asarray(days, dtype="datetime64[D]").astype(np.int64) + 3) % 7
+
+
+class DemandForecaster:
+    """Damped Holt-Winters in log space over every route's packages and weight at once.
+
+    Series 0..R-1 are packages and R..2R-1 weight_kg of the routes in `routes`.
+    Every series is smoothed with every (alpha, beta) pair of the weight grid;
+    its forecast state is that of the pair with the lowest one-step error so
+    far, re-selected whenever days are added.
+    """
+
+    def __init__(self, routes: np.ndarray, calendar: PeakCalendar):
+        self.routes = np.asarray(routes)
+        self.calendar = calendar
+        n_series = 2 * len(self.routes)
+        self.last_day: np.datetime64 | None = None
+        self.history_days = 0
+
+        # Every (alpha, beta) pair for every series: grid state arrays are [G, S]
+        alpha, beta = (g.ravel()[:, None] for g in np.meshgrid(LEVEL_WEIGHTS, TREND_WEIGHTS, indexing="ij"))
+        self._alpha, self._beta = alpha, beta
+        self._level = np.zeros((len(alpha), n_series))
+        self._trend = np.zeros_like(self._level)
+        self._season = np.zeros((len(alpha), n_series, 7))
+        self._sse = np.zeros_like(self._level)
+        self._scored_days = 0
+        self._select()
+
+    def _adjusted_log(self, days: np.ndarray, packages: np.ndarray, weight_kg: np.ndarray) -> np.ndarray:
+        """log(volume) with the documented event uplift divided out, [series, day]."""
+        uplift, _ = self.calendar.uplifts(list(self.routes), days)
+        volumes = np.concatenate([packages, weight_kg]).reshape(2 * len(self.routes), len(days))
+        return np.log(np.maximum(volumes, 1.0)) - np.log1p(np.tile(uplift, (2, 1)))
+
+    def _smooth(self, z: np.ndarray, weekday: np.ndarray, score_from: int = 0) -> None:
+        """Smooth days of adjusted log volumes [S, D] into the state of every grid pair."""
+        for t in range(z.shape[1]):
+            w = weekday[t]
+            error = z[:, t] - (self._level + TREND_DAMPING * self._trend + self._season[:, :, w])
+            if t >= score_from:
+                self._sse += error ** 2
+                self._scored_days += 1
+            self._level += TREND_DAMPING * self._trend + self._alpha * error
+            self._trend = TREND_DAMPING * self._trend + self._beta * error
+            self._season[:, :, w] += SEASONAL_WEIGHT * error
+
+    def _select(self) -> None:
+        """Give every series the state of its grid pair with the lowest one-step error."""
+        best = self._sse.argmin(axis=0)                                           # [S]
+        series = np.arange(self._sse.shape[1])
+        self.level = self._level[best, series]
+        self.trend = self._trend[best, series]
+        self.seasonal = self._season[best, series]
+        self.alpha = self._alpha[best, 0]
+        self.beta = self._beta[best, 0]
+        self.error_var = (
+            np.maximum(self._sse[best, series] / self._scored_days, 1e-6) if self._scored_days
+            else np.full(len(series), DEFAULT_LOG_ERROR ** 2)
+        )
+
+    @classmethod
+    def fit(cls, data: DemandData, calendar: PeakCalendar) -> "DemandForecaster":
+        """Initialize from the first week, then smooth through the history with every grid weight."""
+        forecaster = cls(data.routes, calendar)
+        n_days = len(data.days)
+        if not n_days or not len(data.routes):
+            return forecaster
+
+        z = forecaster._adjusted_log(data.days, data.packages, data.weight_kg)    # [S, D]
+        weekday = _weekday(data.days)
+        warmup = min(WARMUP_DAYS, n_days)
+        mean = z[:, :warmup].mean(axis=1)
+        seasonal = np.zeros_like(forecaster.seasonal)
+        if n_days >= 7:
+            for w in range(7):
+                seen = weekday[:warmup] == w
+                seasonal[:, w] = z[:, :warmup][:, seen].mean(axis=1) - mean if seen.any() else 0.0
+
+        forecaster._level[:] = mean
+        forecaster._season[:] = seasonal
+        forecaster._smooth(z, weekday, score_from=warmup)
+        forecaster._select()
+        forecaster.last_day = data.days[-1]
+        forecaster.history_days = n_days
+        return forecaster
+
+    def update(self, day: str | np.datetime64, packages: np.ndarray, weight_kg: np.ndarray) -> None:
+        """Absorb one new day of demand for every route (arrays in `routes` order)."""
+        day = np.datetime64(day, "D")
+        if self.last_day is not None and day <= self.last_day:
+            raise ValueError(f"{day} is not after the last forecast input day {self.last_day}")
+        days = np.array([day])
+        packages = np.asarray(packages, dtype=float)[:, None]
+        weight_kg = np.asarray(weight_kg, dtype=float)[:, None]
+        self._smooth(self._adjusted_log(days, packages, weight_kg), _weekday(days))
+        self._select()
+        self.last_day = day
+        self.history_days += 1
+
+    def extend(self, data: DemandData) -> int:
+        """Absorb the days of data after the last one seen; returns how many were new.
+
+        Once the history seen so far covers the warmup week, the result is the
+        same as fit() on all of data.
+        """
+        order = [int(np.flatnonzero(data.routes == route)[0]) for route in self.routes]
+        new_days = np.flatnonzero(data.days > self.last_day) if self.last_day is not None else np.arange(len(data.days))
+        if not len(new_days):
+            return 0
+        days = data.days[new_days]
+        z = self._adjusted_log(days, data.packages[np.ix_(order, new_days)], data.weight_kg[np.ix_(order, new_days)])
+        self._smooth(z, _weekday(days))
+        self._select()
+        self.last_day = days[-1]
+        self.history_days += len(new_days)
+        return len(new_days)
+
+    # -------------------------------------------------------------------------
+    # Saved state
+    # -------------------------------------------------------------------------
+
+    def history_digest(self, data: DemandData) -> str:
+        """Digest of the first history_days days of data and of the peak calendar."""
+        n_days = self.history_days
+        order = [int(np.flatnonzero(data.routes == route)[0]) for route in self.routes]
+        digest = hashlib.sha256(repr(self.calendar).encode())
+        for values in (data.days[:n_days].astype(np.int64), data.packages[order, :n_days], data.weight_kg[order, :n_days]):
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    def save(self, path: Path, digest: str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=FORECAST_STATE_VERSION,
+                routes=self.routes.astype(str),
+                last_day=np.datetime64(self.last_day, "D"),
+                history_days=self.history_days,
+                scored_days=self._scored_days,
+                level=self._level,
+                trend=self._trend,
+                season=self._season,
+                sse=self._sse,
+                digest=digest,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, calendar: PeakCalendar) -> tuple["DemandForecaster", str] | None:
+        """A saved forecaster and the digest of the history it was saved with (None if unreadable)."""
+        try:
+            with np.load(path) as state:
+                if int(state["version"]) != FORECAST_STATE_VERSION:
+                    return None
+                forecaster = cls(state["routes"], calendar)
+                if forecaster._level.shape != state["level"].shape:
+                    return None
+                forecaster._level, forecaster._trend = state["level"], state["trend"]
+                forecaster._season, forecaster._sse = state["season"], state["sse"]
+                forecaster._scored_days = int(state["scored_days"])
+                forecaster.history_days = int(state["history_days"])
+                forecaster.last_day = state["last_day"][()]
+                digest = str(state["digest"])
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+        forecaster._select()
+        return forecaster, digest
+
+    def forecast(self, horizon_days: int, interval: float = 0.9) -> dict[str, np.ndarray]:
+        """Median forecast and prediction interval for the days after the last input day.
+
+        Returns days [H], uplift [R, H] and packages / weight_kg median, low and high [R, H].
+        """
+        horizon_days = max(1, min(int(horizon_days), MAX_HORIZON_DAYS))
+        steps = np.arange(1, horizon_days + 1)
+        last_day = self.last_day if self.last_day is not None else np.datetime64("today", "D")
+        days = last_day + steps.astype("timedelta64[D]")
+        uplift, spread = self.calendar.uplifts(list(self.routes), days)
+
+        damped = np.cumsum(TREND_DAMPING ** steps)                                # [H]
+        mu = (
+            self.level[:, None]
+            + self.trend[:, None] * damped[None, :]
+            + self.seasonal[:, _weekday(days)]
+            + np.log1p(np.tile(uplift, (2, 1)))
+        )                                                                         # [S, H]
+
+        # ETS(A,Ad,A) h-step variance: sigma^2 * (1 + sum_{j<h} c_j^2)
+        j = steps[:-1]
+        c = (
+            self.alpha[:, None]
+            + self.beta[:, None] * TREND_DAMPING * (1 - TREND_DAMPING ** j)[None, :] / (1 - TREND_DAMPING)
+            + SEASONAL_WEIGHT * (j % 7 == 0)[None, :]
+        )
+        growth = np.concatenate([np.zeros((len(mu), 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+        var = self.error_var[:, None] * (1.0 + growth) + np.tile(spread, (2, 1)) ** 2
+        z = NormalDist().inv_cdf(0.5 + interval / 2)
+        median, low, high = np.exp(mu), np.exp(mu - z * np.sqrt(var)), np.exp(mu + z * np.sqrt(var))
+
+        n_routes = len(self.routes)
+        return {
+            "days": days,
+            "uplift": uplift,
+            "packages": median[:n_routes],
+            "packages_low": low[:n_routes],
+            "packages_high": high[:n_routes],
+            "weight_kg": median[n_routes:],
+            "weight_kg_low": low[n_routes:],
+            "weight_kg_high": high[n_routes:],
+        }
+
+    def route_index(self, route: str) -> int:
+        matches = np.flatnonzero(np.char.upper(self.routes) == route.strip().upper())
+        if matches.size == 0:
+            raise KeyError(f"Unknown route '{route}'. Known routes: {', '.join(self.routes)}")
+        return int(matches[0])
+
+
+def load_forecaster(data: DemandData, calendar: PeakCalendar, state_dir: Path | None = None) -> DemandForecaster:
+    """A forecaster fitted through the last day of data, continuing the state saved under state_dir.
+
+    When data is the saved history with days appended (the demand store's
+    append path) only the new days are smoothed; any other change refits.
+    Without state_dir the forecaster is always fitted from scratch.
+    """
+    if state_dir is None:
+        return DemandForecaster.fit(data, calendar)
+    routes_key = hashlib.sha1(",".join(map(str, data.routes)).encode()).hexdigest()[:12]
+    path = Path(state_dir) / f"forecast-{routes_key}.npz"
+
+    saved = DemandForecaster.load(path, calendar)
+    if saved is not None:
+        forecaster, digest = saved
+        if (
+            np.array_equal(forecaster.routes, data.routes)
+            and WARMUP_DAYS <= forecaster.history_days <= len(data.days)
+            and forecaster.history_digest(data) == digest
+        ):
+            if forecaster.extend(data):
+                forecaster.save(path, forecaster.history_digest(data))
+            return forecaster
+
+    forecaster = DemandForecaster.fit(data, calendar)
+    forecaster.save(path, forecaster.history_digest(data))
+    return forecaster
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+def forecast_report(
+    forecaster: DemandForecaster,
+    horizon_days: int = FORECAST_HORIZONS[0],
+    route: str | None = None,
+    interval_pct: float = 90.0,
+) -> dict:
+    """Per-route horizon summary, or day-by-day figures for one route."""
+    if forecaster.last_day is None:
+        raise ValueError("No demand history to forecast from")
+    interval = min(max(float(interval_pct), 1.0), 99.0) / 100.0
+    result = forecaster.forecast(horizon_days, interval)
+    days = result["days"]
+    first, last = days[0].astype(date), days[-1].astype(date)
+    report = {
+        "history_through": str(forecaster.last_day),
+        "start_date": str(first),
+        "end_date": str(last),
+        "horizon_days": len(days),
+        "interval_pct": round(100.0 * interval, 1),
+        "events": forecaster.calendar.events_between(first, last),
+    }
+
+    if route:
+        r = forecaster.route_index(route)
+        report["route"] = str(forecaster.routes[r])
+        report["days"] = [
+            {
+                "date": str(days[d]),
+                "packages": int(result["packages"][r, d]),
+                "packages_range": [int(result["packages_low"][r, d]), int(result["packages_high"][r, d])],
+                "weight_kg": int(result["weight_kg"][r, d]),
+                "weight_kg_range": [int(result["weight_kg_low"][r, d]), int(result["weight_kg_high"][r, d])],
+                "event_uplift_pct": round(100.0 * float(result["uplift"][r, d]), 1),
+            }
+            for d in range(len(days))
+        ]
+        return report
+
+    weight, high = result["weight_kg"], result["weight_kg_high"]
+    peak = weight.argmax(axis=1)
+    n_routes = len(forecaster.routes)
+    one_step_error = np.expm1(np.sqrt(forecaster.error_var))
+    report["routes"] = [
+        {
+            "route": str(forecaster.routes[r]),
+            "avg_daily_packages": round(float(result["packages"][r].mean()), 1),
+            "avg_daily_weight_kg": round(float(weight[r].mean()), 1),
+            "peak_date": str(days[peak[r]]),
+            "peak_weight_kg": int(weight[r, peak[r]]),
+            "peak_weight_kg_high": int(high[r, peak[r]]),
+            "max_daily_weight_kg_high": int(high[r].max()),
+            # Daily bounds summed: a conservative range for the total
+            "total_weight_kg": int(weight[r].sum()),
+            "total_weight_kg_range": [int(result["weight_kg_low"][r].sum()), int(high[r].sum())],
+            "one_step_error_pct": round(100.0 * float(one_step_error[n_routes + r]), 1),
+        }
+        for r in np.argsort(-weight.sum(axis=1), kind="stable")
+    ]
+    report["horizons"] = [
+        {
+            "days": h,
+            "network_weight_kg": int(weight[:, :h].sum()),
+            "network_weight_kg_range": [int(result["weight_kg_low"][:, :h].sum()), int(high[:, :h].sum())],
+        }
+        for h in FORECAST_HORIZONS if h <= len(days)
+    ]
+    return report
+
+
+# =============================================================================
+# AGENT TOOLS
+# =============================================================================
+
+def build_forecast_tools(forecaster: DemandForecaster) -> list[Callable[..., str]]:
+    """Create the forecasting tool registered on the Analyst Agent."""
+
+    def get_demand_forecast(
+        horizon_days: Annotated[int, "Days to forecast after the last day of data (policy: 30, 60 or 90)."] = 30,
+        route: Annotated[str | None, "Route code such as LAX-JFK for day-by-day figures. Omit for all routes."] = None,
+        interval_pct: Annotated[float, "Prediction interval coverage in percent."] = 90.0,
+    ) -> str:
+        """Forecast daily packages and weight past the data with prediction intervals.
+
+        Includes documented peak-season uplifts (Valentine's, Easter, holidays, ...). Without a
+        route: per-route averages, peak day, horizon totals and 30/60/90-day network totals.
+        """
+        try:
+            return json.dumps(forecast_report(forecaster, horizon_days, route, interval_pct))
+        except (KeyError, ValueError) as e:
+            return json.dumps({"error": str(e.args[0]) if e.args else str(e)})
+
+    return [get_demand_forecast]
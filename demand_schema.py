@@ -0,0 +1,94 @@
+"""
+Zava Logistics - Demand CSV Schema
+==================================
+
+Column layout of the package demand CSV and a row-by-row validator.
+
+Plain Python (no NumPy), so the schema can be checked in a few milliseconds
+by the preflight mode before anything heavy is imported.
+"""
+
+import csv
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+
+# Columns expected in the demand CSV
+DEMAND_COLUMNS = ("date", "route", "origin", "destination", "expected_packages", "weight_kg")
+
+# Route codes look like LAX-JFK
+ROUTE_RE = re.compile(r"^[A-Z]{3}-[A-Z]{3}$")
+
+# Stop collecting row errors after this many
+MAX_REPORTED_ERRORS = 5
+
+
+@dataclass
+class CsvReport:
+    """Outcome of validating a demand CSV."""
+
+    rows: int = 0
+    first_date: date | None = None
+    last_date: date | None = None
+    routes: set[str] = field(default_factory=set)
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def validate_demand_csv(path: Path) -> CsvReport:
+    """Check the header and every row (date, route code, non-negative numbers)."""
+    report = CsvReport()
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [c for c in DEMAND_COLUMNS if c not in header]
+        if missing:
+            report.errors.append(f"missing columns: {', '.join(missing)}")
+            return report
+        positions = [header.index(c) for c in DEMAND_COLUMNS]
+
+        for line_number, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            report.rows += 1
+            error = _row_error([row[i] if i < len(row) else "" for i in positions], report)
+            if error:
+                report.errors.append(f"line {line_number}: {error}")
+                if len(report.errors) >= MAX_REPORTED_ERRORS:
+                    report.errors.append("(further errors not shown)")
+                    break
+
+    if not report.errors and report.rows == 0:
+        report.errors.append("no data rows")
+    return report
+
+
+def _row_error(values: list[str], report: CsvReport) -> str | None:
+    day, route, origin, destination, packages, weight_kg = values
+    try:
+        parsed = date.fromisoformat(day)
+    except ValueError:
+        return f"invalid date '{day}'"
+    if not ROUTE_RE.match(route):
+        return f"invalid route code '{route}'"
+    if not origin or not destination:
+        return "missing origin or destination"
+    for name, value in (("expected_packages", packages), ("weight_kg", weight_kg)):
+        try:
+            number = float(value)
+        except ValueError:
+            return f"{name} is not a number ('{value}')"
+        if number < 0:
+            return f"{name} is negative ({value})"
+
+    report.routes.add(route)
+    if report.first_date is None or parsed < report.first_date:
+        report.first_date = parsed
+    if report.last_date is None or parsed > report.last_date:
+        report.last_date = parsed
+    return None
@@ -0,0 +1,360 @@
+"""
+Zava Logistics - Columnar Demand Store
+======================================
+
+On-disk, memory-mapped copy of the package demand CSV for multi-year data,
+so runs don't re-parse the CSV.
+
+The CSV is ingested into one raw binary file per column (day, route,
+packages, weight_kg), with rows ordered by day:
+  - routes and cities are dictionary-encoded as small integers (the
+    dictionaries live in meta.json)
+  - a date index holds the first row of every calendar day, so a date range
+    is two lookups and a contiguous row slice
+
+Opening the store parses nothing: the columns are memory-mapped, and slicing
+one route-month out of years of data touches only that month's rows.
+
+When new days are appended to the CSV, only the new lines are parsed and
+appended to the column files. Any other change to the CSV (edited or
+reordered rows, new days older than the last ingested one) rebuilds the store.
+
+Run `python demand_store.py [csv]` to ingest ahead of time and time a slice.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from demand_schema import DEMAND_COLUMNS
+
+
+STORE_VERSION = 1
+
+# Column files (<name>.bin) and their on-disk dtypes
+COLUMN_DTYPES = {
+    "day": np.dtype(np.int32),         # days since 1970-01-01
+    "route": np.dtype(np.int32),       # index into the route dictionary
+    "packages": np.dtype(np.float64),
+    "weight_kg": np.dtype(np.float64),
+}
+
+# Block size when hashing the already-ingested part of the CSV
+_HASH_BLOCK_BYTES = 1 << 20
+
+# CSV rows converted to arrays at a time (bounds the number of live Python objects)
+INGEST_BATCH_ROWS = 100_000
+
+
+def store_dir_for(root: Path, csv_path: Path) -> Path:
+    """Store directory under root for a CSV (one store per CSV path)."""
+    resolved = str(Path(csv_path).resolve())
+    return Path(root) / f"{Path(csv_path).stem}-{hashlib.sha1(resolved.encode()).hexdigest()[:8]}"
+
+
+def _prefix_sha256(path: Path, length: int) -> str:
+    """SHA-256 of the first length bytes of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(_HASH_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+class DemandStore:
+    """Memory-mapped demand rows with dictionary-encoded routes/cities and a date index."""
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self.meta: dict = {}
+        self.routes: list[str] = []
+        self.cities: list[str] = []
+        self.route_origin = np.zeros(0, dtype=np.int32)
+        self.route_destination = np.zeros(0, dtype=np.int32)
+        self.first_day = 0
+        self.day_offsets = np.zeros(1, dtype=np.int64)
+        self.columns = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+
+    @property
+    def rows(self) -> int:
+        return len(self.columns["day"])
+
+    @property
+    def days(self) -> np.ndarray:
+        """Calendar days covered by the date index (datetime64[D])."""
+        n_days = len(self.day_offsets) - 1
+        return (self.first_day + np.arange(n_days, dtype=np.int64)).astype("datetime64[D]")
+
+    # -------------------------------------------------------------------------
+    # Open / ingest
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, store_dir: Path, csv_path: Path) -> "DemandStore":
+        """Open the store for csv_path, ingesting whatever changed in the CSV since last time."""
+        store = cls(store_dir)
+        csv_path = Path(csv_path)
+        stat = csv_path.stat()
+
+        meta = store._read_meta()
+        if meta.get("version") != STORE_VERSION or meta.get("source") != str(csv_path.resolve()):
+            meta = {}
+        if meta:
+            try:
+                store._load(meta)
+            except (FileNotFoundError, ValueError):
+                # Missing or truncated column file
+                meta = {}
+
+        if meta and (meta["size"], meta["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return store
+        if meta and store._is_append(csv_path, stat.st_size):
+            if store._ingest(csv_path, meta["ingested_bytes"], meta["positions"]):
+                return store
+
+        store._rebuild(csv_path)
+        return store
+
+    def _is_append(self, csv_path: Path, size: int) -> bool:
+        """Whether the CSV still starts with exactly the (whole-line) bytes already ingested."""
+        ingested = self.meta["ingested_bytes"]
+        return (
+            self.meta["complete_lines"]
+            and size >= ingested
+            and _prefix_sha256(csv_path, ingested) == self.meta["prefix_sha"]
+        )
+
+    def _rebuild(self, csv_path: Path) -> None:
+        """Ingest the whole CSV into fresh column files."""
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        missing = [c for c in DEMAND_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"{csv_path.name} is missing columns: {', '.join(missing)}")
+
+        # Drop the old metadata first so a crash mid-rebuild can't pair it with new columns
+        (self.store_dir / "meta.json").unlink(missing_ok=True)
+        self.meta = {
+            "version": STORE_VERSION,
+            "source": str(Path(csv_path).resolve()),
+            "rows": 0,
+            "routes": [],
+            "route_origin": [],
+            "route_destination": [],
+            "cities": [],
+        }
+        self._ingest(csv_path, 0, [header.index(c) for c in DEMAND_COLUMNS], skip_header=True)
+
+    def _ingest(self, csv_path: Path, offset: int, positions: list[int], skip_header: bool = False) -> bool:
+        """Parse the CSV from a byte offset and append its rows; False if they aren't in day order."""
+        stat = csv_path.stat()
+        batches = []
+        with open(csv_path, "rb") as raw:
+            raw.seek(offset)
+            reader = filter(None, csv.reader(io.TextIOWrapper(raw, encoding="utf-8", newline="")))
+            if skip_header:
+                next(reader, None)
+            while batch := list(itertools.islice(reader, INGEST_BATCH_ROWS)):
+                batches.append(self._convert_batch(batch, positions))
+            ingested = raw.tell()
+            raw.seek(max(ingested - 1, 0))
+            ends_with_newline = raw.read(1) == b"\n"
+
+        new_columns = {
+            name: np.concatenate([b[name] for b in batches]) if batches else np.zeros(0, dtype=dtype)
+            for name, dtype in COLUMN_DTYPES.items()
+        }
+        rows_before = self.meta["rows"]
+        if len(new_columns["day"]) and rows_before and new_columns["day"].min() < self.meta["last_day"]:
+            return False
+        order = np.argsort(new_columns["day"], kind="stable")
+
+        # Columns first, metadata last: rows past meta["rows"] are ignored and overwritten
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        for name, dtype in COLUMN_DTYPES.items():
+            path = self.store_dir / f"{name}.bin"
+            with open(path, "r+b" if path.exists() else "wb") as f:
+                f.truncate(rows_before * dtype.itemsize)
+                f.seek(rows_before * dtype.itemsize)
+                f.write(new_columns[name][order].tobytes())
+
+        self.meta.update(
+            rows=rows_before + len(order),
+            positions=positions,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            ingested_bytes=ingested,
+            complete_lines=ends_with_newline if ingested > offset else self.meta.get("complete_lines", True),
+            prefix_sha=_prefix_sha256(csv_path, ingested),
+        )
+        day_column = np.memmap(self.store_dir / "day.bin", dtype=COLUMN_DTYPES["day"], mode="r") \
+            if self.meta["rows"] else np.zeros(0, dtype=COLUMN_DTYPES["day"])
+        self._write_day_index(day_column[: self.meta["rows"]])
+        self._write_meta(self.meta)
+        self._load(self.meta)
+        return True
+
+    def _convert_batch(self, rows: list[list[str]], positions: list[int]) -> dict[str, np.ndarray]:
+        """Turn parsed CSV rows into column arrays (routes dictionary-encoded)."""
+        if min(map(len, rows)) <= max(positions):
+            raise ValueError(f"Row with missing fields: {min(rows, key=len)}")
+        columns = list(zip(*rows))
+        day, route, origin, destination, packages, weight_kg = (columns[i] for i in positions)
+        return {
+            "day": np.array(day, dtype="datetime64[D]").astype(np.int32),
+            "route": self._encode_routes(route, origin, destination),
+            "packages": np.array(packages, dtype=np.float64),
+            "weight_kg": np.array(weight_kg, dtype=np.float64),
+        }
+
+    def _encode_routes(self, routes: tuple, origins: tuple, destinations: tuple) -> np.ndarray:
+        """Dictionary-encode route codes, registering new routes (and their cities) in meta."""
+        uniques, first_row, inverse = np.unique(np.asarray(routes, dtype=str), return_index=True, return_inverse=True)
+        route_ids = {route: i for i, route in enumerate(self.meta["routes"])}
+        city_ids = {city: i for i, city in enumerate(self.meta["cities"])}
+
+        def city_id(city: str) -> int:
+            if city not in city_ids:
+                city_ids[city] = len(self.meta["cities"])
+                self.meta["cities"].append(city)
+            return city_ids[city]
+
+        codes = np.empty(len(uniques), dtype=np.int32)
+        for i, route in enumerate(uniques.tolist()):
+            if route not in route_ids:
+                route_ids[route] = len(self.meta["routes"])
+                self.meta["routes"].append(route)
+                self.meta["route_origin"].append(city_id(origins[first_row[i]]))
+                self.meta["route_destination"].append(city_id(destinations[first_row[i]]))
+            codes[i] = route_ids[route]
+        return codes[inverse.ravel()]
+
+    def _write_day_index(self, day_column: np.ndarray) -> None:
+        """Row offset of every calendar day from the first to the last ingested day."""
+        if len(day_column):
+            first, last = int(day_column[0]), int(day_column[-1])
+            calendar = np.arange(first, last + 2, dtype=np.int64)
+            offsets = np.searchsorted(day_column, calendar, side="left").astype(np.int64)
+        else:
+            first, last, offsets = 0, 0, np.zeros(1, dtype=np.int64)
+        self.meta["first_day"] = first
+        self.meta["last_day"] = last
+        tmp_path = self.store_dir / "day_offsets.tmp.npy"
+        np.save(tmp_path, offsets)
+        os.replace(tmp_path, self.store_dir / "day_offsets.npy")
+
+    def _read_meta(self) -> dict:
+        try:
+            return json.loads((self.store_dir / "meta.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_meta(self, meta: dict) -> None:
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.store_dir / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, self.store_dir / "meta.json")
+
+    def _load(self, meta: dict) -> None:
+        """Memory-map the column files and the date index written by _ingest."""
+        rows = meta["rows"]
+        columns = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            path = self.store_dir / f"{name}.bin"
+            if not path.exists():
+                raise FileNotFoundError(path)
+            columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,)) if rows else np.zeros(0, dtype)
+        self.day_offsets = np.load(self.store_dir / "day_offsets.npy", mmap_mode="r")
+        self.columns = columns
+        self.meta = meta
+        self.routes = meta["routes"]
+        self.cities = meta["cities"]
+        self.route_origin = np.asarray(meta["route_origin"], dtype=np.int32)
+        self.route_destination = np.asarray(meta["route_destination"], dtype=np.int32)
+        self.first_day = meta.get("first_day", 0)
+
+    # -------------------------------------------------------------------------
+    # Query
+    # -------------------------------------------------------------------------
+
+    def row_range(self, start_date: str | None = None, end_date: str | None = None) -> slice:
+        """Rows of the days in [start_date, end_date] (inclusive), via the date index."""
+        n_days = len(self.day_offsets) - 1
+        lo = 0 if not start_date else int(np.datetime64(start_date, "D").astype(np.int64)) - self.first_day
+        hi = n_days if not end_date else int(np.datetime64(end_date, "D").astype(np.int64)) - self.first_day + 1
+        lo, hi = min(max(lo, 0), n_days), min(max(hi, 0), n_days)
+        if hi <= lo:
+            return slice(0, 0)
+        return slice(int(self.day_offsets[lo]), int(self.day_offsets[hi]))
+
+    def route_code(self, route: str) -> int:
+        """Dictionary code of a route (case-insensitive)."""
+        wanted = route.strip().upper()
+        for code, name in enumerate(self.routes):
+            if name.upper() == wanted:
+                return code
+        raise KeyError(f"Unknown route '{route}'. Known routes: {', '.join(sorted(self.routes))}")
+
+    def slice(
+        self, route: str | None = None, start_date: str | None = None, end_date: str | None = None
+    ) -> dict[str, np.ndarray]:
+        """Rows for one route (or all routes) in a date range; day is datetime64[D], route a code."""
+        window = self.row_range(start_date, end_date)
+        columns = {name: column[window] for name, column in self.columns.items()}
+        if route:
+            keep = columns["route"] == self.route_code(route)
+            columns = {name: column[keep] for name, column in columns.items()}
+        else:
+            columns = {name: np.asarray(column) for name, column in columns.items()}
+        columns["day"] = columns["day"].astype(np.int64).astype("datetime64[D]")
+        return columns
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest the demand CSV into the columnar store.")
+    parser.add_argument("csv", nargs="?", type=Path, default=Path(__file__).parent / "data" / "package_demand.csv")
+    parser.add_argument("--store", type=Path, default=Path(__file__).parent / ".cache" / "demand_store",
+                        help="Root directory of the stores (one per CSV).")
+    parser.add_argument("--route", help="Route to slice after ingesting, e.g. LAX-JFK.")
+    parser.add_argument("--start", help="First day of the slice (YYYY-MM-DD).")
+    parser.add_argument("--end", help="Last day of the slice (YYYY-MM-DD).")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = DemandStore.open(store_dir_for(args.store, args.csv), args.csv)
+    opened = time.perf_counter() - started
+    days = store.days
+    print(
+        f"{store.rows:,} rows, {len(store.routes)} routes, {len(store.cities)} cities, "
+        f"{days[0] if len(days) else '-'} to {days[-1] if len(days) else '-'} "
+        f"(opened in {opened * 1000:.1f} ms) -> {store.store_dir}"
+    )
+
+    started = time.perf_counter()
+    rows = store.slice(args.route, args.start, args.end)
+    print(
+        f"Slice {args.route or 'ALL'} {args.start or 'start'}..{args.end or 'end'}: "
+        f"{len(rows['day']):,} rows, {rows['packages'].sum():,.0f} packages "
+        f"in {(time.perf_counter() - started) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Zava Logistics - Documentation Upload Cache
+===========================================
+
+Content-addressed cache for the documentation files and the File Search
+vector store built from them.
+
+A local JSON manifest maps the SHA-256 of each doc to its remote file ID and
+each vector store name to its ID plus the doc hashes it was built from.
+On startup only new or changed docs are uploaded, and the existing vector store
+is patched incrementally (stale files detached, new files attached) instead of
+being rebuilt. Every cached ID is checked remotely before it is reused.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from tracing import span
+
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class DocSyncResult:
+    """Outcome of syncing the docs with the remote project."""
+
+    vector_store_id: str
+    file_ids: list[str]
+    uploaded: list[str] = field(default_factory=list)   # doc names uploaded this run
+    reused: list[str] = field(default_factory=list)     # doc names served from the cache
+    vector_store_created: bool = False
+
+
+class DocUploadCache:
+    """Persistent manifest of uploaded docs and vector stores for one project endpoint."""
+
+    def __init__(self, manifest_path: Path, project_endpoint: str):
+        self.manifest_path = Path(manifest_path)
+        self.project_endpoint = project_endpoint
+        self._manifest = self._load()
+
+    # -------------------------------------------------------------------------
+    # Manifest persistence
+    # -------------------------------------------------------------------------
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != MANIFEST_VERSION:
+            data = {"version": MANIFEST_VERSION, "projects": {}}
+        return data
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._manifest, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def _project(self) -> dict[str, Any]:
+        return self._manifest["projects"].setdefault(
+            self.project_endpoint, {"files": {}, "vector_stores": {}}
+        )
+
+    # -------------------------------------------------------------------------
+    # Remote existence checks
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    async def _file_exists(agents_client, file_id: str) -> bool:
+        try:
+            await agents_client.files.get(file_id)
+            return True
+        except ResourceNotFoundError:
+            return False
+
+    @staticmethod
+    async def _vector_store_exists(agents_client, vector_store_id: str) -> bool:
+        try:
+            vector_store = await agents_client.vector_stores.get(vector_store_id)
+        except ResourceNotFoundError:
+            return False
+        return getattr(vector_store, "status", None) != "expired"
+
+    # -------------------------------------------------------------------------
+    # Sync
+    # -------------------------------------------------------------------------
+
+    async def sync(
+        self,
+        agents_client,
+        doc_files: list[Path],
+        vector_store_name: str,
+        on_status: Callable[[str], None] | None = None,
+    ) -> DocSyncResult:
+        """Upload changed docs and return a vector store containing exactly the current docs."""
+        status = on_status or (lambda _message: None)
+        files = self._project["files"]
+        hashes = {doc.name: file_sha256(doc) for doc in doc_files}
+
+        # Reuse cached uploads whose remote file still exists
+        cached = {name: files[sha]["file_id"] for name, sha in hashes.items() if sha in files}
+        exists = await asyncio.gather(*(self._file_exists(agents_client, fid) for fid in cached.values()))
+        valid = {name for name, ok in zip(cached, exists) if ok}
+        for name in set(cached) - valid:
+            files.pop(hashes[name], None)
+
+        # Upload new or changed docs concurrently
+        to_upload = [doc for doc in doc_files if doc.name not in valid]
+        for doc in to_upload:
+            status(f"  Uploading: {doc.name}")
+        with span("docs.upload", uploaded=len(to_upload), reused=len(valid)):
+            uploaded = await asyncio.gather(
+                *(agents_client.files.upload_and_poll(file_path=str(doc), purpose="assistants") for doc in to_upload)
+            )
+        for doc, info in zip(to_upload, uploaded):
+            files[hashes[doc.name]] = {"file_id": info.id, "name": doc.name}
+        for name in sorted(valid):
+            status(f"  Reusing cached upload: {name}")
+
+        file_ids = {name: files[sha]["file_id"] for name, sha in hashes.items()}
+        result = DocSyncResult(
+            vector_store_id="",
+            file_ids=[file_ids[doc.name] for doc in doc_files],
+            uploaded=[doc.name for doc in to_upload],
+            reused=sorted(valid),
+        )
+
+        stores = self._project["vector_stores"]
+        entry = stores.get(vector_store_name)
+        with span("vector_store", name=vector_store_name) as vs_span:
+            if entry and await self._vector_store_exists(agents_client, entry["id"]):
+                await self._patch_vector_store(agents_client, entry, hashes, file_ids, set(result.uploaded), status)
+            else:
+                status("Creating vector store...")
+                vector_store = await agents_client.vector_stores.create_and_poll(
+                    file_ids=result.file_ids,
+                    name=vector_store_name,
+                )
+                entry = {"id": vector_store.id}
+                result.vector_store_created = True
+            if vs_span is not None:
+                vs_span.set(created=result.vector_store_created)
+
+        entry["files"] = hashes
+        stores[vector_store_name] = entry
+        result.vector_store_id = entry["id"]
+        self.save()
+        return result
+
+    async def _patch_vector_store(
+        self,
+        agents_client,
+        entry: dict[str, Any],
+        hashes: dict[str, str],
+        file_ids: dict[str, str],
+        uploaded: set[str],
+        status: Callable[[str], None],
+    ) -> None:
+        """Detach stale docs from an existing vector store and index only the changed ones."""
+        vector_store_id = entry["id"]
+        previous = entry.get("files", {})
+        files = self._project["files"]
+
+        stale = {name: sha for name, sha in previous.items() if hashes.get(name) != sha}
+        for name, sha in stale.items():
+            old_id = files.get(sha, {}).get("file_id")
+            if not old_id:
+                continue
+            status(f"  Removing stale doc from vector store: {name}")
+            try:
+                await agents_client.vector_store_files.delete(vector_store_id=vector_store_id, file_id=old_id)
+            except ResourceNotFoundError:
+                pass
+            if sha not in hashes.values() and not self._is_referenced(sha, exclude=entry):
+                try:
+                    await agents_client.files.delete(file_id=old_id)
+                except ResourceNotFoundError:
+                    pass
+                files.pop(sha, None)
+
+        # Re-uploaded docs are indexed again too: their previous remote file was gone
+        changed = [name for name, sha in hashes.items() if previous.get(name) != sha or name in uploaded]
+        if changed:
+            status(f"Indexing {len(changed)} changed doc(s) into vector store...")
+            await asyncio.gather(*(
+                agents_client.vector_store_files.create_and_poll(
+                    vector_store_id=vector_store_id, file_id=file_ids[name]
+                )
+                for name in changed
+            ))
+        else:
+            status("Reusing cached vector store (docs unchanged)")
+
+    def _is_referenced(self, sha: str, exclude: dict[str, Any]) -> bool:
+        """Whether another cached vector store still uses the upload with this hash."""
+        return any(
+            sha in store.get("files", {}).values()
+            for store in self._project["vector_stores"].values()
+            if store is not exclude
+        )
+
+    # -------------------------------------------------------------------------
+    # Invalidation
+    # -------------------------------------------------------------------------
+
+    def forget(self, vector_store_id: str | None = None, file_ids: list[str] | None = None) -> None:
+        """Drop deleted resources from the manifest so they are not reused."""
+        project = self._project
+        if vector_store_id:
+            project["vector_stores"] = {
+                name: store for name, store in project["vector_stores"].items()
+                if store.get("id") != vector_store_id
+            }
+        if file_ids:
+            removed = set(file_ids)
+            project["files"] = {
+                sha: info for sha, info in project["files"].items() if info.get("file_id") not in removed
+            }
+        self.save()
@@ -0,0 +1,262 @@
+"""
+Zava Logistics - Policy and Fleet Fact Store
+============================================
+
+Exact lookup of the numbers in the company docs, exposed to the Reviewer
+Agent as a function tool. Questions like "what is the 767's payload?" or
+"what is the buffer?" are answered locally, with the document and section
+to cite, instead of going through semantic search.
+
+The markdown docs are compiled into typed facts (subject, attribute, value):
+  - table rows: subject is the row's first cell and attribute the column
+    header, or for two-column "Specification | Value" tables, subject is
+    the section heading and attribute the row label
+  - key/value bullets ("- **Daily Capacity**: 47,000 kg"): subject is the
+    section heading
+  - bullets with a bold figure ("Maintain **15% capacity buffer** ...")
+Values are parsed into a number (or low-high range) and a unit where they
+start with one ("52,000 kg", "+15% per kg", "$0.45", "24-48 hours"); the
+original text is always kept.
+
+Each doc's facts are cached by content hash in <cache_dir>/<sha>.json, so
+only a changed doc is recompiled. Lookups go through a dict of normalized
+subjects.
+"""
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Annotated, Callable
+
+from local_retrieval import Chunk, chunk_markdown, format_citation
+
+
+FACT_STORE_VERSION = 1
+
+# Maximum number of facts returned by one lookup
+MAX_LOOKUP_RESULTS = 25
+
+_KEY_BULLET_RE = re.compile(r"^\s*[-*]\s+\*\*([^*]+?):?\*\*:?\s*(.+)$")
+_BOLD_FIGURE_RE = re.compile(r"\*\*([+-]?\$?\d[\d,.]*%?)\s+([^*]+)\*\*")
+_SEPARATOR_RE = re.compile(r"\|[\s:|-]+\|")
+_VALUE_RE = re.compile(
+    r"^(?P<sign>[+-])?(?P<currency>\$)?(?P<low>\d[\d,]*(?:\.\d+)?)"
+    r"(?:\s*-\s*\$?(?P<high>\d[\d,]*(?:\.\d+)?))?(?P<unit>[^(]*)"
+)
+_HEADING_SUBJECT_RE = re.compile(r"^\d+\.\s*|\s*\([^)]*\)$")  # "1. Forecast Horizon", "LAX-JFK (Flagship Route)"
+_NORMALIZE_RE = re.compile(r"[^a-z0-9%$]+")
+_MAGNITUDES = {"K": 1e3, "M": 1e6}
+
+
+def normalize(text: str) -> str:
+    """Lookup key: lowercase words joined by single spaces, punctuation dropped."""
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+# =============================================================================
+# FACTS
+# =============================================================================
+
+@dataclass(frozen=True)
+class Fact:
+    subject: str                  # e.g. "Boeing 767-300F", "LAX-JFK", "Buffer Requirement"
+    attribute: str                # e.g. "Maximum Payload", "Distance", "capacity buffer"
+    text: str                     # the value as written
+    value: float | None           # parsed number (lower bound of a range)
+    high: float | None            # upper bound of a range
+    unit: str                     # e.g. "kg", "%", "USD", "x daily", "% per kg"
+    doc: str
+    section: str
+
+    def to_dict(self) -> dict:
+        result = {"subject": self.subject, "attribute": self.attribute, "value": self.text}
+        if self.value is not None:
+            result["number"] = self.value if self.high is None else [self.value, self.high]
+            result["unit"] = self.unit
+        result["source"] = format_citation(Chunk(doc=self.doc, section=self.section, text=""))
+        return result
+
+
+def parse_value(text: str) -> tuple[float | None, float | None, str]:
+    """'52,000 kg' -> (52000, None, 'kg'); '24-48 hours' -> (24, 48, 'hours'); '$0.45' -> (0.45, None, 'USD')."""
+    match = _VALUE_RE.match(text.strip())
+    if not match:
+        return None, None, ""
+    sign = -1.0 if match.group("sign") == "-" else 1.0
+    low = sign * float(match.group("low").replace(",", ""))
+    high = sign * float(match.group("high").replace(",", "")) if match.group("high") else None
+    unit = match.group("unit").strip().lstrip("-")
+    if unit[:1] in _MAGNITUDES and not unit[1:2].isalpha():
+        # "$90K/quarter"
+        scale = _MAGNITUDES[unit[0]]
+        low, high, unit = low * scale, high * scale if high is not None else None, unit[1:].strip()
+    if match.group("currency"):
+        unit = f"USD{unit}" if unit.startswith("/") else ("USD " + unit).strip()
+    return low, high, unit
+
+
+def _fact(subject: str, attribute: str, text: str, chunk: Chunk) -> Fact | None:
+    subject, attribute, text = subject.strip(), attribute.strip(), text.strip()
+    # Placeholders ("-") and bullets whose value is a nested list (":") carry no fact
+    if not subject or not attribute or not any(c.isalnum() for c in text):
+        return None
+    value, high, unit = parse_value(text)
+    return Fact(subject, attribute, text, value, high, unit, chunk.doc, chunk.section)
+
+
+def compile_facts(chunk: Chunk) -> list[Fact]:
+    """Facts in one markdown section: table cells, key/value bullets and bold figures."""
+    subject = _HEADING_SUBJECT_RE.sub("", chunk.section.split(" > ")[-1])
+    facts: list[Fact | None] = []
+    header: list[str] | None = None
+
+    for line in chunk.text.splitlines():
+        stripped = line.strip()
+        if not stripped.startswith("|"):
+            header = None
+        elif not _SEPARATOR_RE.fullmatch(stripped):
+            cells = [cell.strip().strip("*") for cell in stripped.strip("|").split("|")]
+            if header is None:
+                header = cells
+            elif len(header) == 2 and header[1].lower() == "value":
+                facts.append(_fact(subject, cells[0], cells[1], chunk))
+            else:
+                facts.extend(
+                    _fact(cells[0], column, cell, chunk) for column, cell in zip(header[1:], cells[1:])
+                )
+            continue
+
+        bullet = _KEY_BULLET_RE.match(line)
+        if bullet:
+            facts.append(_fact(subject, bullet.group(1), bullet.group(2), chunk))
+        elif stripped.startswith(("-", "*")):
+            for figure, attribute in _BOLD_FIGURE_RE.findall(stripped):
+                facts.append(_fact(subject, attribute, figure, chunk))
+    return [fact for fact in facts if fact is not None]
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+def _file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class FactStore:
+    """Typed facts compiled from the docs, indexed by normalized subject."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.facts: list[Fact] = []
+        self._by_subject: dict[str, list[Fact]] = {}
+
+    @classmethod
+    def open(cls, cache_dir: Path, doc_files: list[Path]) -> "FactStore":
+        """Load the compiled facts, recompiling only docs whose content changed."""
+        store = cls(cache_dir)
+        meta = store._read_meta()
+        docs_meta = meta.get("docs", {}) if meta.get("version") == FACT_STORE_VERSION else {}
+
+        current: dict[str, dict] = {}
+        for doc in doc_files:
+            stat = doc.stat()
+            cached = docs_meta.get(doc.name)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                current[doc.name] = cached
+            else:
+                current[doc.name] = {"sha": _file_sha256(doc), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            store.facts.extend(store._doc_facts(doc, current[doc.name]["sha"]))
+
+        if current != docs_meta:
+            store._write_meta({"version": FACT_STORE_VERSION, "docs": current})
+            keep = {info["sha"] for info in current.values()}
+            for path in store.cache_dir.glob("*.json"):
+                if path.name != "meta.json" and path.stem not in keep:
+                    path.unlink(missing_ok=True)
+
+        for fact in store.facts:
+            store._by_subject.setdefault(normalize(fact.subject), []).append(fact)
+        return store
+
+    def _doc_facts(self, doc: Path, sha: str) -> list[Fact]:
+        """Facts of one doc, compiled once per content hash."""
+        path = self.cache_dir / f"{sha}.json"
+        try:
+            return [Fact(**fact) for fact in json.loads(path.read_text(encoding="utf-8"))]
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            pass
+        facts = [
+            fact
+            for chunk in chunk_markdown(doc.name, doc.read_text(encoding="utf-8"))
+            for fact in compile_facts(chunk)
+        ]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps([asdict(fact) for fact in facts]), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return facts
+
+    def _read_meta(self) -> dict:
+        try:
+            return json.loads((self.cache_dir / "meta.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_meta(self, meta: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, self.cache_dir / "meta.json")
+
+    @property
+    def subjects(self) -> list[str]:
+        return sorted({fact.subject for fact in self.facts})
+
+    def lookup(self, subject: str, attribute: str | None = None) -> list[Fact]:
+        """Facts of a subject (exact, else every subject containing it), optionally one attribute.
+
+        Attributes match exactly when one does, otherwise by substring.
+        """
+        key = normalize(subject)
+        facts = self._by_subject.get(key)
+        if facts is None:
+            facts = [fact for name, group in self._by_subject.items() if key and key in name for fact in group]
+        if attribute:
+            wanted = normalize(attribute)
+            exact = [fact for fact in facts if normalize(fact.attribute) == wanted]
+            facts = exact or [fact for fact in facts if wanted in normalize(fact.attribute)]
+        return facts
+
+
+# =============================================================================
+# AGENT TOOLS
+# =============================================================================
+
+def build_fact_tools(store: FactStore) -> list[Callable[..., str]]:
+    """Create the exact fact lookup tool registered on the Reviewer Agent."""
+
+    def lookup_fact(
+        subject: Annotated[str, "Aircraft, route, policy topic or metric, e.g. '767-300F', 'LAX-JFK', 'Buffer Requirement', 'Charter flight'."],
+        attribute: Annotated[str | None, "Attribute to return, e.g. 'Maximum Payload', 'Daily Capacity', 'Cost Impact'. Omit for all."] = None,
+    ) -> str:
+        """Look up exact figures from the fleet, route, policy, peak-season and cost documents.
+
+        Returns each matching fact with its value, parsed number and unit, and the document and
+        section to cite. Lists the known subjects when nothing matches.
+        """
+        facts = store.lookup(subject, attribute)
+        if not facts:
+            return json.dumps({
+                "error": f"No facts for subject '{subject}'" + (f" and attribute '{attribute}'" if attribute else ""),
+                "known_subjects": store.subjects,
+            })
+        return json.dumps({
+            "facts": [fact.to_dict() for fact in facts[:MAX_LOOKUP_RESULTS]],
+            "truncated": len(facts) > MAX_LOOKUP_RESULTS,
+        })
+
+    return [lookup_fact]
@@ -0,0 +1,217 @@
+"""
+Zava Logistics - Fan-Out Group Chat
+===================================
+
+Round-based orchestration in which the manager dispatches the independent
+participants of a round at once, instead of the GroupChatBuilder workflow
+running them one after the other.
+
+Each round:
+  - dispatch: every participant in the rotation starts concurrently on the
+              conversation as it stood at the end of the previous round
+  - stream:   their updates are yielded as AgentRunUpdateEvents in arrival
+              order (interleaved); on_dispatch/on_complete let the renderer
+              and turn tracer keep one turn per agent
+  - join:     once all of them have finished, their messages are appended in
+              rotation order, a routing rule may send one participant back
+              for a retry (again concurrently, limited per round) and the
+              termination condition is checked
+
+A round therefore takes as long as its slowest participant rather than the
+sum of all of them. After the last round, or an early stop, the manager's
+synthesis closes the chat, as with the rule-based speaker selector.
+
+FanOutGroupChat.run_stream(task) yields the same event types as a built
+Workflow, so main() consumes both the same way; state() and restore() carry
+a resumed run (see checkpoint.py).
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence
+
+from agent_framework import (
+    AgentRunResponse,
+    AgentRunResponseUpdate,
+    AgentRunUpdateEvent,
+    ChatMessage,
+    Role,
+    WorkflowOutputEvent,
+)
+
+from context_compaction import CompactingAgent, run_stream_on_new_thread
+from speaker_selection import RouteRule, format_discussion
+
+
+@dataclass
+class Wave:
+    """Participants dispatched together: wall time versus their summed turn times (seconds)."""
+
+    agents: list[str]
+    wall_seconds: float
+    turn_seconds: float
+
+    @property
+    def saved_seconds(self) -> float:
+        return max(0.0, self.turn_seconds - self.wall_seconds)
+
+
+class _Done:
+    """Queue marker: a participant finished with its final message."""
+
+    def __init__(self, message: ChatMessage, seconds: float):
+        self.message = message
+        self.seconds = seconds
+
+
+class FanOutGroupChat:
+    """Group chat whose rounds run all rotation participants concurrently.
+
+    Single-use, like a built workflow: create one per conversation.
+    """
+
+    def __init__(
+        self,
+        participants: Sequence[Any],
+        max_rounds: int,
+        termination: Callable[[list[ChatMessage]], bool] | None = None,
+        rules: Sequence[RouteRule] = (),
+        max_detours_per_round: int = 1,
+        synthesize: Callable[[str], Awaitable[str]] | None = None,
+        manager_name: str = "Manager",
+        on_dispatch: Callable[[list[str]], None] | None = None,
+        on_complete: Callable[[str], None] | None = None,
+    ):
+        if not participants:
+            raise ValueError("participants must name at least one agent")
+        self.participants = {agent.name: agent for agent in participants}
+        self.max_rounds = max_rounds
+        self.termination = termination
+        self.rules = list(rules)
+        self.max_detours_per_round = max_detours_per_round
+        self.synthesize = synthesize
+        self.manager_name = manager_name
+        self.on_dispatch = on_dispatch
+        self.on_complete = on_complete
+        self.rounds = 0
+        self.waves: list[Wave] = []
+        self._wave: list[str] = []      # participants still to run this round (retries)
+        self._detours = 0
+
+    async def run_stream(self, task: str | list[ChatMessage]) -> AsyncIterator[Any]:
+        """Run the chat, yielding AgentRunUpdateEvents and finally a WorkflowOutputEvent.
+
+        `task` may also be a conversation to continue (a resumed run, with
+        the chat's restore()d state); its first user message is the task.
+        """
+        if isinstance(task, str):
+            conversation = [ChatMessage(role=Role.USER, text=task)]
+        else:
+            conversation = list(task)
+            task = next((m.text for m in conversation if m.role == Role.USER), "")
+
+        # Like the group chat workflow, check the condition on the initial conversation too
+        stopped = self.termination is not None and self.termination(conversation)
+        while not stopped and (self._wave or self.rounds < self.max_rounds):
+            if not self._wave:
+                self.rounds += 1
+                self._wave = list(self.participants)
+                self._detours = 0
+            wave = self._wave
+            finished: dict[str, ChatMessage] = {}
+            async for event in self._fan_out(wave, conversation, finished):
+                yield event
+
+            # Join: rotation order, not completion order, keeps the transcript stable
+            joined = [finished[name] for name in wave]
+            conversation.extend(joined)
+            self._wave = self._retries(joined, self.max_detours_per_round - self._detours)
+            self._detours += len(self._wave)
+            # Checked last, so a checkpoint taken by the condition sees the next wave
+            stopped = self.termination is not None and self.termination(conversation)
+
+        final_text = "Conversation completed."
+        if self.synthesize is not None:
+            final_text = await self.synthesize(format_discussion(
+                task,
+                ((m.author_name or "", m.text or "") for m in conversation if m.role == Role.ASSISTANT),
+            ))
+        conversation.append(ChatMessage(role=Role.ASSISTANT, text=final_text, author_name=self.manager_name))
+        yield WorkflowOutputEvent(data=list(conversation), source_executor_id=self.manager_name)
+
+    def state(self) -> dict:
+        """Round and pending retries, as plain data for a checkpoint."""
+        return {"rounds": self.rounds, "wave": list(self._wave), "detours": self._detours}
+
+    def restore(self, state: dict) -> None:
+        """Continue from a state() taken in an earlier run."""
+        self.rounds = state["rounds"]
+        self._wave = [name for name in state["wave"] if name in self.participants]
+        self._detours = state["detours"]
+
+    def _retries(self, joined: list[ChatMessage], allowed: int) -> list[str]:
+        """Participants a routing rule sends back this round (at most `allowed`)."""
+        retries: list[str] = []
+        for message in joined:
+            for rule in self.rules:
+                if len(retries) < allowed and rule.target not in retries and rule.matches(
+                    message.author_name or "", message.text or ""
+                ):
+                    retries.append(rule.target)
+        return [name for name in retries if name in self.participants]
+
+    async def _fan_out(
+        self, names: list[str], conversation: list[ChatMessage], finished: dict[str, ChatMessage]
+    ) -> AsyncIterator[AgentRunUpdateEvent]:
+        """Run the named participants concurrently and yield their updates as they arrive."""
+        queue: asyncio.Queue = asyncio.Queue()
+        started = time.perf_counter()
+        if self.on_dispatch is not None:
+            self.on_dispatch(names)
+        tasks = [
+            asyncio.create_task(self._run_participant(self.participants[name], list(conversation), queue))
+            for name in names
+        ]
+        turn_seconds = 0.0
+        try:
+            while len(finished) < len(names):
+                name, item = await queue.get()
+                if isinstance(item, BaseException):
+                    raise item
+                if isinstance(item, _Done):
+                    # Every update of this agent has been consumed by now
+                    finished[name] = item.message
+                    turn_seconds += item.seconds
+                    if self.on_complete is not None:
+                        self.on_complete(name)
+                else:
+                    yield AgentRunUpdateEvent(name, item)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.waves.append(Wave(names, time.perf_counter() - started, turn_seconds))
+
+    @staticmethod
+    async def _run_participant(agent: Any, conversation: list[ChatMessage], queue: asyncio.Queue) -> None:
+        """Stream one participant's turn into the queue, ending with _Done (or the exception)."""
+        name = agent.name
+        started = time.perf_counter()
+        updates: list[AgentRunResponseUpdate] = []
+        try:
+            # Each turn runs on a fresh thread, deleted afterwards: the conversation
+            # carries the context (a CompactingAgent manages its own turn threads)
+            if isinstance(agent, CompactingAgent):
+                stream = agent.run_stream(conversation)
+            else:
+                stream = run_stream_on_new_thread(agent, conversation)
+            async for update in stream:
+                updates.append(update)
+                await queue.put((name, update))
+        except Exception as exc:
+            await queue.put((name, exc))
+            return
+        messages = AgentRunResponse.from_agent_run_response_updates(updates).messages
+        text = next((m.text for m in reversed(messages) if m.role == Role.ASSISTANT), "")
+        message = ChatMessage(role=Role.ASSISTANT, text=text, author_name=name)
+        await queue.put((name, _Done(message, time.perf_counter() - started)))
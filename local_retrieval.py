@@ -0,0 +1,304 @@
+"""
+Zava Logistics - Local Document Retrieval
+=========================================
+
+Offline drop-in for the hosted File Search tool: a BM25 index over the
+markdown docs, exposed to the Reviewer Agent as a function tool that returns
+passages cited by document name and section.
+
+Docs are chunked by markdown heading. The inverted index (term offsets,
+postings and chunk lengths) is stored as .npy arrays and memory-mapped on
+open, so a cold start does no re-indexing and lookups are a handful of
+NumPy slices. When a doc changes only that doc is re-tokenized; the
+per-doc postings are cached by content hash and merged back into the
+global arrays.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Annotated, Callable
+
+import numpy as np
+
+
+INDEX_VERSION = 1
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Passages longer than this are trimmed in tool output
+MAX_PASSAGE_CHARS = 1200
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our per the this to with what which".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word/number tokens; keeps codes like lax-jfk, 767-300f and 52000 intact."""
+    text = _THOUSANDS_RE.sub("", text.lower())
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+# =============================================================================
+# MARKDOWN CHUNKING
+# =============================================================================
+
+@dataclass(frozen=True)
+class Chunk:
+    """One markdown section of a document."""
+
+    doc: str        # document file name
+    section: str    # heading path, e.g. "Aircraft Types > Boeing 767-300F"
+    text: str
+
+
+def chunk_markdown(doc_name: str, markdown: str) -> list[Chunk]:
+    """Split a markdown document into one chunk per heading section."""
+    chunks: list[Chunk] = []
+    path: list[tuple[int, str]] = []
+    lines: list[str] = []
+    in_code = False
+
+    def flush() -> None:
+        body = "\n".join(lines).strip()
+        if body:
+            # The document title (single H1) is implied by the doc name
+            titles = [title for level, title in path if level > 1] or [title for _, title in path]
+            chunks.append(Chunk(doc=doc_name, section=" > ".join(titles) or "Overview", text=body))
+        lines.clear()
+
+    for line in markdown.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else _HEADING_RE.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            path = [(lvl, title) for lvl, title in path if lvl < level]
+            path.append((level, match.group(2)))
+        else:
+            lines.append(line)
+    flush()
+    return chunks
+
+
+# =============================================================================
+# ON-DISK INDEX
+# =============================================================================
+
+def _file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class LocalDocIndex:
+    """Memory-mapped BM25 index over a set of markdown documents."""
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self.chunks: list[Chunk] = []
+        self.vocab: dict[str, int] = {}
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.postings_chunk = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros(0, dtype=np.float32)
+        self.chunk_len = np.zeros(0, dtype=np.float32)
+        self.avg_len = 0.0
+        self._norm = np.zeros(0, dtype=np.float32)
+
+    # -------------------------------------------------------------------------
+    # Build / open
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, index_dir: Path, doc_files: list[Path]) -> "LocalDocIndex":
+        """Open the index, re-indexing only the docs that changed since it was written."""
+        index = cls(index_dir)
+        meta = index._read_meta()
+        docs_meta = meta.get("docs", {}) if meta.get("version") == INDEX_VERSION else {}
+
+        current: dict[str, dict] = {}
+        for doc in doc_files:
+            stat = doc.stat()
+            cached = docs_meta.get(doc.name)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                current[doc.name] = cached
+            else:
+                current[doc.name] = {"sha": _file_sha256(doc), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+        unchanged = list(docs_meta) == list(current) and all(
+            docs_meta[name]["sha"] == info["sha"] for name, info in current.items()
+        )
+        if unchanged:
+            try:
+                index._load(meta)
+            except FileNotFoundError:
+                pass
+            else:
+                if docs_meta != current:
+                    # Touched but identical content: only refresh the stat fingerprints
+                    meta["docs"] = current
+                    index._write_meta(meta)
+                return index
+
+        index._rebuild(doc_files, current)
+        return index
+
+    def _segment_path(self, sha: str) -> Path:
+        return self.index_dir / "segments" / f"{sha}.json"
+
+    def _segment(self, doc: Path, sha: str) -> dict:
+        """Chunks and per-chunk term counts for one doc, cached by content hash."""
+        path = self._segment_path(sha)
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        chunks = chunk_markdown(doc.name, doc.read_text(encoding="utf-8"))
+        segment = {
+            "chunks": [{"section": c.section, "text": c.text} for c in chunks],
+            "terms": [Counter(tokenize(f"{c.section}\n{c.text}")) for c in chunks],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(segment), encoding="utf-8")
+        return segment
+
+    def _rebuild(self, doc_files: list[Path], docs_meta: dict[str, dict]) -> None:
+        """Merge per-doc segments into the global postings arrays and write them to disk."""
+        chunks: list[Chunk] = []
+        term_counts: list[dict[str, int]] = []
+        for doc in doc_files:
+            segment = self._segment(doc, docs_meta[doc.name]["sha"])
+            chunks.extend(Chunk(doc=doc.name, section=c["section"], text=c["text"]) for c in segment["chunks"])
+            term_counts.extend(segment["terms"])
+
+        vocab = {term: i for i, term in enumerate(sorted({t for counts in term_counts for t in counts}))}
+        term_ids, chunk_ids, tfs = [], [], []
+        for chunk_id, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                term_ids.append(vocab[term])
+                chunk_ids.append(chunk_id)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=offsets[1:])
+
+        arrays = {
+            "term_offsets": offsets,
+            "postings_chunk": np.asarray(chunk_ids, dtype=np.int32)[order],
+            "postings_tf": np.asarray(tfs, dtype=np.float32)[order],
+            "chunk_len": np.asarray([sum(c.values()) for c in term_counts], dtype=np.float32),
+        }
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            tmp_path = self.index_dir / f"{name}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, self.index_dir / f"{name}.npy")
+
+        meta = {
+            "version": INDEX_VERSION,
+            "docs": docs_meta,
+            "vocab": sorted(vocab, key=vocab.get),
+            "chunks": [{"doc": c.doc, "section": c.section, "text": c.text} for c in chunks],
+        }
+        self._write_meta(meta)
+        self._prune_segments({info["sha"] for info in docs_meta.values()})
+        self._load(meta)
+
+    def _prune_segments(self, keep: set[str]) -> None:
+        for path in (self.index_dir / "segments").glob("*.json"):
+            if path.stem not in keep:
+                path.unlink(missing_ok=True)
+
+    def _read_meta(self) -> dict:
+        try:
+            return json.loads((self.index_dir / "meta.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_meta(self, meta: dict) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_dir / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, self.index_dir / "meta.json")
+
+    def _load(self, meta: dict) -> None:
+        """Memory-map the postings arrays written by _rebuild."""
+        self.chunks = [Chunk(**c) for c in meta["chunks"]]
+        self.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+        self.term_offsets = np.load(self.index_dir / "term_offsets.npy", mmap_mode="r")
+        self.postings_chunk = np.load(self.index_dir / "postings_chunk.npy", mmap_mode="r")
+        self.postings_tf = np.load(self.index_dir / "postings_tf.npy", mmap_mode="r")
+        self.chunk_len = np.load(self.index_dir / "chunk_len.npy", mmap_mode="r")
+        self.avg_len = float(self.chunk_len.mean()) if len(self.chunk_len) else 0.0
+        self._norm = BM25_K1 * (1.0 - BM25_B + BM25_B * np.asarray(self.chunk_len) / max(self.avg_len, 1e-9))
+
+    # -------------------------------------------------------------------------
+    # Query
+    # -------------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 3) -> list[tuple[Chunk, float]]:
+        """Return the top_k chunks by BM25 score."""
+        n_chunks = len(self.chunks)
+        if not n_chunks:
+            return []
+        scores = np.zeros(n_chunks, dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            lo, hi = int(self.term_offsets[term_id]), int(self.term_offsets[term_id + 1])
+            ids = self.postings_chunk[lo:hi]
+            tf = self.postings_tf[lo:hi]
+            idf = math.log(1.0 + (n_chunks - (hi - lo) + 0.5) / ((hi - lo) + 0.5))
+            scores[ids] += idf * tf * (BM25_K1 + 1.0) / (tf + self._norm[ids])
+
+        top_k = max(1, min(int(top_k), n_chunks))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+# =============================================================================
+# AGENT TOOLS
+# =============================================================================
+
+def format_citation(chunk: Chunk) -> str:
+    """Citation string used in tool output, e.g. 'fleet_specifications.md § Aircraft Types'."""
+    return f"{chunk.doc} § {chunk.section}"
+
+
+def build_search_tools(index: LocalDocIndex) -> list[Callable[..., str]]:
+    """Create the doc search tool registered on the Reviewer Agent."""
+
+    def search_company_docs(
+        query: Annotated[str, "What to look up, e.g. '767 payload' or 'buffer requirement'."],
+        top_k: Annotated[int, "Number of passages to return."] = 3,
+    ) -> str:
+        """Search Zava Logistics policy, fleet, route, peak-season and cost documents.
+
+        Returns the best matching passages, each labelled with the document name and
+        section to cite.
+        """
+        results = index.search(query, top_k)
+        if not results:
+            return f"No documentation matched '{query}'."
+        passages = []
+        for rank, (chunk, _score) in enumerate(results, start=1):
+            text = chunk.text if len(chunk.text) <= MAX_PASSAGE_CHARS else chunk.text[:MAX_PASSAGE_CHARS] + "..."
+            passages.append(f"[{rank}] Source: {format_citation(chunk)}\n{text}")
+        return "\n\n".join(passages)
+
+    return [search_company_docs]
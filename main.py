@@ -10,42 +10,120 @@ Use Case: Analyze next month's expected package volume and recommend
           capacity and optimized routes for Zava Logistics.
 
 Agents:
-  - Manager Agent: Coordinates the discussion, selects who speaks next
-  - Analyst Agent: Uses Code Interpreter to analyze package demand data
-  - Reviewer Agent: Uses File Search to look up company documentation
+  - Manager: Coordinates the discussion, selects who speaks next (rule-based
+             by default; the model only writes the final recommendation)
+  - Analyst Agent: Uses local demand analytics and capacity optimizer tools over the demand data
+  - Reviewer Agent: Uses File Search (hosted or local index) to look up company documentation
 
 Requirements:
   - pip install agent-framework-azure-ai --pre
-  - pip install azure-identity python-dotenv
+  - pip install azure-identity python-dotenv numpy
 
 Environment Variables (set in .env file):
   - AZURE_AI_PROJECT_ENDPOINT: Your Azure AI Foundry project endpoint
   - AZURE_AI_MODEL_DEPLOYMENT_NAME: Your model deployment (e.g., gpt-5-mini)
+  - DOC_SEARCH_BACKEND: "hosted" (default, Azure File Search) or "local" (offline BM25 index)
+  - LLM_CACHE_MODE: "off" (default), "record" (reuse cached responses) or "replay" (offline)
+  - MANAGER_MODE: "rules" (default, local speaker selection) or "llm" (Manager Agent picks speakers)
+  - ORCHESTRATION_MODE: "sequential" (default, one participant at a time) or "fanout"
+    (each round's participants run concurrently; requires MANAGER_MODE=rules)
+
+Run `python main.py --preflight` to validate the environment, files and demand CSV
+without importing the Agent Framework or touching the network.
+
+Each run is checkpointed after every turn; `python main.py --resume` continues
+the last failed run with its agents and vector store instead of starting over.
 """
 
-import asyncio
+from __future__ import annotations
+
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import functools
+import importlib
 import json
 import os
+import sys
 from pathlib import Path
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
-from typing import cast
+from typing import Any, Callable, cast
+
+from demand_schema import validate_demand_csv
+from speaker_selection import RouteRule, RuleBasedSpeakerSelector
+from stream_renderer import StreamRenderer
+
+# The Agent Framework and Azure SDK take seconds to import (agent_framework alone
+# pulls in openai and mcp), and so does everything built on them. These names are
+# imported on first use instead: load_framework() brings them all in once the
+# configuration checks have passed, so a misconfigured run fails immediately.
+DEFERRED_IMPORTS = {
+    "azure.identity.aio": ["AzureCliCredential"],
+    "agent_framework": [
+        "AgentRunUpdateEvent",
+        "ChatAgent",
+        "ChatMessage",
+        "GroupChatBuilder",
+        "HostedFileSearchTool",
+        "HostedVectorStoreContent",
+        "Role",
+        "WorkflowOutputEvent",
+    ],
+    "capacity_optimizer": ["CapacityOptimizer", "build_capacity_tools", "load_fleet_config"],
+    "checkpoint": ["CheckpointStore", "Checkpointer", "RunCheckpoint"],
+    "client_factory": ["AgentClientFactory"],
+    "context_compaction": ["CompactingAgent", "ConversationCompactor"],
+    "demand_analytics": ["build_demand_tools", "load_demand_data"],
+    "demand_forecast": ["build_forecast_tools", "load_forecaster", "load_peak_calendar"],
+    "doc_cache": ["DocUploadCache"],
+    "fanout_chat": ["FanOutGroupChat"],
+    "fact_store": ["FactStore", "build_fact_tools"],
+    "local_retrieval": ["LocalDocIndex", "build_search_tools"],
+    "rate_limiter": ["RateLimitScheduler"],
+    "response_cache": ["ReplayOnlyChatClient", "ResponseStore", "wrap_chat_client"],
+    "termination": ["TerminationTracker"],
+    "tracing": ["Tracer", "TurnTracer", "format_summary", "instrument_agent_creation"],
+}
+_DEFERRED_MODULES = {name: module for module, names in DEFERRED_IMPORTS.items() for name in names}
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+
+def __getattr__(name: str) -> Any:
+    """Import a deferred name on first access from outside this module.
+
+    Functions of this module see bare names, which this hook doesn't cover:
+    those that use deferred names are marked @uses_framework.
+    """
+    module = _DEFERRED_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(module), name)
+    return value
+
+
+def load_framework() -> float:
+    """Import all deferred names (keeping any already set); returns the seconds it took."""
+    started = time.perf_counter()
+    for name in _DEFERRED_MODULES:
+        if name not in globals():
+            __getattr__(name)
+    return time.perf_counter() - started
+
 
-from azure.identity.aio import AzureCliCredential
+def uses_framework(func: Callable) -> Callable:
+    """Load the deferred names before func runs, so it also works when imported by other scripts."""
 
-from agent_framework import (
-    AgentRunUpdateEvent,
-    ChatAgent,
-    ChatMessage,
-    GroupChatBuilder,
-    HostedFileSearchTool,
-    HostedVectorStoreContent,
-    Role,
-    WorkflowOutputEvent,
-)
-from agent_framework.azure import AzureAIAgentClient
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        load_framework()
+        return func(*args, **kwargs)
+
+    return wrapper
 
 
 # =============================================================================
@@ -66,6 +144,32 @@ DOC_FILES = [
     DOCS_DIR / "cost_efficiency_targets.md",
 ]
 
+# Local cache of uploaded doc / vector store IDs (reused across runs)
+CACHE_DIR = SCRIPT_DIR / ".cache"
+DOC_MANIFEST_FILE = CACHE_DIR / "doc_manifest.json"
+VECTOR_STORE_NAME = "zava-logistics-docs"
+
+# Columnar, memory-mapped copy of the demand CSV (set to None to parse the CSV every run)
+DEMAND_STORE_DIR = CACHE_DIR / "demand_store"
+
+# Forecaster state, extended with the days appended to the demand CSV instead of
+# refitted every run (set to None to refit every run)
+FORECAST_STATE_DIR = CACHE_DIR / "forecast"
+
+# Doc search backend for the Reviewer: "hosted" (File Search) or "local" (BM25 index)
+DOC_SEARCH_BACKEND = os.environ.get("DOC_SEARCH_BACKEND", "hosted").strip().lower()
+LOCAL_INDEX_DIR = CACHE_DIR / "doc_index"
+
+# Facts compiled from the docs' tables and bullets for the Reviewer's exact lookups
+# (recompiled per doc when its content changes)
+FACT_STORE_DIR = CACHE_DIR / "facts"
+
+# LLM response cache: "off", "record" (serve hits, record misses) or
+# "replay" (recorded responses only - runs fully offline)
+LLM_CACHE_MODE = os.environ.get("LLM_CACHE_MODE", "off").strip().lower()
+LLM_CACHE_MODES = ("off", "record", "replay")
+LLM_CACHE_DIR = CACHE_DIR / "llm_responses"
+
 # The task for our agents to solve
 USER_TASK = """
 Analyze next month's (February 2026) expected package volume for Zava Logistics
@@ -77,6 +181,45 @@ Please:
 3. Provide specific recommendations for capacity adjustments if needed
 """
 
+# Speaker selection: "rules" (local state machine, the model is only called
+# for the final synthesis) or "llm" (the Manager Agent picks every speaker)
+MANAGER_MODE = os.environ.get("MANAGER_MODE", "rules").strip().lower()
+
+# Orchestration: "sequential" (GroupChatBuilder, participants speak one after
+# the other) or "fanout" (the rule-based manager dispatches every participant
+# of a round at once and joins their messages before the next round)
+ORCHESTRATION_MODE = os.environ.get("ORCHESTRATION_MODE", "sequential").strip().lower()
+
+# Rule-based manager: fixed rotation, number of rounds and content routing
+SPEAKER_ROTATION = ["AnalystAgent", "ReviewerAgent"]
+MAX_ROUNDS = 4
+ROUTING_RULES = [
+    # Give an agent one retry when its lookup came back empty or failed
+    RouteRule(r"\b(could not|couldn't|unable to) (find|retrieve|load)\b", "AnalystAgent", after="AnalystAgent"),
+    RouteRule(r"\b(no documentation matched|could not find|couldn't find)\b", "ReviewerAgent", after="ReviewerAgent"),
+]
+
+# Context compaction: each participant gets the task, a summary of older turns
+# and the latest messages within its budget (estimated tokens of conversation
+# history; the agent's own instructions and tools come on top)
+CONTEXT_COMPACTION = True
+CONTEXT_TOKEN_BUDGETS = {"AnalystAgent": 3000, "ReviewerAgent": 3000}
+CONTEXT_RECENT_MESSAGES = 4
+
+# Quota of the model deployment shared by every agent call in this process:
+# calls queue for it instead of failing with 429 (set each to None for no
+# client-side limit; throttled calls are still retried after Retry-After)
+MODEL_REQUESTS_PER_MINUTE = 300
+MODEL_TOKENS_PER_MINUTE = 50_000
+
+# Conversation, speaker state and resource IDs of the current run, saved after
+# every turn so `--resume` can continue a failed run (set to None to disable)
+CHECKPOINT_DIR = CACHE_DIR / "checkpoints"
+
+# Per-run trace of setup phases, agent turns and tool calls (OTLP/JSON lines);
+# set to None to disable
+TRACE_DIR = SCRIPT_DIR / "traces"
+
 # Maximum number of conversation turns
 # 4 rounds × 2 agents per round = 8 agent responses + manager selections
 # We count assistant messages (includes manager), so ~12-16 total
@@ -85,6 +228,17 @@ MAX_TURNS = 16
 # Phrase that signals the manager has completed the analysis
 COMPLETION_PHRASE = "The analysis is complete"
 
+# Additional stop rules (set to None to disable)
+MAX_CONVERSATION_TOKENS = 60_000   # estimated tokens across the whole conversation
+MAX_RUN_SECONDS = 900              # wall-clock deadline for the group chat
+STAGNATION_TURNS = 3               # consecutive near-verbatim repeats by participants
+
+# Display name of the manager in the group chat
+MANAGER_DISPLAY_NAME = "Manager"
+
+# Agent names, in the order create_chat_clients returns their clients
+AGENT_NAMES = ("ManagerAgent", "AnalystAgent", "ReviewerAgent")
+
 
 # =============================================================================
 # CLI FORMATTING HELPERS
@@ -122,7 +276,7 @@ def print_task(task: str):
 
 def get_agent_style(agent_name: str) -> tuple[str, str, str]:
     """Get icon, color, and display name for an agent."""
-    if "manager" in agent_name.lower():
+    if is_manager_agent(agent_name):
         return "🎯", Colors.GREEN, "MANAGER"
     elif "analyst" in agent_name.lower():
         return "📊", Colors.BLUE, "ANALYST"
@@ -132,48 +286,65 @@ def get_agent_style(agent_name: str) -> tuple[str, str, str]:
         return "💬", Colors.YELLOW, agent_name.upper()
 
 
-def format_manager_output(message: str) -> str:
-    """Parse and format manager JSON output into readable sections."""
-    try:
-        data = json.loads(message)
-
-        output_parts = []
+def format_manager_field(field: str, value, fields: dict) -> str | None:
+    """Format one field of the manager's JSON output (None if it should not be shown yet)."""
+    # Next speaker
+    if field == "selected_participant" and value:
+        participant = value.replace("Agent", "")
+        return f"{Colors.YELLOW}▶ Next Speaker:{Colors.END} {participant}"
 
-        # Next speaker
-        if "selected_participant" in data and data["selected_participant"]:
-            participant = data["selected_participant"].replace("Agent", "")
-            output_parts.append(f"{Colors.YELLOW}▶ Next Speaker:{Colors.END} {participant}")
+    # Instruction/task
+    if field == "instruction" and value:
+        instruction = value
+        # Truncate if too long
+        if len(instruction) > 200:
+            instruction = instruction[:200] + "..."
+        return f"{Colors.YELLOW}▶ Task:{Colors.END} {instruction}"
 
-        # Instruction/task
-        if "instruction" in data and data["instruction"]:
-            instruction = data["instruction"]
-            # Truncate if too long
-            if len(instruction) > 200:
-                instruction = instruction[:200] + "..."
-            output_parts.append(f"{Colors.YELLOW}▶ Task:{Colors.END} {instruction}")
+    # Final message (if finishing)
+    if field == "final_message" and value and fields.get("finish"):
+        return f"{Colors.YELLOW}▶ Conclusion:{Colors.END} {value}"
 
-        # Final message (if finishing)
-        if data.get("finish") and data.get("final_message"):
-            output_parts.append(f"{Colors.YELLOW}▶ Conclusion:{Colors.END} {data['final_message']}")
+    return None
 
-        return "\n".join(output_parts) if output_parts else message
 
+def format_manager_output(message: str) -> str:
+    """Parse and format manager JSON output into readable sections."""
+    try:
+        data = json.loads(message)
     except json.JSONDecodeError:
         # Not JSON, return as-is
         return message
 
+    if not isinstance(data, dict):
+        return message
+
+    output_parts = [
+        line for field in ("selected_participant", "instruction", "final_message")
+        if (line := format_manager_field(field, data.get(field), data))
+    ]
+    return "\n".join(output_parts) if output_parts else message
 
-def print_agent_message(agent_name: str, message: str):
-    """Print a formatted agent message with appropriate icon and color."""
-    icon, color, display_name = get_agent_style(agent_name)
 
-    # Print the agent header
+def is_manager_agent(agent_name: str) -> bool:
+    """Whether an executor/agent name refers to the manager."""
+    return "manager" in agent_name.lower()
+
+
+def print_agent_header(agent_name: str):
+    """Print the header that starts an agent's turn."""
+    icon, color, display_name = get_agent_style(agent_name)
     print(f"\n{Colors.BOLD}{'─' * 64}{Colors.END}")
     print(f"{color}{Colors.BOLD}{icon} [{display_name}]{Colors.END}")
     print(f"{'─' * 64}")
 
+
+def print_agent_message(agent_name: str, message: str):
+    """Print a formatted agent message with appropriate icon and color."""
+    print_agent_header(agent_name)
+
     # Format manager output specially (parse JSON)
-    if "manager" in agent_name.lower():
+    if is_manager_agent(agent_name):
         formatted_message = format_manager_output(message)
     else:
         formatted_message = message
@@ -246,14 +417,27 @@ Keep your instructions to 1-2 sentences. Be direct.
 After 4 rounds (8 agent responses total), provide a 2-sentence final recommendation and end with exactly: "The analysis is complete."
 """
 
-ANALYST_INSTRUCTIONS = """
-You are a Data Analyst at Zava Logistics. Use this February 2026 demand data:
+SYNTHESIS_INSTRUCTIONS = """
+You are the Planning Manager at Zava Logistics closing a capacity planning discussion.
+
+You receive the task and the Analyst's and Reviewer's findings. Write a 2-sentence final
+recommendation using only figures and policies stated in the discussion, and end with
+exactly: "The analysis is complete."
+"""
 
-TOTAL: 425,000 packages / 1,530,000 kg
+ANALYST_INSTRUCTIONS = """
+You are a Data Analyst at Zava Logistics with tools over the package demand data.
 
-BY ROUTE: LAX-JFK: 156K (37%), ORD-MIA: 98K (23%), SEA-DFW: 68K (16%), DEN-ATL: 73K (17%)
+Use the demand tools for every number you quote:
+- get_demand_summary: totals, weight, route share, averages and peak day for a date range
+- get_daily_demand: day-by-day volume for a route or the network with a rolling average
+- get_peak_days: highest-volume days and their delta versus the average
+- get_demand_forecast: 30/60/90-day forecast past the data with prediction intervals and
+  documented peak-season uplifts (per route, or day by day for one route)
+- get_capacity_plan: load factors, required flights and 15% buffer violations per route, with the
+  minimum-cost cover (extra 767/A300 flights, then charter); use demand_multiplier for what-ifs
 
-VALENTINE'S PEAK (Feb 10-14): Feb 13 is peak day at 17,700 packages (+58% vs daily avg of 11,200).
+Never estimate or invent figures - call a tool instead.
 
 RESPONSE RULES:
 - Maximum 3 sentences per response
@@ -264,7 +448,9 @@ RESPONSE RULES:
 REVIEWER_INSTRUCTIONS = """
 You are an Operations Reviewer at Zava Logistics with access to company documentation.
 
-Search the docs for relevant policies, fleet specs, and constraints. Cite the specific document name.
+Search the docs for relevant policies, fleet specs, and constraints. Cite the specific document name and section.
+For exact figures (payloads, capacities, frequencies, buffer, thresholds, lead times, cost targets)
+call lookup_fact and quote the value with the source it returns.
 
 RESPONSE RULES:
 - Maximum 3 sentences per response
@@ -277,125 +463,454 @@ RESPONSE RULES:
 # MAIN APPLICATION
 # =============================================================================
 
-def count_assistant_messages(messages: list[ChatMessage]) -> int:
-    """Count the number of assistant messages in the conversation."""
-    return sum(1 for msg in messages if msg.role == Role.ASSISTANT)
-
-
-def should_terminate(messages: list[ChatMessage]) -> bool:
-    """Check if the conversation should terminate.
+@uses_framework
+def create_termination_condition() -> TerminationTracker:
+    """Create the stateful termination condition for one conversation.
 
     Terminates when:
-    1. The completion phrase is found in any message, OR
-    2. Maximum turns reached (backup)
+    1. The completion phrase is found in any assistant message, OR
+    2. Maximum turns reached (backup), OR
+    3. The token budget, wall-clock deadline or stagnation limit is hit
+    """
+    return TerminationTracker(
+        completion_phrase=COMPLETION_PHRASE,
+        max_turns=MAX_TURNS,
+        token_budget=MAX_CONVERSATION_TOKENS,
+        deadline_seconds=MAX_RUN_SECONDS,
+        stagnation_turns=STAGNATION_TURNS,
+        manager_name=MANAGER_DISPLAY_NAME,
+    )
+
+
+@uses_framework
+def create_chat_clients(
+    client_factory: AgentClientFactory | None,
+    response_store: ResponseStore | None,
+    replay_only: bool,
+    agent_ids: dict[str, str] | None = None,
+    keep_agents: bool = False,
+) -> tuple:
+    """Create the manager, analyst and reviewer chat clients.
+
+    Each agent gets its own AzureAIAgentClient (required for proper routing in
+    group chat with Azure AI Agents), all on the factory's shared connection
+    and token, wrapped with the response cache when LLM_CACHE_MODE is set.
+    `agent_ids` reattaches clients to existing agents (a resumed run);
+    `keep_agents` stops the clients from deleting their agents on close.
     """
-    # Check for completion phrase
-    for msg in messages:
-        if msg.role == Role.ASSISTANT and msg.text:
-            if COMPLETION_PHRASE.lower() in msg.text.lower():
-                return True
+    if replay_only:
+        return tuple(wrap_chat_client(ReplayOnlyChatClient(), response_store) for _ in AGENT_NAMES)
+    agent_ids = agent_ids or {}
+    return tuple(
+        wrap_chat_client(
+            client_factory.create(agent_id=agent_ids.get(name), should_cleanup_agent=not keep_agents),
+            response_store,
+        )
+        for name in AGENT_NAMES
+    )
+
+
+async def delete_agents(clients: tuple) -> None:
+    """Delete the remote agents the clients are attached to (agents kept for a resume)."""
+    for client in clients:
+        agent_id = getattr(client, "agent_id", None)
+        if agent_id:
+            try:
+                await client.agents_client.delete_agent(agent_id)
+            except Exception as e:
+                print_status(f"  Could not delete agent {agent_id}: {e}")
+
+
+async def discard_checkpoints(checkpoints: CheckpointStore, agents_client) -> None:
+    """Remove the checkpoints of unfinished runs and delete the agents kept for them.
+
+    A new run replaces them; without this a failed run that is never
+    resumed would leave its agents in the project with nothing tracking them.
+    The vector store and files stay: the doc upload cache reuses them.
+    Without an agents client the checkpoints are kept, since their agents
+    could not be deleted.
+    """
+    if agents_client is None:
+        return
+    for stale in checkpoints.all():
+        for name, agent_id in stale.agent_ids.items():
+            try:
+                await agents_client.delete_agent(agent_id)
+            except Exception as e:
+                print_status(f"  Could not delete {name} {agent_id}: {e}")
+        checkpoints.remove(stale.run_id)
+        print_status(f"Discarded unfinished run {stale.run_id} ({stale.turns} turns) and its agents")
+
+
+@uses_framework
+def create_doc_search_tools(
+    vector_store_id: str | None, doc_index: LocalDocIndex | None, fact_store: FactStore | None = None
+) -> list:
+    """Doc tools for the Reviewer: the local BM25 index or hosted File Search, plus exact fact lookup."""
+    fact_tools = build_fact_tools(fact_store) if fact_store is not None else []
+    if doc_index is not None:
+        return build_search_tools(doc_index) + fact_tools
+    return [
+        HostedFileSearchTool(
+            inputs=[HostedVectorStoreContent(vector_store_id=vector_store_id)] if vector_store_id else None
+        ),
+        *fact_tools,
+    ]
+
+
+@uses_framework
+def create_scheduler() -> RateLimitScheduler:
+    """Create the process-wide scheduler for the model deployment's quota."""
+    return RateLimitScheduler(MODEL_REQUESTS_PER_MINUTE, MODEL_TOKENS_PER_MINUTE)
+
+
+def format_scheduler_metrics(scheduler: RateLimitScheduler) -> str:
+    """One-line summary of the scheduler's queue and throttling metrics."""
+    m = scheduler.metrics()
+    return (
+        f"Rate limiter: {m['requests']} model calls, {m['throttled']} throttled (429), "
+        f"max queue depth {m['max_queue_depth']}, wait avg {m['avg_wait_seconds']:.2f}s / "
+        f"max {m['max_wait_seconds']:.2f}s"
+    )
+
+
+@uses_framework
+def create_compactor() -> ConversationCompactor | None:
+    """Create the per-conversation history compactor (None when disabled)."""
+    if not CONTEXT_COMPACTION:
+        return None
+    return ConversationCompactor(CONTEXT_TOKEN_BUDGETS, recent_messages=CONTEXT_RECENT_MESSAGES)
+
+
+@uses_framework
+def build_workflow(
+    manager_agent: ChatAgent,
+    participants: list[ChatAgent],
+    termination: TerminationTracker,
+    renderer: StreamRenderer,
+    compactor: ConversationCompactor | None = None,
+    turn_tracer: TurnTracer | None = None,
+    checkpointer: Checkpointer | None = None,
+):
+    """Build the group chat workflow for one conversation (workflows are single-use).
+
+    With ORCHESTRATION_MODE "fanout" this is a FanOutGroupChat, which streams
+    the same events from run_stream(task). A checkpointer saves every turn
+    through the termination condition and restores the speaker state of a
+    resumed run.
+    """
+    if compactor is not None:
+        participants = [CompactingAgent(agent, compactor) for agent in participants]
+    condition = termination if checkpointer is None else checkpointer.watch(termination)
+
+    async def synthesize(transcript: str) -> str:
+        """Stream the Manager Agent's final recommendation."""
+        parts = []
+        async for update in manager_agent.run_stream(transcript):
+            renderer.feed(MANAGER_DISPLAY_NAME, update.text)
+            if turn_tracer is not None:
+                turn_tracer.observe(MANAGER_DISPLAY_NAME, update)
+            parts.append(update.text)
+        return "".join(parts)
+
+    if ORCHESTRATION_MODE == "fanout":
+        def on_dispatch(agents: list[str]) -> None:
+            renderer.dispatch(agents)
+            if turn_tracer is not None:
+                turn_tracer.dispatch(agents)
+
+        def on_complete(agent: str) -> None:
+            renderer.complete(agent)
+            if turn_tracer is not None:
+                turn_tracer.complete(agent)
+
+        by_name = {agent.name: agent for agent in participants}
+        chat = FanOutGroupChat(
+            [by_name[name] for name in SPEAKER_ROTATION],
+            max_rounds=MAX_ROUNDS,
+            termination=condition,
+            rules=ROUTING_RULES,
+            synthesize=synthesize,
+            manager_name=MANAGER_DISPLAY_NAME,
+            on_dispatch=on_dispatch,
+            on_complete=on_complete,
+        )
+        if checkpointer is not None:
+            checkpointer.track(chat)
+        return chat
+
+    builder = GroupChatBuilder()
+    if MANAGER_MODE == "llm":
+        builder.set_manager(manager_agent, display_name=MANAGER_DISPLAY_NAME)
+    else:
+        selector = RuleBasedSpeakerSelector(
+            SPEAKER_ROTATION,
+            max_rounds=MAX_ROUNDS,
+            rules=ROUTING_RULES,
+            synthesize=synthesize,
+            # An early stop (token budget, deadline, ...) still gets a synthesis
+            should_stop=lambda: termination.reason is not None,
+        )
+        builder.set_select_speakers_func(
+            selector,
+            display_name=MANAGER_DISPLAY_NAME,
+            final_message=selector.final_message,
+        )
+        if checkpointer is not None:
+            checkpointer.track(selector)
+
+    return (
+        builder
+        .participants(participants)
+        .with_termination_condition(condition)
+        .build()
+    )
+
+
+def write_trace(tracer: Tracer) -> Path | None:
+    """Export the run's spans to TRACE_DIR (None when trace export is disabled)."""
+    if TRACE_DIR is None:
+        return None
+    return tracer.export_jsonl(TRACE_DIR / f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{tracer.trace_id[:8]}.jsonl")
+
+
+def run_settings() -> dict[str, str]:
+    """Settings a checkpointed run has to be resumed with."""
+    return {
+        "manager_mode": MANAGER_MODE,
+        "orchestration_mode": ORCHESTRATION_MODE,
+        "doc_search_backend": DOC_SEARCH_BACKEND,
+    }
+
+
+def configuration_errors() -> list[str]:
+    """Problems with the settings, environment or data files that would stop a run."""
+    errors = []
+    if LLM_CACHE_MODE not in LLM_CACHE_MODES:
+        errors.append(f"Unknown LLM_CACHE_MODE '{LLM_CACHE_MODE}' (use {', '.join(LLM_CACHE_MODES)})")
+    if MANAGER_MODE not in ("rules", "llm"):
+        errors.append(f"Unknown MANAGER_MODE '{MANAGER_MODE}' (use 'rules' or 'llm')")
+    if ORCHESTRATION_MODE not in ("sequential", "fanout"):
+        errors.append(f"Unknown ORCHESTRATION_MODE '{ORCHESTRATION_MODE}' (use 'sequential' or 'fanout')")
+    elif ORCHESTRATION_MODE == "fanout" and MANAGER_MODE != "rules":
+        errors.append("ORCHESTRATION_MODE 'fanout' needs MANAGER_MODE 'rules' (the rule-based manager dispatches the rounds)")
+    if DOC_SEARCH_BACKEND not in ("hosted", "local"):
+        errors.append(f"Unknown DOC_SEARCH_BACKEND '{DOC_SEARCH_BACKEND}' (use 'hosted' or 'local')")
+
+    # Replay mode never talks to Azure, so no endpoint is needed
+    if not os.environ.get("AZURE_AI_PROJECT_ENDPOINT") and LLM_CACHE_MODE != "replay":
+        errors.append("AZURE_AI_PROJECT_ENDPOINT environment variable not set!")
 
-    # Backup: max turns reached
-    return count_assistant_messages(messages) >= MAX_TURNS
+    if not CSV_FILE.exists():
+        errors.append(f"Data file not found: {CSV_FILE}")
+    for doc_file in DOC_FILES:
+        if not doc_file.exists():
+            errors.append(f"Documentation file not found: {doc_file}")
+    return errors
 
 
-async def main():
-    """Main function to run the capacity planning demo."""
+def print_configuration_errors(errors: list[str]) -> None:
+    for error in errors:
+        print_error(error)
+    if any("AZURE_AI_PROJECT_ENDPOINT" in error for error in errors):
+        print("Please set it to your Azure AI Foundry project endpoint.")
+        print("Example: export AZURE_AI_PROJECT_ENDPOINT='https://your-project.services.ai.azure.com/api/projects/your-project-id'")
+
+
+def preflight() -> bool:
+    """Validate settings, files and the demand CSV without the framework or the network."""
+    started = time.perf_counter()
+    print(f"{Colors.BOLD}🔎 Preflight{Colors.END}")
+
+    errors = configuration_errors()
+    print_configuration_errors(errors)
+    if not errors:
+        endpoint = os.environ.get("AZURE_AI_PROJECT_ENDPOINT") or "(replay: not needed)"
+        model_deployment = os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini")
+        print_success(f"Endpoint: {endpoint}")
+        print_success(
+            f"Deployment: {model_deployment}, MANAGER_MODE={MANAGER_MODE}, ORCHESTRATION_MODE={ORCHESTRATION_MODE}, "
+            f"DOC_SEARCH_BACKEND={DOC_SEARCH_BACKEND}, LLM_CACHE_MODE={LLM_CACHE_MODE}"
+        )
+        print_success(f"Data and {len(DOC_FILES)} documentation files found")
+
+    if CSV_FILE.exists():
+        report = validate_demand_csv(CSV_FILE)
+        if report.ok:
+            print_success(
+                f"{CSV_FILE.name}: {report.rows} rows, {len(report.routes)} routes, "
+                f"{report.first_date} to {report.last_date}"
+            )
+        else:
+            errors += report.errors
+            for error in report.errors:
+                print_error(f"{CSV_FILE.name}: {error}")
+
+    checks_seconds = time.perf_counter() - started
+    print(
+        f"{Colors.CYAN}Startup: imports {IMPORT_SECONDS * 1000:.0f} ms, "
+        f"checks {checks_seconds * 1000:.0f} ms (Agent Framework not loaded){Colors.END}"
+    )
+    return not errors
+
+
+async def main(resume: bool = False):
+    """Main function to run the capacity planning demo (resuming the last checkpoint if asked)."""
 
     print_header()
     print_task(USER_TASK)
 
-    # Check environment variables
     project_endpoint = os.environ.get("AZURE_AI_PROJECT_ENDPOINT")
     model_deployment = os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini")
+    replay_only = LLM_CACHE_MODE == "replay"
 
-    if not project_endpoint:
-        print_error("AZURE_AI_PROJECT_ENDPOINT environment variable not set!")
-        print("Please set it to your Azure AI Foundry project endpoint.")
-        print("Example: export AZURE_AI_PROJECT_ENDPOINT='https://your-project.services.ai.azure.com/api/projects/your-project-id'")
+    # Check settings, environment variables and data files before the slow imports
+    errors = configuration_errors()
+    if errors:
+        print_configuration_errors(errors)
         return
 
-    # Verify data files exist
-    if not CSV_FILE.exists():
-        print_error(f"Data file not found: {CSV_FILE}")
-        return
-
-    for doc_file in DOC_FILES:
-        if not doc_file.exists():
-            print_error(f"Documentation file not found: {doc_file}")
-            return
-
     print_success("All data files found")
-    print_status("Connecting to Azure AI Foundry...")
 
-    # Create Azure credential
-    credential = AzureCliCredential()
+    print_status("Loading Agent Framework...")
+    print_success(f"Agent Framework loaded ({load_framework():.1f}s)")
+
+    checkpoints = CheckpointStore(CHECKPOINT_DIR) if CHECKPOINT_DIR is not None else None
+    resumed = None
+    if resume:
+        resumed = checkpoints.latest() if checkpoints is not None else None
+        if resumed is None:
+            print_error("No checkpoint to resume from")
+            return
+        changed = [
+            f"{key.upper()}={value} (checkpoint: {resumed.settings.get(key)})"
+            for key, value in run_settings().items() if resumed.settings.get(key) != value
+        ]
+        if changed:
+            print_error(f"Run {resumed.run_id} was checkpointed with other settings: {', '.join(changed)}")
+            return
+        print_success(f"Resuming run {resumed.run_id} after {resumed.turns} turns")
+
+    tracer = Tracer()
+
+    # Load the demand data and fleet figures once; the Analyst queries them through local tools
+    with tracer.span("data.load", csv=CSV_FILE.name):
+        demand_data = load_demand_data(CSV_FILE, DEMAND_STORE_DIR)
+        capacity_optimizer = CapacityOptimizer(load_fleet_config(DOCS_DIR))
+        forecaster = load_forecaster(demand_data, load_peak_calendar(DOCS_DIR), FORECAST_STATE_DIR)
+        demand_tools = (
+            build_demand_tools(demand_data)
+            + build_forecast_tools(forecaster)
+            + build_capacity_tools(demand_data, capacity_optimizer)
+        )
+
+    # The local doc index is opened up front; it needs no network access
+    doc_index = None
+    if DOC_SEARCH_BACKEND == "local":
+        with tracer.span("doc_index.open"):
+            doc_index = LocalDocIndex.open(LOCAL_INDEX_DIR, DOC_FILES)
+        print_success(f"Local doc index ready ({len(doc_index.chunks)} sections)")
+
+    with tracer.span("facts.open"):
+        fact_store = FactStore.open(FACT_STORE_DIR, DOC_FILES)
+
+    response_store = ResponseStore(LLM_CACHE_DIR) if LLM_CACHE_MODE != "off" else None
+
+    if replay_only:
+        print_status("Replaying recorded responses (offline)...")
+        credential = None
+        client_factory = None
+        scheduler = None
+    else:
+        print_status("Connecting to Azure AI Foundry...")
+        # Create Azure credential; all agents share one connection pool, one cached token
+        # and one rate-limit scheduler
+        credential = AzureCliCredential()
+        scheduler = create_scheduler()
+        client_factory = AgentClientFactory(credential, project_endpoint, model_deployment, scheduler=scheduler)
 
     # Track resources for cleanup
     uploaded_file_ids = []
     vector_store_id = None
+    checkpointer = None
+    workflow_span = turn_tracer = trace_file = None
 
     try:
-        # Create separate AzureAIAgentClient instances for each agent
-        # (Required for proper routing in group chat with Azure AI Agents)
-        manager_client = AzureAIAgentClient(credential=credential)
-        analyst_client = AzureAIAgentClient(credential=credential)
-        reviewer_client = AzureAIAgentClient(credential=credential)
+        # Create separate client instances for each agent; while checkpointing,
+        # agents outlive a failed run so it can be resumed on them
+        keep_agents = checkpoints is not None and not replay_only
+        clients = create_chat_clients(
+            client_factory, response_store, replay_only,
+            agent_ids=resumed.agent_ids if resumed else None, keep_agents=keep_agents,
+        )
+        manager_client, analyst_client, reviewer_client = clients
 
         async with manager_client, analyst_client, reviewer_client:
-            print_success("Connected to Azure AI Foundry")
+            if not replay_only:
+                print_success("Connected to Azure AI Foundry")
+                if checkpoints is not None and resumed is None:
+                    await discard_checkpoints(checkpoints, manager_client.agents_client)
 
             # =================================================================
-            # STEP 1: Upload docs and create vector store for File Search
+            # STEP 1: Upload changed docs and reuse cached vector store
             # =================================================================
-            print_status("Uploading documentation files for File Search...")
-
-            doc_file_ids = []
-            for doc_file in DOC_FILES:
-                print_status(f"  Uploading: {doc_file.name}")
-                uploaded_doc = await reviewer_client.agents_client.files.upload_and_poll(
-                    file_path=str(doc_file),
-                    purpose="assistants"
-                )
-                doc_file_ids.append(uploaded_doc.id)
-                uploaded_file_ids.append(uploaded_doc.id)
-
-            # Create vector store with the documentation files
-            print_status("Creating vector store...")
-            vector_store = await reviewer_client.agents_client.vector_stores.create_and_poll(
-                file_ids=doc_file_ids,
-                name="zava-logistics-docs"
-            )
-            vector_store_id = vector_store.id
-            print_success(f"Vector store created (ID: {vector_store_id})")
+            doc_cache = DocUploadCache(DOC_MANIFEST_FILE, project_endpoint)
+            if resumed is not None and resumed.vector_store_id:
+                uploaded_file_ids = list(resumed.file_ids)
+                vector_store_id = resumed.vector_store_id
+                print_success(f"Vector store reused from checkpoint (ID: {vector_store_id})")
+            elif DOC_SEARCH_BACKEND == "hosted" and not replay_only:
+                print_status("Syncing documentation files for File Search...")
+
+                # Only new or changed docs are uploaded; cached IDs are verified first
+                with tracer.activate(), tracer.span("docs.sync"):
+                    doc_sync = await doc_cache.sync(
+                        reviewer_client.agents_client,
+                        DOC_FILES,
+                        VECTOR_STORE_NAME,
+                        on_status=print_status,
+                    )
+                uploaded_file_ids = doc_sync.file_ids
+                vector_store_id = doc_sync.vector_store_id
+                if doc_sync.vector_store_created:
+                    print_success(f"Vector store created (ID: {vector_store_id})")
+                else:
+                    print_success(
+                        f"Vector store reused (ID: {vector_store_id}, "
+                        f"{len(doc_sync.reused)} cached / {len(doc_sync.uploaded)} uploaded)"
+                    )
 
             # =================================================================
-            # STEP 3: Create the File Search tool for Reviewer
+            # STEP 3: Create the doc search tool for Reviewer
             # =================================================================
-            file_search_tool = HostedFileSearchTool(
-                inputs=[HostedVectorStoreContent(vector_store_id=vector_store_id)]
-            )
+            doc_search_tools = create_doc_search_tools(vector_store_id, doc_index, fact_store)
 
             # =================================================================
             # STEP 4: Create Agents (each with own client instance)
             # =================================================================
-            # Create the Manager Agent (no tools)
+            # Create the Manager Agent (no tools); with rule-based selection it
+            # only writes the final recommendation
+            # The remote agents are created on each client's first run
+            for client, name in zip(clients, AGENT_NAMES):
+                instrument_agent_creation(tracer, client, name)
+
             print_status("Creating Manager Agent...")
             manager_agent = ChatAgent(
                 chat_client=manager_client,
                 name="ManagerAgent",
-                instructions=MANAGER_INSTRUCTIONS,
+                instructions=MANAGER_INSTRUCTIONS if MANAGER_MODE == "llm" else SYNTHESIS_INSTRUCTIONS,
             )
             print_success("Manager Agent created")
 
-            # Create the Analyst Agent (with embedded data)
-            print_status("Creating Analyst Agent...")
+            # Create the Analyst Agent (with local demand analytics tools)
+            print_status("Creating Analyst Agent with demand analytics tools...")
             analyst_agent = ChatAgent(
                 chat_client=analyst_client,
                 name="AnalystAgent",
                 instructions=ANALYST_INSTRUCTIONS,
+                tools=demand_tools,
             )
-            print_success("Analyst Agent created")
+            print_success("Analyst Agent created with demand analytics tools")
 
             # Create the Reviewer Agent (with File Search)
             print_status("Creating Reviewer Agent with File Search...")
@@ -403,7 +918,7 @@ async def main():
                 chat_client=reviewer_client,
                 name="ReviewerAgent",
                 instructions=REVIEWER_INSTRUCTIONS,
-                tools=file_search_tool,
+                tools=doc_search_tools,
             )
             print_success("Reviewer Agent created with File Search")
 
@@ -412,12 +927,27 @@ async def main():
             # =================================================================
             print_status("Building Group Chat workflow...")
 
-            workflow = (
-                GroupChatBuilder()
-                .set_manager(manager_agent, display_name="Manager")
-                .participants([analyst_agent, reviewer_agent])
-                .with_termination_condition(should_terminate)
-                .build()
+            termination = create_termination_condition()
+
+            # Deltas are printed as they arrive; manager JSON fields render as they complete
+            renderer = StreamRenderer(print_agent_header, format_manager_field, is_manager_agent)
+
+            compactor = create_compactor()
+
+            if checkpoints is not None:
+                checkpoint = resumed or RunCheckpoint.new(
+                    USER_TASK, run_settings(), vector_store_id=vector_store_id, file_ids=list(uploaded_file_ids)
+                )
+                checkpointer = Checkpointer(checkpoints, checkpoint, dict(zip(AGENT_NAMES, clients)))
+
+            workflow_span = tracer.start(
+                "workflow", parent=tracer.root, manager_mode=MANAGER_MODE, orchestration_mode=ORCHESTRATION_MODE
+            )
+            turn_tracer = TurnTracer(tracer, parent=workflow_span)
+
+            workflow = build_workflow(
+                manager_agent, [analyst_agent, reviewer_agent], termination, renderer, compactor, turn_tracer,
+                checkpointer,
             )
 
             print_success("Group Chat workflow ready")
@@ -429,35 +959,15 @@ async def main():
             # STEP 6: Run the Workflow
             # =================================================================
 
-            current_agent = None
-            current_message = ""
-            turn_count = 0
-
-            async for event in workflow.run_stream(USER_TASK):
+            # A resumed run continues the checkpointed conversation
+            async for event in workflow.run_stream(resumed.conversation() if resumed else USER_TASK):
                 if isinstance(event, AgentRunUpdateEvent):
-                    # Get the agent identifier
-                    agent_id = event.executor_id or "Unknown"
-
-                    # Check if we're starting a new agent's turn
-                    if agent_id != current_agent:
-                        # Print the previous agent's complete message
-                        if current_agent and current_message.strip():
-                            print_agent_message(current_agent, current_message.strip())
-                            turn_count += 1
-
-                        # Start collecting the new agent's message
-                        current_agent = agent_id
-                        current_message = ""
-
-                    # Accumulate the message content
-                    text = extract_text_from_event(event.data)
-                    if text:
-                        current_message += text
+                    renderer.feed(event.executor_id or "Unknown", extract_text_from_event(event.data))
+                    turn_tracer.observe(event.executor_id or "Unknown", event.data)
 
                 elif isinstance(event, WorkflowOutputEvent):
-                    # Print any remaining message
-                    if current_agent and current_message.strip():
-                        print_agent_message(current_agent, current_message.strip())
+                    # Close the last agent's turn
+                    renderer.finish()
 
                     # Workflow completed
                     print_separator()
@@ -468,20 +978,82 @@ async def main():
                     final_messages = cast(list[ChatMessage], event.data)
                     print(f"\n{Colors.CYAN}Total conversation turns: {len([m for m in final_messages if m.role == Role.ASSISTANT])}{Colors.END}")
 
+            if checkpointer is not None:
+                checkpointer.complete()
+                if keep_agents:
+                    # The run is over: remove its agents, as the clients would have on close
+                    await delete_agents(clients)
+
+            turn_tracer.finish()
+            workflow_span.end_ns = time.perf_counter_ns()
+            workflow_span.set(stop_reason=termination.reason)
+            tracer.close()
+
+            if termination.reason not in (None, "completion"):
+                print(f"{Colors.YELLOW}Conversation stopped early: {termination.reason} limit reached{Colors.END}")
+
+            ttfts = [t.time_to_first_token for t in renderer.turns if t.time_to_first_token is not None]
+            if ttfts:
+                print(
+                    f"{Colors.CYAN}Time to first token: avg {sum(ttfts) / len(ttfts):.2f}s, "
+                    f"max {max(ttfts):.2f}s over {len(ttfts)} turns{Colors.END}"
+                )
+
+            if isinstance(workflow, FanOutGroupChat) and workflow.waves:
+                waves = workflow.waves
+                turn_seconds = sum(w.turn_seconds for w in waves)
+                print(
+                    f"{Colors.CYAN}Fan-out: {sum(len(w.agents) for w in waves)} turns in {len(waves)} waves took "
+                    f"{sum(w.wall_seconds for w in waves):.2f}s ({turn_seconds:.2f}s back to back, "
+                    f"{sum(w.saved_seconds for w in waves):.2f}s saved){Colors.END}"
+                )
+
+            if compactor is not None:
+                sizes = [turn for turns in compactor.turns.values() for turn in turns]
+                if sizes:
+                    print(
+                        f"{Colors.CYAN}Participant prompts: max {max(c for _, c in sizes):,} tokens "
+                        f"(full history would be up to {max(f for f, _ in sizes):,}){Colors.END}"
+                    )
+
+            print(f"\n{Colors.BOLD}⏱  Where the time went{Colors.END}")
+            print(format_summary(tracer))
+            trace_file = write_trace(tracer)
+            if trace_file is not None:
+                print_status(f"Trace written to {trace_file}")
+
             print_success("Workflow completed successfully")
 
+            if scheduler is not None:
+                print_status(format_scheduler_metrics(scheduler))
+
+            if response_store is not None:
+                hits = sum(c.hits for c in (manager_client, analyst_client, reviewer_client))
+                misses = sum(c.misses for c in (manager_client, analyst_client, reviewer_client))
+                print_status(f"LLM response cache: {hits} hits, {misses} misses")
+
+            if replay_only:
+                print_success("Replay finished offline - no Azure resources were created")
+                return
+
             # =================================================================
             # STEP 7: Optional Cleanup
             # =================================================================
+            if keep_agents and not vector_store_id:
+                # The run's agents were deleted when it completed; nothing else was created
+                return
+
             print()
             print(f"{Colors.YELLOW}{'─' * 64}{Colors.END}")
             print(f"{Colors.BOLD}🧹 Resource Cleanup{Colors.END}")
             print(f"{Colors.YELLOW}{'─' * 64}{Colors.END}")
             print()
             print("The following resources were created in Azure AI Foundry:")
-            print(f"  • 3 Agents: ManagerAgent, AnalystAgent, ReviewerAgent")
-            print(f"  • 1 Vector Store: {vector_store_id}")
-            print(f"  • {len(uploaded_file_ids)} Files (documentation)")
+            if not keep_agents:
+                print(f"  • 3 Agents: ManagerAgent, AnalystAgent, ReviewerAgent")
+            if vector_store_id:
+                print(f"  • 1 Vector Store: {vector_store_id}")
+                print(f"  • {len(uploaded_file_ids)} Files (documentation)")
             print()
 
             cleanup_input = input(f"{Colors.CYAN}Do you want to delete these resources? (y/n): {Colors.END}").strip().lower()
@@ -490,24 +1062,25 @@ async def main():
                 print()
                 print_status("Cleaning up resources...")
 
-                # Delete agents
-                try:
-                    await manager_client.agents_client.delete_agent(manager_agent.id)
-                    print_status(f"  Deleted agent: ManagerAgent")
-                except Exception as e:
-                    print_status(f"  Could not delete ManagerAgent: {e}")
-
-                try:
-                    await analyst_client.agents_client.delete_agent(analyst_agent.id)
-                    print_status(f"  Deleted agent: AnalystAgent")
-                except Exception as e:
-                    print_status(f"  Could not delete AnalystAgent: {e}")
-
-                try:
-                    await reviewer_client.agents_client.delete_agent(reviewer_agent.id)
-                    print_status(f"  Deleted agent: ReviewerAgent")
-                except Exception as e:
-                    print_status(f"  Could not delete ReviewerAgent: {e}")
+                # Delete agents (unless the completed run already did)
+                if not keep_agents:
+                    try:
+                        await manager_client.agents_client.delete_agent(manager_agent.id)
+                        print_status(f"  Deleted agent: ManagerAgent")
+                    except Exception as e:
+                        print_status(f"  Could not delete ManagerAgent: {e}")
+
+                    try:
+                        await analyst_client.agents_client.delete_agent(analyst_agent.id)
+                        print_status(f"  Deleted agent: AnalystAgent")
+                    except Exception as e:
+                        print_status(f"  Could not delete AnalystAgent: {e}")
+
+                    try:
+                        await reviewer_client.agents_client.delete_agent(reviewer_agent.id)
+                        print_status(f"  Deleted agent: ReviewerAgent")
+                    except Exception as e:
+                        print_status(f"  Could not delete ReviewerAgent: {e}")
 
                 # Delete vector store
                 if vector_store_id:
@@ -525,6 +1098,10 @@ async def main():
                     except Exception as e:
                         print_status(f"  Could not delete file {file_id}: {e}")
 
+                # Deleted resources must not be reused from the local cache
+                if vector_store_id:
+                    doc_cache.forget(vector_store_id=vector_store_id, file_ids=uploaded_file_ids)
+
                 print_success("Cleanup completed")
             else:
                 print()
@@ -533,10 +1110,32 @@ async def main():
 
     except Exception as e:
         print_error(f"An error occurred: {str(e)}")
+        if workflow_span is not None and workflow_span.end_ns is None:
+            turn_tracer.finish()
+            workflow_span.end_ns = time.perf_counter_ns()
+            workflow_span.error = f"{type(e).__name__}: {e}"
+            workflow_span.set(stop_reason="error")
+        if trace_file is None:
+            # A failed run's trace is the one most worth reading
+            tracer.root.error = f"{type(e).__name__}: {e}"
+            tracer.close()
+            trace_file = write_trace(tracer)
+            if trace_file is not None:
+                print_status(f"Trace written to {trace_file}")
+        if checkpointer is not None and checkpointer.checkpoint.messages:
+            # Record the agents created during the failed turn, so the resume reuses them too
+            checkpointer.save()
+            print_status(
+                f"Run {checkpointer.checkpoint.run_id} checkpointed after {checkpointer.checkpoint.turns} turns; "
+                f"continue it with: python main.py --resume"
+            )
         raise
 
     finally:
-        await credential.close()
+        if client_factory is not None:
+            await client_factory.close()
+        if credential is not None:
+            await credential.close()
 
 
 # =============================================================================
@@ -544,5 +1143,23 @@ async def main():
 # =============================================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zava Logistics capacity planning demo.")
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Validate settings, files and the demand CSV, print startup timing and exit (no network).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last checkpointed run, reusing its agents and vector store.",
+    )
+    args = parser.parse_args()
+    if args.preflight:
+        sys.exit(0 if preflight() else 1)
+
+    # Imported here rather than at the top: asyncio alone is over half the preflight's import time
+    import asyncio
+
     print(f"\n{Colors.BOLD}Starting Zava Logistics Capacity Planning Demo...{Colors.END}\n")
-    asyncio.run(main())
+    asyncio.run(main(resume=args.resume))
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Zava Logistics - Planning Server
+================================
+
+Long-running service mode: the setup that main.py repeats on every run
+(credential, the three chat clients, doc sync and vector store, demand data,
+forecaster and agents) is done once at startup and kept warm. Each planning
+request then only builds its group chat workflow (workflows are single-use)
+and pays for model time.
+
+Endpoints (HTTP on a TCP port or a Unix socket):
+  POST /plan    run one planning task; the agents' output streams back as
+                server-sent events while the workflow runs
+  GET  /health  readiness, active/served request counts and rate-limiter metrics
+
+Request body (JSON, every field optional; the fields of a sweep scenario):
+  {"id": "feb-west", "task": "...", "start_date": "2026-02-01", "end_date": "2026-02-14",
+   "routes": ["LAX-JFK"], "cities": ["Seattle"], "demand_multiplier": 1.2}
+A request without filters uses the warm Analyst Agent over the full demand
+data; one with filters gets an Analyst over its slice, as in the sweep.
+
+Events on the /plan stream:
+  start   {"id", "task"}                 the workflow has been admitted
+  delta   {"agent", "text"}              streamed text of one agent (interleaved in fan-out mode)
+  done    {"id", "turns", "stop_reason", "recommendation", "messages",
+           "first_token_seconds", "latency_seconds"}
+  error   {"id", "error"}
+
+Requests run as concurrent workflows on the shared clients, up to
+--max-concurrent at a time (the rest wait their turn); the first one runs
+alone so the Azure agents are created once. All of them share the process's
+rate-limit scheduler at interactive priority.
+
+Usage:
+  python planning_server.py --port 8080
+  python planning_server.py --unix /tmp/zava-planning.sock
+  curl -N -X POST localhost:8080/plan -d '{"routes": ["LAX-JFK"]}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from aiohttp import web
+from agent_framework import AgentRunUpdateEvent, ChatAgent, Role, WorkflowOutputEvent
+
+import main as app
+from capacity_optimizer import CapacityOptimizer, load_fleet_config
+from demand_analytics import load_demand_data
+from demand_forecast import load_peak_calendar
+from doc_cache import DocUploadCache
+from fact_store import FactStore
+from local_retrieval import LocalDocIndex
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseStore
+from scenario_sweep import Scenario, build_analyst_agent
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_CONCURRENT = 8
+
+
+def sse_event(event: str, data: dict) -> bytes:
+    """One server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+class PlanningServer:
+    """Runs planning requests as concurrent workflows on warm, shared clients and agents."""
+
+    def __init__(
+        self,
+        manager_client,
+        analyst_client,
+        reviewer_client,
+        doc_search_tools,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        scheduler: RateLimitScheduler | None = None,
+    ):
+        self.analyst_client = analyst_client
+        self.capacity_optimizer = CapacityOptimizer(load_fleet_config(app.DOCS_DIR))
+        self.peak_calendar = load_peak_calendar(app.DOCS_DIR)
+        self.manager_agent = ChatAgent(
+            chat_client=manager_client,
+            name="ManagerAgent",
+            instructions=app.MANAGER_INSTRUCTIONS if app.MANAGER_MODE == "llm" else app.SYNTHESIS_INSTRUCTIONS,
+        )
+        self.reviewer_agent = ChatAgent(
+            chat_client=reviewer_client,
+            name="ReviewerAgent",
+            instructions=app.REVIEWER_INSTRUCTIONS,
+            tools=doc_search_tools,
+        )
+        self.analyst_agent = build_analyst_agent(
+            analyst_client,
+            load_demand_data(app.CSV_FILE, app.DEMAND_STORE_DIR),
+            self.capacity_optimizer,
+            self.peak_calendar,
+            app.FORECAST_STATE_DIR,
+        )
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.served = 0
+        self.failed = 0
+        self.warm = False
+        self.scheduler = scheduler
+        self._slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._warming = asyncio.Lock()
+
+    def app(self) -> web.Application:
+        application = web.Application()
+        application.add_routes([web.post("/plan", self.handle_plan), web.get("/health", self.handle_health)])
+        return application
+
+    # -------------------------------------------------------------------------
+    # Handlers
+    # -------------------------------------------------------------------------
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "warm": self.warm,
+            "active": self.active,
+            "served": self.served,
+            "failed": self.failed,
+            "max_concurrent": self.max_concurrent,
+            "rate_limiter": self.scheduler.metrics() if self.scheduler is not None else None,
+        })
+
+    async def handle_plan(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = await request.json() if request.can_read_body else {}
+            scenario = self.parse_request(body)
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        async with self._slots:
+            if not self.warm:
+                # The first workflow creates the remote agents; the others wait for it
+                async with self._warming:
+                    if not self.warm:
+                        await self.run_plan(scenario, response)
+                        return response
+            await self.run_plan(scenario, response)
+        return response
+
+    @staticmethod
+    def parse_request(body) -> Scenario:
+        """The request's validated scenario; the demand CSV is the server's, not the caller's."""
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        if "csv" in body:
+            raise ValueError("'csv' cannot be set per request")
+        return Scenario.from_dict({**body, "id": body.get("id") or uuid.uuid4().hex[:8]}, app.SCRIPT_DIR)
+
+    # -------------------------------------------------------------------------
+    # Workflow
+    # -------------------------------------------------------------------------
+
+    async def run_plan(self, scenario: Scenario, response: web.StreamResponse) -> None:
+        """Run one group chat, writing its output to the response as server-sent events."""
+        started = time.perf_counter()
+        self.active += 1
+        events = _EventStream()
+        producer = None
+        try:
+            analyst_agent = self.analyst_agent
+            task = scenario.task.strip()
+            if not scenario.full_dataset:
+                analyst_agent = build_analyst_agent(
+                    self.analyst_client, scenario.load_data(), self.capacity_optimizer, self.peak_calendar
+                )
+                task = f"{task}\n\n{scenario.describe()}"
+
+            termination = app.create_termination_condition()
+            workflow = app.build_workflow(
+                self.manager_agent,
+                [analyst_agent, self.reviewer_agent],
+                termination,
+                events,
+                app.create_compactor(),
+            )
+
+            await response.write(sse_event("start", {"id": scenario.id, "task": task}))
+            producer = asyncio.create_task(events.run(workflow, task))
+            while (item := await events.queue.get()) is not None:
+                name, data = item
+                if name == "done":
+                    data.update(
+                        id=scenario.id,
+                        stop_reason=termination.reason,
+                        first_token_seconds=_round(events.first_token, started),
+                        latency_seconds=_round(time.perf_counter(), started),
+                    )
+                    app.print_success(f"{scenario.id}: {data['latency_seconds']:.1f}s, {data['turns']} turns")
+                elif name == "error":
+                    data["id"] = scenario.id
+                    app.print_error(f"{scenario.id}: {data['error']}")
+                await response.write(sse_event(name, data))
+            await producer
+            if events.failed:
+                self.failed += 1
+            else:
+                self.served += 1
+                self.warm = True
+        except ConnectionResetError:
+            # The client went away: stop its workflow
+            self.failed += 1
+            app.print_status(f"{scenario.id}: client disconnected")
+        except Exception as e:
+            self.failed += 1
+            app.print_error(f"{scenario.id}: {e}")
+            try:
+                await response.write(sse_event("error", {"id": scenario.id, "error": str(e)}))
+            except ConnectionResetError:
+                pass
+        finally:
+            if producer is not None and not producer.done():
+                producer.cancel()
+            self.active -= 1
+
+
+class _EventStream:
+    """Takes the renderer's place in build_workflow: queues every agent's text as a delta event.
+
+    The manager's synthesis only reaches the renderer, not the workflow's
+    event stream, so both feed the same queue; None ends it.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.first_token: float | None = None
+        self.failed = False
+
+    def feed(self, agent: str, text: str) -> None:
+        if text:
+            if self.first_token is None:
+                self.first_token = time.perf_counter()
+            self.queue.put_nowait(("delta", {"agent": agent, "text": text}))
+
+    def dispatch(self, agents: list[str]) -> None:
+        pass
+
+    def complete(self, agent: str) -> None:
+        pass
+
+    async def run(self, workflow, task: str) -> None:
+        """Run the workflow to completion, queueing its updates and final messages."""
+        try:
+            async for event in workflow.run_stream(task):
+                if isinstance(event, AgentRunUpdateEvent):
+                    self.feed(event.executor_id or "Unknown", app.extract_text_from_event(event.data))
+                elif isinstance(event, WorkflowOutputEvent):
+                    messages = [
+                        {"agent": m.author_name, "text": m.text}
+                        for m in event.data if m.role == Role.ASSISTANT
+                    ]
+                    self.queue.put_nowait(("done", {
+                        "turns": len(messages),
+                        "recommendation": messages[-1]["text"] if messages else None,
+                        "messages": messages,
+                    }))
+        except Exception as e:
+            self.failed = True
+            self.queue.put_nowait(("error", {"error": str(e)}))
+        finally:
+            self.queue.put_nowait(None)
+
+
+def _round(moment: float | None, started: float) -> float | None:
+    """Seconds from `started` to `moment`, for the done event."""
+    return None if moment is None else round(moment - started, 3)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+async def serve(host: str, port: int, unix_path: Path | None, max_concurrent: int) -> None:
+    """Set up the shared clients, doc search and agents once, then serve until interrupted."""
+    app.print_header()
+    started = time.perf_counter()
+
+    errors = app.configuration_errors()
+    if errors:
+        app.print_configuration_errors(errors)
+        return
+
+    project_endpoint = os.environ.get("AZURE_AI_PROJECT_ENDPOINT")
+    replay_only = app.LLM_CACHE_MODE == "replay"
+    app.load_framework()
+
+    doc_index = None
+    if app.DOC_SEARCH_BACKEND == "local":
+        doc_index = LocalDocIndex.open(app.LOCAL_INDEX_DIR, app.DOC_FILES)
+    fact_store = FactStore.open(app.FACT_STORE_DIR, app.DOC_FILES)
+
+    response_store = ResponseStore(app.LLM_CACHE_DIR) if app.LLM_CACHE_MODE != "off" else None
+    credential = None if replay_only else app.AzureCliCredential()
+    scheduler = None if replay_only else app.create_scheduler()
+    client_factory = None if replay_only else app.AgentClientFactory(
+        credential, project_endpoint, os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini"),
+        scheduler=scheduler,
+    )
+
+    try:
+        manager_client, analyst_client, reviewer_client = app.create_chat_clients(
+            client_factory, response_store, replay_only
+        )
+        async with manager_client, analyst_client, reviewer_client:
+            vector_store_id = None
+            if doc_index is None and not replay_only:
+                app.print_status("Syncing documentation files for File Search...")
+                doc_sync = await DocUploadCache(app.DOC_MANIFEST_FILE, project_endpoint).sync(
+                    reviewer_client.agents_client,
+                    app.DOC_FILES,
+                    app.VECTOR_STORE_NAME,
+                    on_status=app.print_status,
+                )
+                vector_store_id = doc_sync.vector_store_id
+
+            server = PlanningServer(
+                manager_client,
+                analyst_client,
+                reviewer_client,
+                app.create_doc_search_tools(vector_store_id, doc_index, fact_store),
+                max_concurrent,
+                scheduler,
+            )
+
+            runner = web.AppRunner(server.app())
+            await runner.setup()
+            if unix_path is not None:
+                site = web.UnixSite(runner, str(unix_path))
+                address = f"unix:{unix_path}"
+            else:
+                site = web.TCPSite(runner, host, port)
+                address = f"http://{host}:{port}"
+            await site.start()
+            app.print_success(f"Warm in {time.perf_counter() - started:.1f}s - serving on {address} (Ctrl+C to stop)")
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await runner.cleanup()
+                app.print_status(f"Served {server.served} requests ({server.failed} failed)")
+                if scheduler is not None:
+                    app.print_status(app.format_scheduler_metrics(scheduler))
+    finally:
+        if client_factory is not None:
+            await client_factory.close()
+        if credential is not None:
+            await credential.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve Zava Logistics planning requests from warm agents.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--unix", type=Path, help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument(
+        "--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT, help="maximum concurrent workflows"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_concurrent))
+    except KeyboardInterrupt:
+        pass
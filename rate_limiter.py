@@ -0,0 +1,447 @@
+"""
+Zava Logistics - Rate-Limited Request Scheduler
+===============================================
+
+Shared scheduler in front of every model call made by the agents of one
+process, so concurrent workflows on the same model deployment queue for its
+quota instead of failing with 429 (Too Many Requests).
+
+  - budgets:   requests/min and tokens/min token buckets, refilled
+               continuously; a bucket holds BURST_SECONDS worth of quota so
+               a burst cannot exceed what the service allows per window
+  - tokens:    a call reserves its estimated prompt plus output tokens; the
+               usage the service reports settles the difference afterwards
+               (refunded or carried as debt) and corrects later estimates.
+               Agent threads keep their history server-side, so the prompt
+               estimate starts from the thread's last reported size
+  - priority:  waiting calls are granted strictly by priority, then arrival;
+               interactive runs go ahead of batch ones (see request_priority)
+  - 429s:      a throttled call is retried after the service's Retry-After
+               (or exponential backoff) plus jitter, and the whole queue
+               pauses for that long, since the quota is shared
+  - metrics:   queue depth (now, per priority, peak), waits, throttles,
+               retries and the achieved requests/tokens per minute
+
+Each chat client is hooked at _inner_get_streaming_response /
+_inner_get_response (see limit_chat_client), i.e. once per model call,
+including every step of a tool-calling loop. Only a call that has not yet
+streamed any content is retried. A failed agent run has already posted its
+input to its thread on the service, so once a run was started the retry
+runs again on that thread and sends only what the thread doesn't hold
+(instructions and tool results) - never the turn's input a second time.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import copy
+import heapq
+import itertools
+import random
+import re
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterable, Iterator
+
+from agent_framework import ChatOptions, ChatResponseUpdate, UsageContent
+
+from termination import estimate_tokens
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# Seconds of quota a bucket may accumulate (Azure OpenAI enforces per-minute
+# quotas over short windows, so a full minute's burst would be throttled)
+BURST_SECONDS = 10
+
+# Output tokens reserved per call when the request sets no max_tokens
+DEFAULT_OUTPUT_TOKENS = 512
+
+# Retries of a throttled call before its error is raised
+MAX_RETRIES = 8
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+RETRY_AFTER_JITTER = 0.2  # up to +20% on top of Retry-After
+
+# Threads whose last reported size is remembered for prompt estimates
+MAX_TRACKED_THREADS = 4096
+
+# Weight of the latest call in the running used/estimated token ratio
+ESTIMATE_SMOOTHING = 0.2
+
+# Roles of the messages a run posts to its service thread (not re-sent on a retry)
+THREAD_INPUT_ROLES = ("user", "assistant")
+
+_RATE_LIMIT_RE = re.compile(r"rate.?limit|too many requests|\b429\b", re.IGNORECASE)
+_TRY_AGAIN_RE = re.compile(r"(?:try again|retry) (?:in|after) (\d+(?:\.\d+)?) ?s", re.IGNORECASE)
+
+_priority: contextvars.ContextVar[int | None] = contextvars.ContextVar("request_priority", default=None)
+# The try of a scheduled non-streaming call in progress, whose client may stream underneath
+_admitted: contextvars.ContextVar["_Attempt | None"] = contextvars.ContextVar("rate_limit_admitted", default=None)
+
+
+@contextlib.contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the model calls made in this block (and tasks started from it) at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """The delay the service asks for if `exc` is a rate limit (0.0 if unspecified), else None."""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    text = str(exc)
+    if status != 429 and not _RATE_LIMIT_RE.search(text):
+        return None
+
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    # Failed agent runs only carry a message: "Rate limit is exceeded. Try again in 20 seconds."
+    match = _TRY_AGAIN_RE.search(text)
+    return float(match.group(1)) if match else 0.0
+
+
+# =============================================================================
+# BUDGETS
+# =============================================================================
+
+class _Bucket:
+    """Token bucket refilled at per_minute / 60 per second, holding at most BURST_SECONDS of quota."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self, amount: float, now: float) -> float:
+        """Seconds until `amount` fits (a call larger than the bucket needs a full bucket)."""
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+@dataclass
+class Grant:
+    """A call admitted by the scheduler and the tokens reserved for it."""
+
+    priority: int
+    tokens: int
+    waited: float
+
+
+@dataclass
+class _Attempt:
+    """How far one try of a model call got."""
+
+    conversation_id: str | None = None  # service thread of the run it started, if any
+    streamed: bool = False              # content reached the caller
+    used: int | None = None             # tokens the service reported
+
+    def observe(self, update: ChatResponseUpdate) -> None:
+        self.conversation_id = update.conversation_id or self.conversation_id
+        for content in update.contents or []:
+            if isinstance(content, UsageContent):
+                details = content.details
+                self.used = (self.used or 0) + (details.input_token_count or 0) + (details.output_token_count or 0)
+            else:
+                self.streamed = True
+
+    def retry_request(self, messages: list[Any], chat_options: ChatOptions) -> tuple[list[Any], ChatOptions]:
+        """Messages and options for the next try.
+
+        Once a run was started its thread holds the input, so the retry runs
+        on that thread (also when the try created it) without the input.
+        """
+        if self.conversation_id is None:
+            return messages, chat_options
+        retry_options = copy.copy(chat_options)
+        retry_options.conversation_id = self.conversation_id
+        return [m for m in messages if m.role.value not in THREAD_INPUT_ROLES], retry_options
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    tokens: int
+    enqueued_at: float
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+class RateLimitScheduler:
+    """Admits model calls within requests/min and tokens/min budgets, by priority."""
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        default_priority: int = PRIORITY_INTERACTIVE,
+        max_retries: int = MAX_RETRIES,
+    ):
+        now = time.monotonic()
+        self.requests = _Bucket(requests_per_minute, now) if requests_per_minute else None
+        self.tokens = _Bucket(tokens_per_minute, now) if tokens_per_minute else None
+        self.default_priority = default_priority
+        self.max_retries = max_retries
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._thread_tokens: dict[str, int] = {}
+        self._usage_ratio = 1.0  # running used / estimated tokens
+
+        # Metrics
+        self.granted = 0
+        self.completed = 0
+        self.throttled = 0
+        self.retries = 0
+        self.tokens_used = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._first_grant_at: float | None = None
+        self._last_done_at: float | None = None
+
+    # -------------------------------------------------------------------------
+    # Admission
+    # -------------------------------------------------------------------------
+
+    async def acquire(self, tokens: int, priority: int | None = None) -> Grant:
+        """Wait until the call fits the budgets and every higher-priority caller has gone first."""
+        if priority is None:
+            priority = _priority.get()
+        if priority is None:
+            priority = self.default_priority
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens, time.monotonic())
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self._dispatch()
+        try:
+            waited = await waiter.future
+        finally:
+            if not waiter.future.done():
+                waiter.future.cancel()
+            # A cancelled waiter may have been blocking the head of the queue
+            self._dispatch()
+        return Grant(priority, tokens, waited)
+
+    def settle(self, grant: Grant, tokens_used: int | None) -> None:
+        """Record a finished call; correct the token budget by what it actually used."""
+        self.completed += 1
+        self._last_done_at = time.monotonic()
+        used = grant.tokens if tokens_used is None else tokens_used
+        self.tokens_used += used
+        if tokens_used is not None and grant.tokens > 0:
+            ratio = min(8.0, max(0.25, tokens_used / grant.tokens * self._usage_ratio))
+            self._usage_ratio += ESTIMATE_SMOOTHING * (ratio - self._usage_ratio)
+        if self.tokens is not None and used != grant.tokens:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level - (used - grant.tokens))
+            self._dispatch()
+
+    def backoff(self, attempt: int, retry_after: float) -> float:
+        """Pause the queue after a 429 and return how long the throttled call should wait."""
+        self.throttled += 1
+        if retry_after > 0:
+            delay = retry_after * (1 + random.uniform(0, RETRY_AFTER_JITTER))
+        else:
+            ceiling = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt)
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        # The service saw the quota as spent: don't let the backlog burst straight back in
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.level = min(bucket.level, 0.0)
+        self._dispatch()
+        return delay
+
+    def _dispatch(self) -> None:
+        """Grant waiting calls from the head of the queue while the budgets allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            priority, _, waiter = self._queue[0]
+            if waiter.future.done():
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            delay = self._paused_until - now
+            if self.requests is not None:
+                delay = max(delay, self.requests.wait(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.wait(waiter.tokens, now))
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            if self.requests is not None:
+                self.requests.level -= 1
+            if self.tokens is not None:
+                self.tokens.level -= waiter.tokens
+            waited = now - waiter.enqueued_at
+            self.granted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if self._first_grant_at is None:
+                self._first_grant_at = now
+            waiter.future.set_result(waited)
+
+    # -------------------------------------------------------------------------
+    # Model calls
+    # -------------------------------------------------------------------------
+
+    def estimate_tokens(self, messages: list[Any], chat_options: ChatOptions) -> int:
+        """Prompt (thread size so far plus new messages) and output tokens a call may use."""
+        prompt = sum(estimate_tokens(getattr(m, "text", "") or "") for m in messages)
+        prompt += self._thread_tokens.get(chat_options.conversation_id or "", 0)
+        return round((prompt + (chat_options.max_tokens or DEFAULT_OUTPUT_TOKENS)) * self._usage_ratio)
+
+    def _remember_thread(self, conversation_id: str | None, tokens: int) -> None:
+        if not conversation_id:
+            return
+        self._thread_tokens.pop(conversation_id, None)
+        self._thread_tokens[conversation_id] = tokens
+        if len(self._thread_tokens) > MAX_TRACKED_THREADS:
+            del self._thread_tokens[next(iter(self._thread_tokens))]
+
+    async def stream(
+        self, call: Any, *, messages: list[Any], chat_options: ChatOptions, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        """Run a streaming model call under the budgets, retrying it when throttled."""
+        admitted = _admitted.get()
+        if admitted is not None:
+            # Already scheduled by call(), which retries based on what this try got to
+            async for update in call(messages=messages, chat_options=chat_options, **kwargs):
+                admitted.observe(update)
+                yield update
+            return
+        estimate = self.estimate_tokens(messages, chat_options)
+        for n in itertools.count():
+            grant = await self.acquire(estimate)
+            attempt = _Attempt()
+            try:
+                async for update in call(messages=messages, chat_options=chat_options, **kwargs):
+                    attempt.observe(update)
+                    yield update
+            except Exception as exc:
+                self.settle(grant, attempt.used)
+                retry_after = retry_after_seconds(exc)
+                if retry_after is None or attempt.streamed or n >= self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff(n, retry_after))
+                messages, chat_options = attempt.retry_request(messages, chat_options)
+                continue
+            except BaseException:
+                self.settle(grant, attempt.used)
+                raise
+            self.settle(grant, attempt.used)
+            if attempt.used is not None:
+                self._remember_thread(attempt.conversation_id or chat_options.conversation_id, attempt.used)
+            return
+
+    async def call(self, call: Any, *, messages: list[Any], chat_options: ChatOptions, **kwargs: Any) -> Any:
+        """Run a non-streaming model call under the budgets, retrying it when throttled."""
+        estimate = self.estimate_tokens(messages, chat_options)
+        for n in itertools.count():
+            grant = await self.acquire(estimate)
+            attempt = _Attempt()
+            admitted = _admitted.set(attempt)
+            try:
+                response = await call(messages=messages, chat_options=chat_options, **kwargs)
+            except Exception as exc:
+                self.settle(grant, None)
+                retry_after = retry_after_seconds(exc)
+                if retry_after is None or n >= self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff(n, retry_after))
+                messages, chat_options = attempt.retry_request(messages, chat_options)
+                continue
+            finally:
+                _admitted.reset(admitted)
+            usage = getattr(response, "usage_details", None)
+            used = (usage.input_token_count or 0) + (usage.output_token_count or 0) if usage else None
+            self.settle(grant, used)
+            if used is not None:
+                self._remember_thread(getattr(response, "conversation_id", None), used)
+            return response
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for admission right now."""
+        return sum(1 for _, _, w in self._queue if not w.future.done())
+
+    def queue_depth_by_priority(self) -> dict[int, int]:
+        depths: dict[int, int] = {}
+        for priority, _, w in self._queue:
+            if not w.future.done():
+                depths[priority] = depths.get(priority, 0) + 1
+        return depths
+
+    def metrics(self) -> dict[str, Any]:
+        """Counters, queue depths and the achieved rates since the first granted call."""
+        active = (self._last_done_at or 0.0) - (self._first_grant_at or 0.0)
+        per_minute = 60 / active if active > 0 else 0.0
+        return {
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_priority": self.queue_depth_by_priority(),
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.completed,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "avg_wait_seconds": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "tokens_used": self.tokens_used,
+            "requests_per_minute": self.completed * per_minute,
+            "tokens_per_minute": self.tokens_used * per_minute,
+        }
+
+
+def limit_chat_client(chat_client: Any, scheduler: RateLimitScheduler) -> None:
+    """Send every model call of a chat client through the scheduler.
+
+    The client's per-call methods are replaced on the instance, so the tool
+    loop and middleware around them are unchanged.
+    """
+    client = getattr(chat_client, "inner", chat_client)  # unwrap the response cache
+    inner_stream = client._inner_get_streaming_response
+    inner_response = client._inner_get_response
+
+    def scheduled_stream(**kwargs: Any) -> AsyncIterable[ChatResponseUpdate]:
+        return scheduler.stream(inner_stream, **kwargs)
+
+    async def scheduled_response(**kwargs: Any) -> Any:
+        return await scheduler.call(inner_response, **kwargs)
+
+    client._inner_get_streaming_response = scheduled_stream
+    client._inner_get_response = scheduled_response
@@ -0,0 +1,326 @@
+"""
+Zava Logistics - LLM Response Cache
+===================================
+
+Record/replay cache around the chat client used by each ChatAgent.
+
+Responses are keyed on the agent name, its instructions, its tool
+definitions and the normalized message history, and stored on disk as the
+recorded stream of updates (with size and age based eviction).
+
+Modes (LLM_CACHE_MODE):
+  - off:    no caching
+  - record: serve hits from disk, call the real client on a miss and store it
+  - replay: serve hits only; a local stub client raises on a miss, so the
+            whole group chat runs offline with no Azure resources at all
+
+Agents using Azure AI Agent threads only send the new messages of each turn,
+so the cache tracks each conversation's history itself and hands out local
+conversation IDs. On a miss, any turns that were served from the cache are
+replayed into the real thread before the new messages. Their tool calls and
+results are replayed as text: an agent thread only takes function results
+as the tool outputs of the run that requested them.
+"""
+
+import copy
+import hashlib
+import inspect
+import json
+import os
+import time
+import uuid
+from collections.abc import AsyncIterable
+from pathlib import Path
+from typing import Any
+
+from agent_framework import ChatMessage, ChatOptions, ChatResponse, ChatResponseUpdate
+
+
+# Eviction defaults
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+# =============================================================================
+# DISK STORE
+# =============================================================================
+
+class ResponseStore:
+    """Directory of recorded response streams, one JSON file per cache key."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._total_bytes: int | None = None  # running size, computed on first write
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> list[dict] | None:
+        """Return the recorded updates for a key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        if time.time() - stat.st_mtime > self.max_age_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # keep recently used entries ahead of eviction
+        return record["updates"]
+
+    def put(self, key: str, updates: list[dict], meta: dict[str, Any]) -> None:
+        """Store a recorded stream and evict old entries beyond the size budget."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        payload = json.dumps({"meta": meta, "updates": updates})
+        tmp_path.write_text(payload, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+        if self._total_bytes is None:
+            self.evict()
+        else:
+            self._total_bytes += len(payload)
+            if self._total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+
+
+# =============================================================================
+# CACHE KEYS
+# =============================================================================
+
+def normalize_message(message: ChatMessage) -> dict[str, Any]:
+    """Stable, id/timestamp-free view of a message used for keys and history."""
+    role = message.role.value if hasattr(message.role, "value") else str(message.role)
+    calls = [
+        f"{content.name}({content.arguments})"
+        for content in message.contents
+        if getattr(content, "type", None) == "function_call"
+    ]
+    normalized = {"role": role, "author": message.author_name or "", "text": message.text or "", "calls": calls}
+    # Tool messages have no text: their results tell two otherwise equal requests apart
+    results = [
+        {"call_id": content.call_id, "result": _result_text(content.result)}
+        for content in message.contents
+        if getattr(content, "type", None) == "function_result"
+    ]
+    if results:
+        normalized["results"] = results
+    return normalized
+
+
+def _result_text(result: Any) -> str:
+    return result if isinstance(result, str) else json.dumps(result, sort_keys=True, default=str)
+
+
+def replay_message(normalized: dict[str, Any]) -> ChatMessage:
+    """Message replaying a normalized one into a real thread, tool calls and results as text."""
+    lines = [normalized["text"]] if normalized["text"] else []
+    lines += [f"[called {call}]" for call in normalized["calls"]]
+    lines += [f"[result of {r['call_id']}] {r['result']}" for r in normalized.get("results", [])]
+    return ChatMessage(role=normalized["role"], text="\n".join(lines), author_name=normalized["author"] or None)
+
+
+def describe_tool(tool: Any) -> dict[str, Any]:
+    """Name and schema of a tool definition (hosted tool, AIFunction or plain callable)."""
+    name = getattr(tool, "name", None) or getattr(tool, "__name__", None) or type(tool).__name__
+    if callable(getattr(tool, "parameters", None)):
+        schema = tool.parameters()
+    elif callable(tool):
+        schema = str(inspect.signature(tool))
+    else:
+        schema = type(tool).__name__
+    return {"name": name, "schema": schema}
+
+
+def cache_key(
+    agent_name: str,
+    chat_options: ChatOptions,
+    history: list[dict[str, Any]],
+) -> str:
+    """SHA-256 over agent name, instructions, tools, response format and history."""
+    response_format = chat_options.response_format
+    payload = {
+        "agent": agent_name,
+        "instructions": chat_options.instructions or "",
+        "tools": [describe_tool(tool) for tool in chat_options.tools or []],
+        "response_format": getattr(response_format, "__name__", None),
+        "history": history,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# =============================================================================
+# CHAT CLIENTS
+# =============================================================================
+
+class ReplayOnlyChatClient:
+    """Deterministic local stand-in for the model: it can only serve recorded responses."""
+
+    additional_properties: dict[str, Any] = {}
+
+    async def get_response(self, messages, **kwargs: Any) -> ChatResponse:
+        raise CacheMissError("No recorded response for this request (LLM_CACHE_MODE=replay)")
+
+    async def get_streaming_response(self, messages, **kwargs: Any) -> AsyncIterable[ChatResponseUpdate]:
+        raise CacheMissError("No recorded response for this request (LLM_CACHE_MODE=replay)")
+        yield  # pragma: no cover - makes this an async generator
+
+
+class CachingChatClient:
+    """Chat client wrapper that records and replays response streams."""
+
+    def __init__(self, inner: Any, store: ResponseStore, agent_name: str | None = None):
+        self.inner = inner
+        self.store = store
+        self.agent_name = agent_name
+        self.hits = 0
+        self.misses = 0
+        # local conversation id -> {"history": [...], "thread_id": str | None, "synced": int}
+        self._conversations: dict[str, dict[str, Any]] = {}
+
+    # -------------------------------------------------------------------------
+    # Delegation to the wrapped client
+    # -------------------------------------------------------------------------
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    @property
+    def additional_properties(self) -> dict[str, Any]:
+        return getattr(self.inner, "additional_properties", {})
+
+    async def __aenter__(self) -> "CachingChatClient":
+        if hasattr(self.inner, "__aenter__"):
+            await self.inner.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if hasattr(self.inner, "__aexit__"):
+            await self.inner.__aexit__(exc_type, exc_val, exc_tb)
+
+    def _update_agent_name_and_description(self, agent_name: str | None, description: str | None) -> None:
+        if agent_name and not self.agent_name:
+            self.agent_name = agent_name
+        if hasattr(self.inner, "_update_agent_name_and_description"):
+            self.inner._update_agent_name_and_description(agent_name, description)
+
+    # -------------------------------------------------------------------------
+    # Chat API
+    # -------------------------------------------------------------------------
+
+    async def get_response(self, messages, **kwargs: Any) -> ChatResponse:
+        updates = [update async for update in self.get_streaming_response(messages, **kwargs)]
+        chat_options = kwargs.get("chat_options")
+        return ChatResponse.from_chat_response_updates(
+            updates, output_format_type=getattr(chat_options, "response_format", None)
+        )
+
+    async def get_streaming_response(self, messages, **kwargs: Any) -> AsyncIterable[ChatResponseUpdate]:
+        chat_options: ChatOptions = kwargs.pop("chat_options", None) or ChatOptions()
+        new_messages = _as_messages(messages)
+
+        local_id = chat_options.conversation_id
+        if local_id not in self._conversations:
+            local_id = f"cached-{uuid.uuid4().hex}"
+            self._conversations[local_id] = {"history": [], "thread_id": None, "synced": 0}
+        conversation = self._conversations[local_id]
+        history = conversation["history"] + [normalize_message(m) for m in new_messages]
+        key = cache_key(self.agent_name or "UnnamedAgent", chat_options, history)
+
+        recorded = self.store.get(key)
+        if recorded is not None:
+            self.hits += 1
+            updates = [ChatResponseUpdate.from_dict(data) for data in recorded]
+            for update in updates:
+                update.conversation_id = local_id
+                yield update
+        else:
+            self.misses += 1
+            updates = []
+            async for update in self._call_inner(conversation, new_messages, chat_options, kwargs):
+                updates.append(update)
+                if update.conversation_id:
+                    conversation["thread_id"] = update.conversation_id
+                update.conversation_id = local_id
+                yield update
+            self.store.put(
+                key,
+                [update.to_dict() for update in updates],
+                meta={"agent": self.agent_name, "created": time.time()},
+            )
+
+        response = ChatResponse.from_chat_response_updates(updates)
+        conversation["history"] = history + [normalize_message(m) for m in response.messages]
+        if recorded is None:
+            # The real thread now holds everything up to and including this response
+            conversation["synced"] = len(conversation["history"])
+
+    async def _call_inner(
+        self,
+        conversation: dict[str, Any],
+        new_messages: list[ChatMessage],
+        chat_options: ChatOptions,
+        kwargs: dict[str, Any],
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        """Call the real client, first replaying any cached turns its thread has not seen."""
+        thread_id = conversation["thread_id"]
+        start = conversation["synced"] if thread_id else 0
+        backlog = [replay_message(m) for m in conversation["history"][start:]]
+        inner_options = copy.copy(chat_options)
+        inner_options.conversation_id = thread_id
+        async for update in self.inner.get_streaming_response(
+            messages=backlog + new_messages, chat_options=inner_options, **kwargs
+        ):
+            yield update
+
+
+def _as_messages(messages: Any) -> list[ChatMessage]:
+    if messages is None:
+        return []
+    if isinstance(messages, (str, ChatMessage)):
+        messages = [messages]
+    return [m if isinstance(m, ChatMessage) else ChatMessage(role="user", text=str(m)) for m in messages]
+
+
+def wrap_chat_client(client: Any, store: ResponseStore | None) -> Any:
+    """Wrap a chat client with the response cache when a store is configured."""
+    return client if store is None else CachingChatClient(client, store)
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Zava Logistics - Scenario Sweep Runner
+======================================
+
+Runs many capacity planning scenarios (months, regions, what-if demand
+multipliers) in one process. All scenarios share one credential and
+connection pool (see client_factory.py), one set of warm chat clients, one Manager/Reviewer agent pair and one vector store; each
+scenario gets its own Analyst tools over its slice of the demand data and its
+own group chat workflow.
+
+The first scenario runs alone so the Azure agents and threads are created
+once; the rest run concurrently under a concurrency cap. Each scenario's
+conversation is streamed to its own file, and the sweep reports throughput
+(scenarios/minute) and p50/p95 latency.
+
+Scenario file (JSONL, one object per line; every field except "id" is optional):
+  {"id": "feb-west", "task": "...", "csv": "data/package_demand.csv",
+   "start_date": "2026-02-01", "end_date": "2026-02-14",
+   "routes": ["LAX-JFK"], "cities": ["Seattle"], "demand_multiplier": 1.2}
+
+Usage:
+  python scenario_sweep.py data/scenarios.jsonl --concurrency 4 --output-dir runs
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+from agent_framework import AgentRunUpdateEvent, ChatAgent, Role, WorkflowOutputEvent
+
+import main as app
+from capacity_optimizer import CapacityOptimizer, build_capacity_tools, load_fleet_config
+from demand_analytics import DemandData, build_demand_tools, load_demand_data
+from demand_forecast import PeakCalendar, build_forecast_tools, load_forecaster, load_peak_calendar
+from doc_cache import DocUploadCache
+from fact_store import FactStore
+from local_retrieval import LocalDocIndex
+from rate_limiter import PRIORITY_BATCH, request_priority
+from response_cache import ResponseStore
+from stream_renderer import StreamRenderer
+
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_OUTPUT_DIR = app.SCRIPT_DIR / "runs"
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+def _string_list(data: dict, key: str) -> list[str]:
+    value = data.get(key) or []
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{key}' must be a list of strings")
+    return value
+
+
+def _iso_date(data: dict, key: str) -> str | None:
+    value = data.get(key)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be a date (YYYY-MM-DD), got {value!r}") from None
+
+
+@dataclass
+class Scenario:
+    """One planning run: a task over a (possibly scaled) slice of the demand data."""
+
+    id: str
+    task: str = app.USER_TASK
+    csv: Path = app.CSV_FILE
+    start_date: str | None = None
+    end_date: str | None = None
+    routes: list[str] = field(default_factory=list)
+    cities: list[str] = field(default_factory=list)
+    demand_multiplier: float = 1.0
+
+    @classmethod
+    def from_dict(cls, data: dict, base_dir: Path) -> "Scenario":
+        if not data.get("id"):
+            raise ValueError("every scenario needs an 'id'")
+        csv_path = Path(data["csv"]) if data.get("csv") else app.CSV_FILE
+        if not csv_path.is_absolute():
+            csv_path = base_dir / csv_path
+        task = data.get("task") or app.USER_TASK
+        if not isinstance(task, str):
+            raise ValueError("'task' must be a string")
+        start_date, end_date = _iso_date(data, "start_date"), _iso_date(data, "end_date")
+        if start_date and end_date and start_date > end_date:
+            raise ValueError(f"'start_date' {start_date} is after 'end_date' {end_date}")
+        multiplier = data.get("demand_multiplier", 1.0)
+        is_number = isinstance(multiplier, (int, float)) and not isinstance(multiplier, bool)
+        if not is_number or not math.isfinite(multiplier) or multiplier <= 0:
+            raise ValueError(f"'demand_multiplier' must be a positive number, got {multiplier!r}")
+        return cls(
+            id=str(data["id"]),
+            task=task,
+            csv=csv_path,
+            start_date=start_date,
+            end_date=end_date,
+            routes=_string_list(data, "routes"),
+            cities=_string_list(data, "cities"),
+            demand_multiplier=float(multiplier),
+        )
+
+    @property
+    def full_dataset(self) -> bool:
+        """True when the scenario neither filters nor scales the demand data."""
+        return not (
+            self.start_date or self.end_date or self.routes or self.cities or self.demand_multiplier != 1.0
+        )
+
+    def load_data(self) -> DemandData:
+        """The scenario's slice of its demand CSV."""
+        return load_demand_data(self.csv, app.DEMAND_STORE_DIR).subset(
+            routes=self.routes,
+            cities=self.cities,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            multiplier=self.demand_multiplier,
+        )
+
+    def describe(self) -> str:
+        """Scenario constraints appended to the task so the agents know the data is a slice."""
+        notes = []
+        if self.start_date or self.end_date:
+            notes.append(f"dates {self.start_date or 'start'} to {self.end_date or 'end'}")
+        if self.routes:
+            notes.append(f"routes {', '.join(self.routes)}")
+        if self.cities:
+            notes.append(f"routes touching {', '.join(self.cities)}")
+        if self.demand_multiplier != 1.0:
+            notes.append(f"what-if demand x{self.demand_multiplier:g} (already applied to the demand tools)")
+        return f"Scenario '{self.id}': " + ("; ".join(notes) if notes else "full dataset")
+
+
+def build_analyst_agent(
+    chat_client,
+    data: DemandData,
+    capacity_optimizer: CapacityOptimizer,
+    peak_calendar: PeakCalendar,
+    forecast_state_dir: Path | None = None,
+) -> ChatAgent:
+    """An Analyst Agent whose demand, forecast and capacity tools work on `data`.
+
+    Pass forecast_state_dir only for the full dataset: the saved forecaster
+    state is continued rather than refitted.
+    """
+    return ChatAgent(
+        chat_client=chat_client,
+        name="AnalystAgent",
+        instructions=app.ANALYST_INSTRUCTIONS,
+        tools=(
+            build_demand_tools(data)
+            + build_forecast_tools(load_forecaster(data, peak_calendar, forecast_state_dir))
+            + build_capacity_tools(data, capacity_optimizer)
+        ),
+    )
+
+
+def load_scenarios(path: Path) -> list[Scenario]:
+    """Read a JSONL scenario file; relative CSV paths resolve against the repo root."""
+    scenarios = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                scenarios.append(Scenario.from_dict(json.loads(line), app.SCRIPT_DIR))
+            except (json.JSONDecodeError, ValueError) as e:
+                raise ValueError(f"{path.name} line {line_no}: {e}") from e
+    ids = [s.id for s in scenarios]
+    duplicates = sorted({i for i in ids if ids.count(i) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate scenario ids: {', '.join(duplicates)}")
+    return scenarios
+
+
+@dataclass
+class ScenarioResult:
+    """Outcome of one scenario run."""
+
+    scenario_id: str
+    output_path: Path
+    latency: float
+    turns: int = 0
+    stop_reason: str | None = None
+    error: str | None = None
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+class ScenarioSweep:
+    """Runs scenarios concurrently on shared clients, agents and doc search tools."""
+
+    def __init__(self, manager_client, analyst_client, reviewer_client, doc_search_tools, output_dir: Path):
+        self.analyst_client = analyst_client
+        self.output_dir = output_dir
+        self.capacity_optimizer = CapacityOptimizer(load_fleet_config(app.DOCS_DIR))
+        self.peak_calendar = load_peak_calendar(app.DOCS_DIR)
+        self.manager_agent = ChatAgent(
+            chat_client=manager_client,
+            name="ManagerAgent",
+            instructions=app.MANAGER_INSTRUCTIONS if app.MANAGER_MODE == "llm" else app.SYNTHESIS_INSTRUCTIONS,
+        )
+        self.reviewer_agent = ChatAgent(
+            chat_client=reviewer_client,
+            name="ReviewerAgent",
+            instructions=app.REVIEWER_INSTRUCTIONS,
+            tools=doc_search_tools,
+        )
+
+    async def run(self, scenarios: list[Scenario], concurrency: int) -> list[ScenarioResult]:
+        """Run the first scenario alone (warming up the clients), then the rest concurrently."""
+        if not scenarios:
+            return []
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        first = await self.run_scenario(scenarios[0])
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def bounded(scenario: Scenario) -> ScenarioResult:
+            async with semaphore:
+                return await self.run_scenario(scenario)
+
+        rest = await asyncio.gather(*(bounded(s) for s in scenarios[1:]))
+        return [first, *rest]
+
+    async def run_scenario(self, scenario: Scenario) -> ScenarioResult:
+        """Run one group chat, streaming its conversation to <output_dir>/<id>.md."""
+        output_path = self.output_dir / f"{_UNSAFE_FILENAME_RE.sub('_', scenario.id)}.md"
+        started = time.perf_counter()
+        turns = 0
+        termination = app.create_termination_condition()
+
+        with open(output_path, "w", encoding="utf-8") as out:
+            out.write(f"# Scenario: {scenario.id}\n\n{scenario.task.strip()}\n\n{scenario.describe()}\n")
+            try:
+                analyst_agent = build_analyst_agent(
+                    self.analyst_client,
+                    scenario.load_data(),
+                    self.capacity_optimizer,
+                    self.peak_calendar,
+                    app.FORECAST_STATE_DIR if scenario.full_dataset else None,
+                )
+                renderer = StreamRenderer(
+                    print_header=lambda agent: out.write(f"\n## {app.get_agent_style(agent)[2]}\n\n"),
+                    format_manager_field=lambda *args: _strip_ansi(app.format_manager_field(*args)),
+                    is_manager=app.is_manager_agent,
+                    out=out,
+                )
+                workflow = app.build_workflow(
+                    self.manager_agent,
+                    [analyst_agent, self.reviewer_agent],
+                    termination,
+                    renderer,
+                    app.create_compactor(),
+                )
+                task = f"{scenario.task.strip()}\n\n{scenario.describe()}"
+                async for event in workflow.run_stream(task):
+                    if isinstance(event, AgentRunUpdateEvent):
+                        renderer.feed(event.executor_id or "Unknown", app.extract_text_from_event(event.data))
+                    elif isinstance(event, WorkflowOutputEvent):
+                        renderer.finish()
+                        turns = sum(1 for m in event.data if m.role == Role.ASSISTANT)
+            except Exception as e:
+                out.write(f"\n\nERROR: {e}\n")
+                return ScenarioResult(scenario.id, output_path, time.perf_counter() - started, error=str(e))
+
+        return ScenarioResult(
+            scenario.id,
+            output_path,
+            time.perf_counter() - started,
+            turns=turns,
+            stop_reason=termination.reason,
+        )
+
+
+def _strip_ansi(text: str | None) -> str | None:
+    return None if text is None else _ANSI_RE.sub("", text)
+
+
+def summarize(results: list[ScenarioResult], elapsed: float) -> dict:
+    """Aggregate throughput and latency over a finished sweep."""
+    latencies = [r.latency for r in results if r.error is None]
+    return {
+        "scenarios": len(results),
+        "succeeded": len(latencies),
+        "failed": len(results) - len(latencies),
+        "elapsed_seconds": round(elapsed, 3),
+        "scenarios_per_minute": round(60.0 * len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_p50_seconds": round(percentile(latencies, 50), 3),
+        "latency_p95_seconds": round(percentile(latencies, 95), 3),
+        "results": [
+            {
+                "id": r.scenario_id,
+                "output": str(r.output_path),
+                "latency_seconds": round(r.latency, 3),
+                "turns": r.turns,
+                "stop_reason": r.stop_reason,
+                "error": r.error,
+            }
+            for r in results
+        ],
+    }
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+async def run_sweep(scenario_file: Path, concurrency: int, output_dir: Path) -> dict | None:
+    """Set up the shared clients and doc search once, run every scenario and report."""
+    app.print_header()
+
+    errors = app.configuration_errors()
+    if errors:
+        app.print_configuration_errors(errors)
+        return None
+
+    project_endpoint = os.environ.get("AZURE_AI_PROJECT_ENDPOINT")
+    replay_only = app.LLM_CACHE_MODE == "replay"
+
+    try:
+        scenarios = load_scenarios(scenario_file)
+    except (OSError, ValueError) as e:
+        app.print_error(f"Could not load scenarios: {e}")
+        return None
+    missing = sorted({str(s.csv) for s in scenarios if not s.csv.exists()})
+    if missing:
+        app.print_error(f"Files not found: {', '.join(missing)}")
+        return None
+    app.print_success(f"Loaded {len(scenarios)} scenarios (concurrency {concurrency})")
+    app.load_framework()
+
+    doc_index = None
+    if app.DOC_SEARCH_BACKEND == "local":
+        doc_index = LocalDocIndex.open(app.LOCAL_INDEX_DIR, app.DOC_FILES)
+    fact_store = FactStore.open(app.FACT_STORE_DIR, app.DOC_FILES)
+
+    response_store = ResponseStore(app.LLM_CACHE_DIR) if app.LLM_CACHE_MODE != "off" else None
+    credential = None if replay_only else app.AzureCliCredential()
+    scheduler = None if replay_only else app.create_scheduler()
+    client_factory = None if replay_only else app.AgentClientFactory(
+        credential, project_endpoint, os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini"),
+        scheduler=scheduler,
+    )
+
+    try:
+        clients = app.create_chat_clients(client_factory, response_store, replay_only)
+        manager_client, analyst_client, reviewer_client = clients
+        async with manager_client, analyst_client, reviewer_client:
+            # One vector store for every scenario
+            vector_store_id = None
+            if doc_index is None and not replay_only:
+                app.print_status("Syncing documentation files for File Search...")
+                doc_sync = await DocUploadCache(app.DOC_MANIFEST_FILE, project_endpoint).sync(
+                    reviewer_client.agents_client,
+                    app.DOC_FILES,
+                    app.VECTOR_STORE_NAME,
+                    on_status=app.print_status,
+                )
+                vector_store_id = doc_sync.vector_store_id
+
+            sweep = ScenarioSweep(
+                manager_client,
+                analyst_client,
+                reviewer_client,
+                app.create_doc_search_tools(vector_store_id, doc_index, fact_store),
+                output_dir,
+            )
+            app.print_status(f"Running scenarios, writing conversations to {output_dir}/")
+            started = time.perf_counter()
+            # Batch work: any interactive run sharing the scheduler goes first
+            with request_priority(PRIORITY_BATCH):
+                results = await sweep.run(scenarios, concurrency)
+            summary = summarize(results, time.perf_counter() - started)
+            if scheduler is not None:
+                summary["rate_limiter"] = scheduler.metrics()
+    finally:
+        if client_factory is not None:
+            await client_factory.close()
+        if credential is not None:
+            await credential.close()
+
+    for r in results:
+        if r.error:
+            app.print_error(f"{r.scenario_id}: {r.error}")
+        else:
+            app.print_success(f"{r.scenario_id}: {r.latency:.1f}s, {r.turns} turns -> {r.output_path.name}")
+    app.print_separator()
+    print(
+        f"{app.Colors.CYAN}{summary['succeeded']}/{summary['scenarios']} scenarios in "
+        f"{summary['elapsed_seconds']:.1f}s - {summary['scenarios_per_minute']:.1f} scenarios/min, "
+        f"latency p50 {summary['latency_p50_seconds']:.1f}s / p95 {summary['latency_p95_seconds']:.1f}s"
+        f"{app.Colors.END}"
+    )
+    if scheduler is not None:
+        app.print_status(app.format_scheduler_metrics(scheduler))
+    if response_store is not None:
+        hits = sum(c.hits for c in clients)
+        misses = sum(c.misses for c in clients)
+        app.print_status(f"LLM response cache: {hits} hits, {misses} misses")
+
+    summary_path = output_dir / "summary.json"
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    app.print_success(f"Summary written to {summary_path}")
+    return summary
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run many Zava Logistics planning scenarios concurrently.")
+    parser.add_argument("scenarios", type=Path, help="JSONL file with one scenario per line")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="maximum concurrent workflows")
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR, help="where per-scenario files go")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(run_sweep(args.scenarios, args.concurrency, args.output_dir))
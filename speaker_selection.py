@@ -0,0 +1,159 @@
+"""
+Zava Logistics - Rule-Based Speaker Selection
+=============================================
+
+Local replacement for the LLM manager in the group chat, registered with
+GroupChatBuilder.set_select_speakers_func.
+
+The next speaker is picked by a small state machine instead of a model call:
+  - rotation:  participants speak in a fixed order (Analyst -> Reviewer -> ...)
+  - rounds:    the chat finishes after max_rounds complete rotations
+  - routing:   a rule can redirect the next turn when the last participant
+               message matches a pattern (limited per round so it cannot loop)
+
+The only model call the manager makes is the final synthesis, produced from
+a compact transcript of the discussion once the selector decides to finish.
+
+state() and restore() carry the selector across a resumed run (see
+checkpoint.py), whose checkpointed messages enter the group chat history with
+their own roles rather than as agent turns.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Sequence
+
+if TYPE_CHECKING:
+    # Typing only: main.py imports this module before the Agent Framework is loaded
+    from agent_framework import GroupChatStateSnapshot
+
+
+# History roles of participant messages: "agent" for turns taken in this run,
+# "assistant" for messages of a conversation passed to run_stream (a resumed run)
+PARTICIPANT_ROLES = ("agent", "assistant")
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """Send the next turn to `target` when the last participant message matches `pattern`."""
+
+    pattern: str                # regular expression, matched case-insensitively
+    target: str                 # participant to route to
+    after: str | None = None    # only applies after this speaker (None = any participant)
+
+    def matches(self, speaker: str, text: str) -> bool:
+        if self.after is not None and speaker != self.after:
+            return False
+        return re.search(self.pattern, text, re.IGNORECASE) is not None
+
+
+def format_discussion(task: str, messages: Iterable[tuple[str, str]]) -> str:
+    """Task plus (speaker, text) participant messages as plain text, for the final synthesis."""
+    lines = [f"Task:\n{task.strip()}", "", "Discussion:"]
+    lines += [f"[{speaker}] {text.strip()}" for speaker, text in messages if text]
+    return "\n".join(lines)
+
+
+def format_transcript(state: "GroupChatStateSnapshot") -> str:
+    """The group chat's task and participant messages, formatted by format_discussion."""
+    return format_discussion(
+        state["task"].text,
+        ((turn.speaker, turn.message.text) for turn in state["history"] if turn.role in PARTICIPANT_ROLES),
+    )
+
+
+class RuleBasedSpeakerSelector:
+    """Deterministic speaker selector: rotation, round limit and content routing.
+
+    Call it with the group chat state to get the next participant name (None
+    finishes the chat); pass `final_message` as the builder's final_message.
+    """
+
+    def __init__(
+        self,
+        rotation: Sequence[str],
+        max_rounds: int,
+        rules: Sequence[RouteRule] = (),
+        max_detours_per_round: int = 1,
+        synthesize: Callable[[str], Awaitable[str]] | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ):
+        if not rotation:
+            raise ValueError("rotation must name at least one participant")
+        self.rotation = list(rotation)
+        self.max_rounds = max_rounds
+        self.rules = list(rules)
+        self.max_detours_per_round = max_detours_per_round
+        self.synthesize = synthesize
+        self.should_stop = should_stop
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over at the first speaker of the first round."""
+        self.position = 0
+        self.rounds = 0
+        self.detours = 0
+        self.selections: list[str] = []
+        self._seen = 0
+
+    def state(self) -> dict:
+        """Position in the rotation, as plain data for a checkpoint."""
+        return {
+            "position": self.position,
+            "rounds": self.rounds,
+            "detours": self.detours,
+            "selections": list(self.selections),
+            "seen": self._seen,
+        }
+
+    def restore(self, state: dict) -> None:
+        """Continue from a state() taken in an earlier run."""
+        self.position = state["position"]
+        self.rounds = state["rounds"]
+        self.detours = state["detours"]
+        self.selections = list(state["selections"])
+        self._seen = state["seen"]
+
+    def __call__(self, state: "GroupChatStateSnapshot") -> str | None:
+        history = state["history"]
+        if len(history) < self._seen:
+            self.reset()
+        last_turn = None
+        for turn in history[self._seen:]:
+            if turn.role in PARTICIPANT_ROLES:
+                last_turn = turn
+        self._seen = len(history)
+
+        if self.should_stop is not None and self.should_stop():
+            return None
+
+        # Conditional routing on the message that was just added
+        if last_turn is not None and self.detours < self.max_detours_per_round:
+            text = last_turn.message.text or ""
+            for rule in self.rules:
+                if rule.matches(last_turn.speaker, text):
+                    self.detours += 1
+                    return self._select(rule.target, counts_toward_round=False)
+
+        if self.position == 0 and self.rounds >= self.max_rounds:
+            return None
+        return self._select(self.rotation[self.position], counts_toward_round=True)
+
+    def _select(self, name: str, counts_toward_round: bool) -> str:
+        if counts_toward_round:
+            self.position += 1
+            if self.position == len(self.rotation):
+                self.position = 0
+                self.rounds += 1
+                self.detours = 0
+        elif name in self.rotation:
+            # Resume the rotation after the participant we routed to
+            self.position = (self.rotation.index(name) + 1) % len(self.rotation)
+        self.selections.append(name)
+        return name
+
+    async def final_message(self, state: "GroupChatStateSnapshot") -> str:
+        """Final manager message: a model-written synthesis when configured."""
+        if self.synthesize is None:
+            return "Conversation completed."
+        return await self.synthesize(format_transcript(state))
@@ -0,0 +1,350 @@
+"""
+Zava Logistics - Streaming Output Renderer
+==========================================
+
+Prints agent output token by token as AgentRunUpdateEvents arrive instead of
+buffering each agent's whole turn.
+
+  - Participant text is written to the terminal as soon as each delta arrives
+    and collected in a list-backed buffer (joined once per turn).
+  - Manager output is JSON (ManagerSelectionResponse). An incremental parser
+    emits each top-level field the moment its value is complete, so the next
+    speaker and instruction show up before the rest of the object arrives.
+  - Time-to-first-token is recorded for every turn.
+  - Concurrent turns (fan-out rounds, see dispatch/complete) are rendered one
+    agent at a time: one streams live while the others are buffered, and each
+    buffered turn is printed whole once the screen is free.
+"""
+
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, TextIO
+
+
+# =============================================================================
+# INCREMENTAL JSON FIELD PARSER
+# =============================================================================
+
+class IncrementalJsonFields:
+    """Streams top-level fields out of a JSON object as soon as each value completes.
+
+    Only the outermost object is tracked; nested values are captured whole and
+    decoded once they close. Each character is examined exactly once.
+    """
+
+    def __init__(self):
+        self.fields: dict[str, Any] = {}
+        self.field_ends: dict[str, int] = {}  # field -> offset in the fed text just past its value
+        self.failed = False
+        self._fed = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: str | None = None
+        self._token: list[str] = []
+        self._expect = "key"  # key -> colon -> value -> comma
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        """Consume a text delta and return the (field, value) pairs completed by it."""
+        completed: list[tuple[str, Any]] = []
+        if self.failed:
+            return completed
+
+        for i, ch in enumerate(text, start=self._fed + 1):
+            if not self._started:
+                if ch.isspace():
+                    continue
+                if ch != "{":
+                    self.failed = True
+                    return completed
+                self._started = True
+                self._depth = 1
+                continue
+            if self._depth == 0:
+                continue  # trailing text after the object
+
+            if self._in_string:
+                self._token.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_token(completed, i)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._token.append(ch)
+            elif ch in "{[":
+                self._depth += 1
+                self._token.append(ch)
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._end_token(completed, i)
+                    self._depth = 0
+                    continue
+                self._depth -= 1
+                self._token.append(ch)
+                if self._depth == 1:
+                    self._end_token(completed, i)
+            elif self._depth == 1 and ch == ":" and self._expect == "colon":
+                self._expect = "value"
+            elif self._depth == 1 and ch == ",":
+                self._end_token(completed, i)
+                self._expect = "key"
+            elif not ch.isspace() or self._depth > 1:
+                self._token.append(ch)
+        self._fed += len(text)
+        return completed
+
+    def _end_token(self, completed: list[tuple[str, Any]], end: int) -> None:
+        raw = "".join(self._token).strip()
+        self._token.clear()
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            self.failed = True
+            return
+        if self._expect == "key":
+            self._key = value
+            self._expect = "colon"
+        elif self._expect == "value" and self._key is not None:
+            self.fields[self._key] = value
+            self.field_ends[self._key] = end
+            completed.append((self._key, value))
+            self._key = None
+            self._expect = "comma"
+
+
+# =============================================================================
+# RENDERER
+# =============================================================================
+
+@dataclass
+class TurnStats:
+    """Timing for one agent turn (seconds, from time.perf_counter)."""
+
+    agent: str
+    requested_at: float
+    first_token_at: float | None = None
+    ended_at: float | None = None
+    chars: int = 0
+    parts: list[str] = field(default_factory=list, repr=False)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        return None if self.first_token_at is None else self.first_token_at - self.requested_at
+
+    @property
+    def duration(self) -> float | None:
+        return None if self.ended_at is None else self.ended_at - self.requested_at
+
+
+class StreamRenderer:
+    """Renders interleaved agent update events as live, per-turn terminal output.
+
+    A turn is "requested" when the previous turn's last event arrived (or when
+    the renderer started), which is when the orchestrator dispatched the next
+    agent; time-to-first-token is measured from there to the first text delta.
+    Turns started together with dispatch() are requested at that call instead.
+    """
+
+    def __init__(
+        self,
+        print_header: Callable[[str], None],
+        format_manager_field: Callable[[str, Any, dict[str, Any]], str | None],
+        is_manager: Callable[[str], bool],
+        out: TextIO | None = None,
+    ):
+        self.print_header = print_header
+        self.format_manager_field = format_manager_field
+        self.is_manager = is_manager
+        self.out = out if out is not None else sys.stdout
+        self.turns: list[TurnStats] = []
+        self._current: TurnStats | None = None
+        self._parser: IncrementalJsonFields | None = None
+        self._rendered_fields: set[str] = set()
+        self._last_event_at = time.perf_counter()
+        self._line_open = False
+        self._concurrent: dict[str, TurnStats] = {}  # dispatched turns not yet printed in full
+
+    def feed(self, agent: str, text: str) -> None:
+        """Handle one update event's text for the given agent."""
+        now = time.perf_counter()
+        if agent in self._concurrent:
+            self._feed_concurrent(self._concurrent[agent], text, now)
+            return
+        if self._concurrent:
+            self._flush_concurrent()
+        if self._current is None or agent != self._current.agent:
+            self._end_turn(self._last_event_at)
+            self._start_turn(agent, self._last_event_at)
+        self._last_event_at = now
+        if not text:
+            return
+
+        turn = self._current
+        if turn.first_token_at is None:
+            turn.first_token_at = now
+        turn.parts.append(text)
+        turn.chars += len(text)
+
+        if self._parser is not None and not self._parser.failed:
+            if self._parser.feed(text):
+                self._render_fields()
+            if self._parser.failed:
+                # Not JSON after all: fall back to raw streaming of what is not shown yet
+                remainder = turn.text[self._unrendered_from():].lstrip(", \t\r\n")
+                if remainder:
+                    self._write(remainder)
+        else:
+            self._write(text)
+
+    def finish(self) -> None:
+        """Close the current turn (call when the workflow emits its output)."""
+        self._flush_concurrent()
+        self._end_turn(time.perf_counter())
+
+    def dispatch(self, agents: list[str]) -> None:
+        """Start turns for several agents that run at the same time (their events interleave)."""
+        self._flush_concurrent()
+        self._end_turn(self._last_event_at)
+        now = time.perf_counter()
+        for agent in agents:
+            turn = TurnStats(agent=agent, requested_at=now)
+            self.turns.append(turn)
+            self._concurrent[agent] = turn
+        self._last_event_at = now
+
+    def complete(self, agent: str) -> None:
+        """End a dispatched agent's turn; if it was on screen, the next one takes over."""
+        turn = self._concurrent.get(agent)
+        if turn is None:
+            return
+        turn.ended_at = time.perf_counter()
+        if self._current is turn:
+            self._close_concurrent(turn)
+        if self._current is None:
+            self._show_next()
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+
+    def _feed_concurrent(self, turn: TurnStats, text: str, now: float) -> None:
+        self._last_event_at = now
+        if not text:
+            return
+        if turn.first_token_at is None:
+            turn.first_token_at = now
+        turn.parts.append(text)
+        turn.chars += len(text)
+        if self._current is turn:
+            self._write(text)
+        elif self._current is None:
+            self._show(turn)
+
+    def _show(self, turn: TurnStats) -> None:
+        """Put a dispatched turn on screen with the text it has buffered so far."""
+        self._current = turn
+        self.print_header(turn.agent)
+        if turn.parts:
+            self._write(turn.text)
+
+    def _show_next(self) -> None:
+        """Print finished turns whole, then stream the first running turn that has output."""
+        while self._current is None:
+            waiting = list(self._concurrent.values())
+            turn = next((t for t in waiting if t.ended_at is not None), None) or next(
+                (t for t in waiting if t.parts), None
+            )
+            if turn is None:
+                return
+            self._show(turn)
+            if turn.ended_at is not None:
+                self._close_concurrent(turn)
+
+    def _close_concurrent(self, turn: TurnStats) -> None:
+        if self._line_open:
+            self.out.write("\n")
+            self._line_open = False
+        self.out.flush()
+        del self._concurrent[turn.agent]
+        self._current = None
+
+    def _flush_concurrent(self) -> None:
+        """Print every dispatched turn still waiting (the orchestrator moved on)."""
+        if not self._concurrent:
+            return
+        now = time.perf_counter()
+        for turn in self._concurrent.values():
+            if turn.ended_at is None:
+                turn.ended_at = now
+        if self._current is not None and self._current.agent in self._concurrent:
+            self._close_concurrent(self._current)
+        self._show_next()
+
+    def _start_turn(self, agent: str, requested_at: float) -> None:
+        self._current = TurnStats(agent=agent, requested_at=requested_at)
+        self.turns.append(self._current)
+        self._parser = IncrementalJsonFields() if self.is_manager(agent) else None
+        self._rendered_fields = set()
+        self.print_header(agent)
+
+    def _end_turn(self, ended_at: float) -> None:
+        turn = self._current
+        if turn is None:
+            return
+        turn.ended_at = ended_at
+        if self._parser is not None and not self._parser.failed:
+            self._render_fields()
+            if not self._rendered_fields and turn.text.strip():
+                self._write(turn.text.strip())
+        if self._line_open:
+            self.out.write("\n")
+            self._line_open = False
+        self.out.flush()
+        self._current = None
+        self._parser = None
+
+    def _render_fields(self) -> None:
+        """Print every completed manager field that is ready and not yet shown.
+
+        A field may depend on another (the conclusion needs finish=true), so all
+        pending fields are retried whenever a new one completes.
+        """
+        fields = self._parser.fields
+        for name, value in fields.items():
+            if name in self._rendered_fields:
+                continue
+            line = self.format_manager_field(name, value, fields)
+            if line is None:
+                continue
+            self._rendered_fields.add(name)
+            if self._line_open:
+                self.out.write("\n")
+            self.out.write(line + "\n")
+            self._line_open = False
+        self.out.flush()
+
+    def _unrendered_from(self) -> int:
+        """Offset in the turn's text just past the last field printed so far."""
+        ends = self._parser.field_ends
+        return max((ends[name] for name in self._rendered_fields), default=0)
+
+    def _write(self, text: str) -> None:
+        self.out.write(text)
+        self._line_open = not text.endswith("\n")
+        self.out.flush()
@@ -0,0 +1,113 @@
+"""
+Zava Logistics - Group Chat Termination
+=======================================
+
+Stateful termination condition for GroupChatBuilder.with_termination_condition.
+
+The group chat calls the condition with the full conversation after every
+turn. Instead of rescanning that list each time, the tracker remembers how
+many messages it has already seen and only inspects the new ones, keeping
+running counts. Each call therefore costs time proportional to the newly
+added messages only.
+
+Stop rules (first one that fires wins, see ``reason``):
+  - completion:  the completion phrase appears in an assistant message
+  - max_turns:   the number of assistant messages reaches max_turns
+  - tokens:      the estimated conversation size exceeds token_budget
+  - deadline:    wall-clock time since the first call exceeds deadline_seconds
+  - stagnation:  stagnation_turns consecutive participant messages that
+                 repeat the same speaker's previous message almost verbatim
+"""
+
+import re
+import time
+from typing import Callable
+
+from agent_framework import ChatMessage, Role
+
+
+# Two messages whose word sets overlap at least this much count as a repeat
+STAGNATION_SIMILARITY = 0.9
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+class TerminationTracker:
+    """Incremental termination condition with completion, turn, token, time and stagnation rules."""
+
+    def __init__(
+        self,
+        completion_phrase: str | None = None,
+        max_turns: int | None = None,
+        token_budget: int | None = None,
+        deadline_seconds: float | None = None,
+        stagnation_turns: int | None = None,
+        manager_name: str | None = None,
+        token_estimator: Callable[[str], int] = estimate_tokens,
+    ):
+        self.completion_phrase = completion_phrase.lower() if completion_phrase else None
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.deadline_seconds = deadline_seconds
+        self.stagnation_turns = stagnation_turns
+        self.manager_name = manager_name
+        self.token_estimator = token_estimator
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state (a new conversation starts)."""
+        self.seen = 0
+        self.assistant_messages = 0
+        self.tokens = 0
+        self.stale_streak = 0
+        self.started_at: float | None = None
+        self.reason: str | None = None
+        self._last_words: dict[str, frozenset[str]] = {}
+
+    def __call__(self, messages: list[ChatMessage]) -> bool:
+        if len(messages) < self.seen:
+            # The conversation was replaced rather than extended
+            self.reset()
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+        for msg in messages[self.seen:]:
+            self._observe(msg)
+        self.seen = len(messages)
+
+        if self.reason is None:
+            if self.max_turns is not None and self.assistant_messages >= self.max_turns:
+                self.reason = "max_turns"
+            elif self.token_budget is not None and self.tokens >= self.token_budget:
+                self.reason = "tokens"
+            elif self.deadline_seconds is not None and time.monotonic() - self.started_at >= self.deadline_seconds:
+                self.reason = "deadline"
+            elif self.stagnation_turns is not None and self.stale_streak >= self.stagnation_turns:
+                self.reason = "stagnation"
+        return self.reason is not None
+
+    def _observe(self, msg: ChatMessage) -> None:
+        text = msg.text or ""
+        self.tokens += self.token_estimator(text)
+        if msg.role != Role.ASSISTANT:
+            return
+
+        self.assistant_messages += 1
+        if self.completion_phrase and self.reason is None and self.completion_phrase in text.lower():
+            self.reason = "completion"
+
+        author = msg.author_name or ""
+        if not text or (self.manager_name and author == self.manager_name):
+            return
+        words = frozenset(_WORD_RE.findall(text.lower()))
+        previous = self._last_words.get(author)
+        if previous is not None and words and len(words & previous) / len(words | previous) >= STAGNATION_SIMILARITY:
+            self.stale_streak += 1
+        else:
+            self.stale_streak = 0
+        self._last_words[author] = words
@@ -0,0 +1,6 @@
+"""Offline checks: the modules live at the repo root, next to main.py."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
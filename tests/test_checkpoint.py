@@ -0,0 +1,134 @@
+"""Checkpoint round trip: a run that fails part-way and is resumed ends like one that never failed."""
+
+import asyncio
+import uuid
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+import main as app
+from benchmark import MockAgentClient, MockProfile, patched_app
+from checkpoint import CheckpointStore
+
+
+PROFILE = MockProfile(latency=0.0, tokens_per_second=0, tool_calls=False)
+
+
+class MockAgentsClient:
+    """Stand-in for the project's agents client; records the agents it deletes."""
+
+    def __init__(self):
+        self.deleted: list[str] = []
+        self.threads = SimpleNamespace(delete=self._delete_thread)
+
+    async def delete_agent(self, agent_id: str) -> None:
+        self.deleted.append(agent_id)
+
+    async def _delete_thread(self, thread_id: str) -> None:
+        pass
+
+
+class RecordingAgentClient(MockAgentClient):
+    """Mock agent client whose reply is a function of its input, logging every call."""
+
+    def __init__(self, log: list, fail_at: int | None, agents_client: MockAgentsClient | None, agent_id: str | None):
+        super().__init__(PROFILE)
+        self.log = log
+        self.fail_at = fail_at
+        self.agents_client = agents_client
+        if agents_client is not None:
+            self.agent_id = agent_id or f"asst_{uuid.uuid4().hex[:12]}"
+
+    async def _inner_get_streaming_response(self, *, messages, chat_options, **kwargs):
+        self.log.append((self.agent_name, [m.text for m in messages]))
+        if len(self.log) == self.fail_at:
+            raise RuntimeError("connection reset")
+        async for update in super()._inner_get_streaming_response(messages=messages, chat_options=chat_options, **kwargs):
+            yield update
+
+    def _response_text(self, history, chat_options) -> str:
+        if app.is_manager_agent(self.agent_name or ""):
+            return super()._response_text(history, chat_options)
+        packages = 1_000 + zlib.crc32("\n".join(m.text for m in history).encode()) % 90_000
+        return f"{self.agent_name}: LAX-JFK carries {packages} packages on the peak day."
+
+
+class RecordingClientFactory:
+    def __init__(self, log: list, fail_at: int | None = None, agents_client: MockAgentsClient | None = None):
+        self.log = log
+        self.fail_at = fail_at
+        self.agents_client = agents_client
+
+    def create(self, agent_id: str | None = None, **kwargs) -> RecordingAgentClient:
+        return RecordingAgentClient(self.log, self.fail_at, self.agents_client, agent_id)
+
+    async def close(self) -> None:
+        pass
+
+
+def _run(
+    checkpoint_dir,
+    orchestration_mode: str,
+    fail_at: int | None = None,
+    resume: bool = False,
+    agents_client: MockAgentsClient | None = None,
+) -> list:
+    """Run main() on the recording mock; returns the model calls it made."""
+    log: list = []
+    factory = RecordingClientFactory(log, fail_at, agents_client)
+    with patched_app(
+        PROFILE,
+        AgentClientFactory=lambda *args, **kwargs: factory,
+        CHECKPOINT_DIR=checkpoint_dir,
+        ORCHESTRATION_MODE=orchestration_mode,
+        MANAGER_MODE="rules",
+    ):
+        asyncio.run(app.main(resume=resume))
+    return log
+
+
+def _participant_turns(log: list) -> list[str]:
+    return [name for name, _ in log if not app.is_manager_agent(name)]
+
+
+@pytest.mark.parametrize("orchestration_mode", ["sequential", "fanout"])
+def test_resumed_run_picks_the_same_speakers_and_synthesis_input(tmp_path, orchestration_mode):
+    uninterrupted = _run(tmp_path / "uninterrupted", orchestration_mode)
+
+    checkpoints = tmp_path / "checkpoints"
+    with pytest.raises(RuntimeError):
+        _run(checkpoints, orchestration_mode, fail_at=4)
+    saved = CheckpointStore(checkpoints).latest()
+    assert saved is not None and saved.turns > 0
+    failed = [m["author"] for m in saved.messages if m["role"] != "user"]
+
+    resumed = _run(checkpoints, orchestration_mode, resume=True)
+
+    # The resumed run continues with the speakers the failed one had not reached ...
+    assert failed + _participant_turns(resumed) == _participant_turns(uninterrupted)
+    # ... and the manager synthesizes from the same transcript
+    assert resumed[-1] == uninterrupted[-1]
+    assert CheckpointStore(checkpoints).latest() is None
+
+
+def test_new_run_discards_unfinished_checkpoints_and_their_agents(tmp_path):
+    agents_client = MockAgentsClient()
+    with pytest.raises(RuntimeError):
+        _run(tmp_path, "sequential", fail_at=3, agents_client=agents_client)
+    saved = CheckpointStore(tmp_path).latest()
+    assert saved is not None and saved.agent_ids
+
+    _run(tmp_path, "sequential", agents_client=agents_client)
+    assert set(saved.agent_ids.values()) <= set(agents_client.deleted)
+    assert CheckpointStore(tmp_path).all() == []
+
+
+def test_checkpoints_are_kept_when_their_agents_cannot_be_deleted(tmp_path):
+    with pytest.raises(RuntimeError):
+        _run(tmp_path, "sequential", fail_at=3)
+    saved = CheckpointStore(tmp_path).latest()
+
+    _run(tmp_path, "sequential")
+    assert [c.run_id for c in CheckpointStore(tmp_path).all()] == [saved.run_id]
+
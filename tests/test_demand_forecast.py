@@ -0,0 +1,54 @@
+"""Demand forecaster: extending a fitted history agrees with refitting all of it."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from demand_analytics import DemandData
+from demand_forecast import DemandForecaster, load_forecaster, load_peak_calendar
+
+
+REPO = Path(__file__).resolve().parent.parent
+CALENDAR = load_peak_calendar(REPO / "docs")
+FULL = DemandData.from_csv(REPO / "data" / "package_demand.csv")
+THROUGH_FEB_20 = FULL.subset(end_date="2026-02-20")
+
+
+def assert_same_forecast(actual: DemandForecaster, expected: DemandForecaster) -> None:
+    assert actual.last_day == expected.last_day and actual.history_days == expected.history_days
+    np.testing.assert_array_equal(actual.alpha, expected.alpha)
+    np.testing.assert_array_equal(actual.beta, expected.beta)
+    got, want = actual.forecast(90), expected.forecast(90)
+    for key in ("packages", "packages_low", "packages_high", "weight_kg", "weight_kg_low", "weight_kg_high"):
+        np.testing.assert_allclose(got[key], want[key], rtol=1e-9, err_msg=key)
+
+
+def test_extend_agrees_with_refit():
+    extended = DemandForecaster.fit(THROUGH_FEB_20, CALENDAR)
+    assert extended.extend(FULL) == len(FULL.days) - len(THROUGH_FEB_20.days)
+
+    assert_same_forecast(extended, DemandForecaster.fit(FULL, CALENDAR))
+
+
+def test_daily_updates_agree_with_refit():
+    updated = DemandForecaster.fit(THROUGH_FEB_20, CALENDAR)
+    for d in range(len(THROUGH_FEB_20.days), len(FULL.days)):
+        updated.update(FULL.days[d], FULL.packages[:, d], FULL.weight_kg[:, d])
+
+    assert_same_forecast(updated, DemandForecaster.fit(FULL, CALENDAR))
+
+
+def test_saved_state_is_extended_with_appended_days(tmp_path, monkeypatch):
+    load_forecaster(THROUGH_FEB_20, CALENDAR, tmp_path)
+    refitted = DemandForecaster.fit(FULL, CALENDAR)
+
+    monkeypatch.setattr(DemandForecaster, "fit", classmethod(lambda *args: pytest.fail("refitted")))
+    assert_same_forecast(load_forecaster(FULL, CALENDAR, tmp_path), refitted)
+
+
+def test_changed_history_is_refitted(tmp_path):
+    load_forecaster(FULL, CALENDAR, tmp_path)
+    edited = FULL.subset(multiplier=1.1)
+
+    assert_same_forecast(load_forecaster(edited, CALENDAR, tmp_path), DemandForecaster.fit(edited, CALENDAR))
@@ -0,0 +1,89 @@
+"""Columnar demand store: the append and rebuild paths read back what DemandData.from_csv reads."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from demand_analytics import DemandData
+from demand_store import DemandStore
+
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent / "data" / "package_demand.csv"
+
+
+def _lines() -> tuple[str, list[str]]:
+    header, *rows = SAMPLE_CSV.read_text(encoding="utf-8").splitlines(keepends=True)
+    return header, rows
+
+
+def _write(path: Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+    # Same-size edits must still look changed to the store
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def _open(tmp_path: Path, csv_path: Path) -> DemandData:
+    return DemandData.from_store(DemandStore.open(tmp_path / "store", csv_path))
+
+
+def assert_same(actual: DemandData, expected: DemandData) -> None:
+    for name in ("days", "routes", "origins", "destinations", "packages", "weight_kg"):
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name), err_msg=name)
+
+
+def test_store_matches_csv(tmp_path):
+    csv_path = tmp_path / "demand.csv"
+    _write(csv_path, SAMPLE_CSV.read_text(encoding="utf-8"))
+
+    assert_same(_open(tmp_path, csv_path), DemandData.from_csv(csv_path))
+    # Reopening an unchanged CSV reads the same columns
+    assert_same(_open(tmp_path, csv_path), DemandData.from_csv(csv_path))
+
+
+def test_date_range_matches_csv_subset(tmp_path):
+    csv_path = tmp_path / "demand.csv"
+    _write(csv_path, SAMPLE_CSV.read_text(encoding="utf-8"))
+    store = DemandStore.open(tmp_path / "store", csv_path)
+
+    assert_same(
+        DemandData.from_store(store, "2026-02-08", "2026-02-14"),
+        DemandData.from_csv(csv_path).subset(start_date="2026-02-08", end_date="2026-02-14"),
+    )
+
+
+def test_appended_days_are_ingested_without_a_rebuild(tmp_path, monkeypatch):
+    header, rows = _lines()
+    csv_path = tmp_path / "demand.csv"
+    _write(csv_path, header + "".join(rows[:40]))
+    _open(tmp_path, csv_path)
+
+    # New days, including a route the store has not seen yet
+    new_route = "2026-03-01,SEA-DEN,Seattle,Denver,1900,6840\n"
+    _write(csv_path, header + "".join(rows) + new_route)
+    monkeypatch.setattr(DemandStore, "_rebuild", lambda self, path: pytest.fail("store was rebuilt"))
+
+    assert_same(_open(tmp_path, csv_path), DemandData.from_csv(csv_path))
+
+
+@pytest.mark.parametrize("change", ["edited row", "older day appended", "unfinished last line"])
+def test_other_changes_rebuild_the_store(tmp_path, change):
+    header, rows = _lines()
+    csv_path = tmp_path / "demand.csv"
+    _write(csv_path, header + "".join(rows))
+    _open(tmp_path, csv_path)
+
+    if change == "edited row":
+        text = header + rows[0].replace("4200", "4300") + "".join(rows[1:])
+    elif change == "older day appended":
+        text = header + "".join(rows) + "2026-02-02,SEA-DEN,Seattle,Denver,1900,6840\n"
+    else:
+        # Ingested while the last line was still being written, then completed
+        _write(csv_path, header + "".join(rows) + "2026-03-01,LAX-JFK,Los Angeles,New York,4250,153")
+        _open(tmp_path, csv_path)
+        text = header + "".join(rows) + "2026-03-01,LAX-JFK,Los Angeles,New York,4250,15300\n"
+    _write(csv_path, text)
+
+    assert_same(_open(tmp_path, csv_path), DemandData.from_csv(csv_path))
@@ -0,0 +1,139 @@
+"""Rate-limit scheduler: priority order, Retry-After handling and safe retries of agent runs."""
+
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from agent_framework import ChatAgent, ChatResponseUpdate, Role
+from agent_framework.exceptions import ServiceResponseException
+
+from benchmark import MockAgentClient, MockProfile
+from rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimitScheduler, limit_chat_client, retry_after_seconds
+
+
+PROFILE = MockProfile(latency=0.0, tokens_per_second=0, tool_calls=False)
+
+
+class ThrottledAgentClient(MockAgentClient):
+    """Mock agent client whose N-th call is throttled.
+
+    With `run_started` the throttle hits like a failed agent run: the input
+    has been posted to the thread (created if needed) before the error.
+    """
+
+    def __init__(self, run_started: bool, throttled_call: int = 1):
+        super().__init__(PROFILE)
+        self.run_started = run_started
+        self.throttled_call = throttled_call
+        self.attempts = 0
+
+    async def _inner_get_streaming_response(self, *, messages, chat_options, **kwargs):
+        self.attempts += 1
+        if self.attempts == self.throttled_call:
+            if self.run_started:
+                thread_id = chat_options.conversation_id or f"thread_{uuid.uuid4().hex[:12]}"
+                self._threads.setdefault(thread_id, []).extend(m for m in messages if m.role != Role.SYSTEM)
+                yield ChatResponseUpdate(contents=[], conversation_id=thread_id)
+            raise ServiceResponseException("Rate limit is exceeded. Try again in 0.01 seconds.")
+        async for update in super()._inner_get_streaming_response(messages=messages, chat_options=chat_options, **kwargs):
+            yield update
+
+
+def test_waiting_calls_are_granted_by_priority_then_arrival():
+    async def run() -> list[str]:
+        scheduler = RateLimitScheduler(requests_per_minute=6000)
+        scheduler.requests.level = 0  # everything queues
+        granted = []
+
+        async def request(name: str, priority: int) -> None:
+            await scheduler.acquire(1, priority)
+            granted.append(name)
+
+        await asyncio.gather(
+            request("batch-1", PRIORITY_BATCH),
+            request("interactive-1", PRIORITY_INTERACTIVE),
+            request("batch-2", PRIORITY_BATCH),
+            request("interactive-2", PRIORITY_INTERACTIVE),
+        )
+        return granted
+
+    assert asyncio.run(run()) == ["interactive-1", "interactive-2", "batch-1", "batch-2"]
+
+
+def test_retry_after_is_read_from_headers_and_messages():
+    def throttled(headers=None, message="Too Many Requests"):
+        exc = Exception(message)
+        exc.response = SimpleNamespace(status_code=429, headers=headers or {})
+        return exc
+
+    assert retry_after_seconds(throttled({"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(throttled({"retry-after": "7"})) == 7.0
+    assert 0 < retry_after_seconds(throttled({"retry-after": "Wed, 01 Jan 2100 00:00:00 GMT"}))
+    assert retry_after_seconds(Exception("Rate limit is exceeded. Try again in 20 seconds.")) == 20.0
+    assert retry_after_seconds(throttled()) == 0.0
+    assert retry_after_seconds(Exception("connection reset")) is None
+
+
+def test_backoff_pauses_the_whole_queue_for_retry_after():
+    async def run() -> float:
+        scheduler = RateLimitScheduler(requests_per_minute=6000)
+        delay = scheduler.backoff(0, 0.1)
+        assert 0.1 <= delay <= 0.1 * 1.2 + 1e-9
+        started = time.monotonic()
+        await scheduler.acquire(1)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def _run_turns(client: MockAgentClient, turns: list[str], stream: bool = False) -> tuple[list[str], RateLimitScheduler]:
+    """Run the turns on one agent thread through the scheduler; returns the replies."""
+    scheduler = RateLimitScheduler()
+    limit_chat_client(client, scheduler)
+    agent = ChatAgent(chat_client=client, name="AnalystAgent")
+
+    async def turn(text: str, thread) -> str:
+        if stream:
+            return "".join([update.text async for update in agent.run_stream(text, thread=thread)])
+        return (await agent.run(text, thread=thread)).text
+
+    async def run() -> list[str]:
+        thread = agent.get_new_thread()
+        return [await turn(text, thread) for text in turns]
+
+    return asyncio.run(run()), scheduler
+
+
+def _thread_inputs(client: MockAgentClient) -> list[str]:
+    """User messages on the client's only thread."""
+    assert len(client._threads) == 1
+    return [m.text for m in next(iter(client._threads.values())) if m.role == Role.USER]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_throttled_on_a_new_thread_is_retried_on_that_thread(stream):
+    client = ThrottledAgentClient(run_started=True)
+    replies, scheduler = _run_turns(client, ["Plan LAX-JFK"], stream)
+
+    assert scheduler.retries == 1 and replies[0]
+    assert _thread_inputs(client) == ["Plan LAX-JFK"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_throttled_on_an_existing_thread_sends_its_input_once(stream):
+    client = ThrottledAgentClient(run_started=True, throttled_call=2)
+    replies, scheduler = _run_turns(client, ["Plan LAX-JFK", "Now ORD-ATL"], stream)
+
+    assert scheduler.retries == 1 and all(replies)
+    assert _thread_inputs(client) == ["Plan LAX-JFK", "Now ORD-ATL"]
+
+
+def test_call_throttled_before_its_run_started_is_retried_as_is():
+    client = ThrottledAgentClient(run_started=False)
+    replies, scheduler = _run_turns(client, ["Plan LAX-JFK"])
+
+    assert scheduler.retries == 1 and replies[0]
+    assert _thread_inputs(client) == ["Plan LAX-JFK"]
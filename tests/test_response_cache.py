@@ -0,0 +1,63 @@
+"""LLM response cache: tool results are part of the key and of the turns replayed into a real thread."""
+
+import asyncio
+
+from agent_framework import ChatMessage, ChatOptions, ChatResponseUpdate, FunctionCallContent, FunctionResultContent
+
+from response_cache import CachingChatClient, ResponseStore, cache_key, normalize_message
+
+
+class RecordingChatClient:
+    """Inner client that answers every request with the same text, recording what it was sent."""
+
+    def __init__(self):
+        self.requests: list[list[ChatMessage]] = []
+
+    async def get_streaming_response(self, messages, chat_options=None, **kwargs):
+        self.requests.append(list(messages))
+        yield ChatResponseUpdate(text="LAX-JFK needs 2 extra trucks.", role="assistant", conversation_id="thread_1")
+
+
+def _tool_turn(result: str) -> list[ChatMessage]:
+    return [
+        ChatMessage(role="user", text="How many packages on LAX-JFK?"),
+        ChatMessage(role="assistant", contents=[FunctionCallContent(call_id="call_1", name="route_volume", arguments='{"route": "LAX-JFK"}')]),
+        ChatMessage(role="tool", contents=[FunctionResultContent(call_id="call_1", result=result)]),
+    ]
+
+
+def _key(messages: list[ChatMessage]) -> str:
+    return cache_key("AnalystAgent", ChatOptions(), [normalize_message(m) for m in messages])
+
+
+def test_tool_results_are_part_of_the_key():
+    assert _key(_tool_turn('{"packages": 4200}')) != _key(_tool_turn('{"packages": 5100}'))
+    assert _key(_tool_turn('{"packages": 4200}')) == _key(_tool_turn('{"packages": 4200}'))
+
+
+def test_cached_tool_turns_are_replayed_into_the_real_thread(tmp_path):
+    store = ResponseStore(tmp_path)
+
+    async def ask(client: CachingChatClient, messages: list[ChatMessage], conversation_id: str | None = None) -> str | None:
+        options = ChatOptions(conversation_id=conversation_id)
+        updates = [u async for u in client.get_streaming_response(messages, chat_options=options)]
+        return updates[-1].conversation_id
+
+    async def run() -> list[ChatMessage]:
+        # Record the tool turn, then serve it from the cache in a fresh process
+        await ask(CachingChatClient(RecordingChatClient(), store, "AnalystAgent"), _tool_turn('{"packages": 4200}'))
+        inner = RecordingChatClient()
+        client = CachingChatClient(inner, store, "AnalystAgent")
+        conversation_id = await ask(client, _tool_turn('{"packages": 4200}'))
+        assert inner.requests == []
+        await ask(client, [ChatMessage(role="user", text="And ORD-ATL?")], conversation_id)
+        return inner.requests[0]
+
+    sent = [m.text for m in asyncio.run(run())]
+    assert sent == [
+        "How many packages on LAX-JFK?",
+        '[called route_volume({"route": "LAX-JFK"})]',
+        '[result of call_1] {"packages": 4200}',
+        "LAX-JFK needs 2 extra trucks.",
+        "And ORD-ATL?",
+    ]
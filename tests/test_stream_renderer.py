@@ -0,0 +1,43 @@
+"""Stream renderer: manager fields are shown once, also when the JSON breaks off mid-stream."""
+
+import io
+
+from stream_renderer import IncrementalJsonFields, StreamRenderer
+
+
+def _render(chunks: list[str]) -> str:
+    out = io.StringIO()
+    renderer = StreamRenderer(
+        print_header=lambda agent: out.write(f"## {agent}\n"),
+        format_manager_field=lambda name, value, fields: f"{name}: {value}" if name != "finish" else None,
+        is_manager=lambda agent: agent == "ManagerAgent",
+        out=out,
+    )
+    for chunk in chunks:
+        renderer.feed("ManagerAgent", chunk)
+    renderer.finish()
+    return out.getvalue()
+
+
+def test_fields_end_where_their_value_ends():
+    parser = IncrementalJsonFields()
+    text = '{"selected_participant": "AnalystAgent", "finish": false}'
+    parser.feed(text[:20])
+    parser.feed(text[20:])
+    assert text[: parser.field_ends["selected_participant"]] == '{"selected_participant": "AnalystAgent"'
+    assert text[: parser.field_ends["finish"]] == text[:-1] + "}"
+
+
+def test_broken_json_falls_back_to_the_text_not_shown_yet():
+    output = _render(['{"selected_participant": "AnalystAgent", "instr', 'uction": "Check LAX-JFK", oops, "finish": true}'])
+
+    assert output == (
+        "## ManagerAgent\n"
+        "selected_participant: AnalystAgent\n"
+        "instruction: Check LAX-JFK\n"
+        'oops, "finish": true}\n'
+    )
+
+
+def test_text_that_is_not_json_is_streamed_raw():
+    assert _render(["Analyst", " should go next."]) == "## ManagerAgent\nAnalyst should go next.\n"
@@ -0,0 +1,400 @@
+"""
+Zava Logistics - Run Tracing
+============================
+
+Structured timing for one run: setup phases, agent turns and tool calls.
+
+  - Setup phases (doc upload, vector store, remote agent creation) are
+    recorded with ``span(...)``, a no-op unless a Tracer is active.
+  - Agent turns are reconstructed from the streamed update events: each turn
+    records time to first token, duration, tokens in/out (from the usage
+    the service reports) and a child span per tool call. Local function
+    tools are timed from the call to its result; hosted File Search from the
+    run step that performs it.
+
+Spans are exported as JSON lines in the OTLP/JSON trace format (one
+TracesData object per line, as written by the OpenTelemetry Collector file
+exporter), and ``format_summary`` prints where the wall-clock time went, per
+agent and per phase.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from agent_framework import FunctionCallContent, FunctionResultContent, UsageContent
+
+
+SERVICE_NAME = "zava-logistics"
+
+# Tools whose spans count as document search in the summary
+FILE_SEARCH_TOOLS = {"search_company_docs", "file_search"}
+
+# How deep to follow raw_representation when looking for service run steps
+_RAW_DEPTH = 4
+
+
+@dataclass
+class Span:
+    """One timed operation (times in ns from time.perf_counter_ns)."""
+
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds (0 while the span is still open)."""
+        return 0.0 if self.end_ns is None else (self.end_ns - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+# The tracer of the run in progress and the span new spans are nested under
+_active_tracer: contextvars.ContextVar["Tracer | None"] = contextvars.ContextVar("active_tracer", default=None)
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class Tracer:
+    """Collects the spans of one run under a root ``run`` span (closed by ``close``)."""
+
+    def __init__(self, service_name: str = SERVICE_NAME):
+        self.service_name = service_name
+        self.trace_id = _new_id(16)
+        self.spans: list[Span] = []
+        # perf_counter_ns -> unix time, fixed once so all spans share one clock
+        self._epoch_offset = time.time_ns() - time.perf_counter_ns()
+        self.root = self.start("run", parent=None)
+
+    def close(self) -> None:
+        """End the run span."""
+        if self.root.end_ns is None:
+            self.root.end_ns = time.perf_counter_ns()
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        """Make this the tracer that module-level ``span(...)`` calls record into."""
+        token = _active_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _active_tracer.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span."""
+        s = self.start(name, parent=_current_span.get() or self.root, **attributes)
+        token = _current_span.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            s.end_ns = time.perf_counter_ns()
+
+    def start(self, name: str, parent: Span | None = None, start_ns: int | None = None, **attributes: Any) -> Span:
+        """Open a span explicitly (close it by setting ``end_ns``)."""
+        s = Span(
+            name=name,
+            span_id=_new_id(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=start_ns if start_ns is not None else time.perf_counter_ns(),
+            attributes=dict(attributes),
+        )
+        self.spans.append(s)
+        return s
+
+    # -------------------------------------------------------------------------
+    # Export
+    # -------------------------------------------------------------------------
+
+    def to_otlp(self, s: Span) -> dict[str, Any]:
+        """One span as an OTLP/JSON TracesData object."""
+        end_ns = s.end_ns if s.end_ns is not None else s.start_ns
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns + self._epoch_offset),
+            "endTimeUnixNano": str(end_ns + self._epoch_offset),
+            "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items() if v is not None],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            span["parentSpanId"] = s.parent_id
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "zava.tracing"}, "spans": [span]}],
+            }]
+        }
+
+    def export_jsonl(self, path: Path) -> Path:
+        """Write all spans, one OTLP/JSON line each, in start order."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for s in sorted(self.spans, key=lambda s: s.start_ns):
+                f.write(json.dumps(self.to_otlp(s)) + "\n")
+        return path
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    elif isinstance(value, (list, tuple)):
+        typed = {"arrayValue": {"values": [{"stringValue": str(v)} for v in value]}}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Time a block on the active tracer; does nothing when no tracer is active."""
+    tracer = _active_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, **attributes) as s:
+        yield s
+
+
+def instrument_agent_creation(tracer: Tracer, chat_client: Any, agent_name: str) -> None:
+    """Record an ``agent.create`` span when the client creates its remote agent.
+
+    AzureAIAgentClient creates the agent lazily on its first run; other
+    clients are left untouched.
+    """
+    client = getattr(chat_client, "inner", chat_client)  # unwrap the response cache
+    get_or_create = getattr(client, "_get_agent_id_or_create", None)
+    if get_or_create is None or not hasattr(client, "agent_id"):
+        return
+
+    async def traced(*args: Any, **kwargs: Any) -> str:
+        if client.agent_id is not None:
+            return await get_or_create(*args, **kwargs)
+        with tracer.span("agent.create", agent=agent_name) as s:
+            agent_id = await get_or_create(*args, **kwargs)
+            s.set(agent_id=agent_id)
+            return agent_id
+
+    client._get_agent_id_or_create = traced
+
+
+# =============================================================================
+# TURN TRACING
+# =============================================================================
+
+def _agent_name(executor_id: str) -> str:
+    """'groupchat_agent:AnalystAgent' -> 'AnalystAgent'."""
+    return executor_id.rsplit(":", 1)[-1]
+
+
+def _file_search_step(update: Any) -> Any | None:
+    """The service run step behind an update, if it is a File Search tool call."""
+    raw = getattr(update, "raw_representation", None)
+    for _ in range(_RAW_DEPTH):
+        if raw is None:
+            return None
+        details = getattr(raw, "step_details", None)
+        if details is not None:
+            calls = getattr(details, "tool_calls", None) or []
+            return raw if any(getattr(c, "type", None) == "file_search" for c in calls) else None
+        raw = getattr(raw, "raw_representation", None)
+    return None
+
+
+class TurnTracer:
+    """Builds turn and tool-call spans from the stream of agent update events.
+
+    Turn boundaries match the renderer: a turn is requested when the previous
+    turn's last event arrived, and ends with the last event of its agent.
+    Turns started together with dispatch() overlap; each ends at complete().
+    """
+
+    def __init__(self, tracer: Tracer, parent: Span | None = None):
+        self.tracer = tracer
+        self.parent = parent or tracer.root
+        self._turn: Span | None = None
+        self._counts: dict[str, int] = {}
+        self._last_event_ns = time.perf_counter_ns()
+        self._calls: set[str] = set()
+        self._tools: dict[str, Span] = {}       # call_id -> open tool span
+        self._steps: dict[str, Span] = {}       # run step id -> open file search span
+        self._concurrent: dict[str, Span] = {}  # agent -> open dispatched turn
+
+    def observe(self, executor_id: str, update: Any) -> None:
+        """Handle one agent update (an AgentRunUpdateEvent's data)."""
+        now = time.perf_counter_ns()
+        agent = _agent_name(executor_id)
+        turn = self._concurrent.get(agent)
+        if turn is None:
+            self._end_concurrent(self._last_event_ns)
+            if self._turn is None or self._turn.attributes["agent"] != agent:
+                self._end_turn(self._last_event_ns)
+                self._start_turn(agent, self._last_event_ns)
+            turn = self._turn
+        self._last_event_ns = now
+        if update is None:
+            return
+
+        text = getattr(update, "text", "") or ""
+        if text:
+            if "first_token_ns" not in turn.attributes:
+                turn.attributes["first_token_ns"] = now
+            self._close_steps(now, agent)
+
+        for content in getattr(update, "contents", None) or []:
+            if isinstance(content, UsageContent):
+                details = content.details
+                turn.attributes["tokens_in"] += details.input_token_count or 0
+                turn.attributes["tokens_out"] += details.output_token_count or 0
+            elif isinstance(content, FunctionCallContent) and content.call_id and content.call_id not in self._calls:
+                self._calls.add(content.call_id)
+                turn.attributes["tool_calls"] += 1
+                self._tools[content.call_id] = self.tracer.start(
+                    "tool_call", parent=turn, start_ns=now, agent=agent, tool=content.name, call_id=content.call_id
+                )
+            elif isinstance(content, FunctionResultContent):
+                tool = self._tools.pop(content.call_id, None)
+                if tool is not None:
+                    tool.end_ns = now
+                    if content.exception is not None:
+                        tool.error = str(content.exception)
+
+        step = _file_search_step(update)
+        if step is not None:
+            step_id = getattr(step, "id", None) or "file_search"
+            if step_id not in self._steps:
+                turn.attributes["tool_calls"] += 1
+                self._steps[step_id] = self.tracer.start(
+                    "tool_call", parent=turn, start_ns=now, agent=agent, tool="file_search", hosted=True
+                )
+            if getattr(step, "status", None) in ("completed", "failed", "cancelled", "expired"):
+                self._steps.pop(step_id).end_ns = now
+
+    def finish(self) -> None:
+        """Close the current turn (call when the workflow emits its output)."""
+        now = time.perf_counter_ns()
+        self._end_concurrent(now)
+        self._end_turn(now)
+
+    def dispatch(self, agents: list[str]) -> None:
+        """Open overlapping turns for agents that run at the same time."""
+        self._end_concurrent(self._last_event_ns)
+        self._end_turn(self._last_event_ns)
+        now = time.perf_counter_ns()
+        for agent in agents:
+            self._concurrent[agent] = self._new_turn(agent, now, concurrent=True)
+        self._last_event_ns = now
+
+    def complete(self, agent: str) -> None:
+        """Close a dispatched agent's turn."""
+        turn = self._concurrent.pop(agent, None)
+        if turn is not None:
+            self._close_turn(turn, time.perf_counter_ns())
+
+    def _new_turn(self, agent: str, requested_ns: int, **attributes: Any) -> Span:
+        self._counts[agent] = self._counts.get(agent, 0) + 1
+        return self.tracer.start(
+            "agent.turn", parent=self.parent, start_ns=requested_ns,
+            agent=agent, turn=self._counts[agent], tokens_in=0, tokens_out=0, tool_calls=0, **attributes,
+        )
+
+    def _start_turn(self, agent: str, requested_ns: int) -> None:
+        self._turn = self._new_turn(agent, requested_ns)
+
+    def _close_steps(self, now: int, agent: str | None = None) -> None:
+        # Text after a hosted search means the search is done, even if the
+        # completed step event was not surfaced
+        for step_id, s in list(self._steps.items()):
+            if agent is None or s.attributes["agent"] == agent:
+                s.end_ns = now
+                del self._steps[step_id]
+
+    def _close_turn(self, turn: Span, ended_ns: int) -> None:
+        """End a turn and the tool spans its agent still has open."""
+        turn.end_ns = ended_ns
+        first_token = turn.attributes.pop("first_token_ns", None)
+        turn.set(ttft_ms=round((first_token - turn.start_ns) / 1e6, 1) if first_token else None)
+        agent = turn.attributes["agent"]
+        for call_id, s in list(self._tools.items()):
+            if s.attributes["agent"] == agent:
+                s.end_ns = ended_ns
+                del self._tools[call_id]
+        self._close_steps(ended_ns, agent)
+
+    def _end_turn(self, ended_ns: int) -> None:
+        if self._turn is not None:
+            self._close_turn(self._turn, ended_ns)
+            self._turn = None
+
+    def _end_concurrent(self, ended_ns: int) -> None:
+        for turn in self._concurrent.values():
+            self._close_turn(turn, ended_ns)
+        self._concurrent.clear()
+
+
+# =============================================================================
+# SUMMARY
+# =============================================================================
+
+def format_summary(tracer: Tracer) -> str:
+    """Plain-text tables of time per phase and per agent, as a share of the run."""
+    wall_seconds = tracer.root.duration
+
+    def share(seconds: float) -> str:
+        return f"{seconds / wall_seconds * 100:5.1f}%" if wall_seconds else "    -"
+
+    lines = [f"{'Phase':<22}{'Count':>6}{'Time':>10}{'Share':>8}"]
+    phases: dict[str, list[Span]] = {}
+    for s in tracer.spans:
+        if s is tracer.root:
+            continue
+        if s.name == "tool_call":
+            key = "file search" if s.attributes.get("tool") in FILE_SEARCH_TOOLS else "tool calls"
+        else:
+            key = s.name
+        phases.setdefault(key, []).append(s)
+    for name, spans in phases.items():
+        seconds = sum(s.duration for s in spans)
+        lines.append(f"{name:<22}{len(spans):>6}{seconds:>9.2f}s{share(seconds):>8}")
+
+    turns = [s for s in tracer.spans if s.name == "agent.turn"]
+    if turns:
+        lines += ["", f"{'Agent':<16}{'Turns':>6}{'Time':>10}{'Share':>8}{'Avg TTFT':>10}{'Tokens in':>11}{'Tokens out':>12}{'Tools':>7}"]
+        agents: dict[str, list[Span]] = {}
+        for s in turns:
+            agents.setdefault(s.attributes["agent"], []).append(s)
+        for agent, spans in sorted(agents.items(), key=lambda item: -sum(s.duration for s in item[1])):
+            seconds = sum(s.duration for s in spans)
+            ttfts = [s.attributes["ttft_ms"] for s in spans if s.attributes.get("ttft_ms") is not None]
+            ttft = f"{sum(ttfts) / len(ttfts) / 1000:.2f}s" if ttfts else "-"
+            lines.append(
+                f"{agent:<16}{len(spans):>6}{seconds:>9.2f}s{share(seconds):>8}{ttft:>10}"
+                f"{sum(s.attributes['tokens_in'] for s in spans):>11,}"
+                f"{sum(s.attributes['tokens_out'] for s in spans):>12,}"
+                f"{sum(s.attributes['tool_calls'] for s in spans):>7}"
+            )
+    return "\n".join(lines)